@@ -1,95 +1,218 @@
+import argparse
 import requests
-from bs4 import BeautifulSoup
 import json
 import time
 import os
+from extract.job_manifest import open_manifest, run_jobs
+from local_signs import build_local_index, lookup_local_sign
+from phrase_segmenter import build_sign_trie, load_sign_glosses, segment_phrase
+from signasl_pages import parse_page
 
-def get_asl_video_from_page(url, cache):
-    """Scrapes a given URL and returns the first video URL if available."""
+SIGNASL_BASE_URL = "https://www.signasl.org"
+SCRAPE_CACHE_FILE = "datasets/scrape_cache.json"  # Page URL -> video URL (or null) from past runs
+MAX_RETRIES = 3  # Retries for throttled (429) or failing (5xx) requests
+RETRY_BACKOFF = 2.0  # Seconds before the first retry, doubled after each one
+PAGE_BACKEND = "fast"  # "fast" or "bs4", see signasl_pages.PAGE_BACKENDS
+HTML_RESPONSES_FOLDER = None  # Set to e.g. "html_responses" to save every fetched page
+SESSION = requests.Session()  # Reuses connections across page fetches
+
+def save_html_response(url, text):
+    """Saves a fetched page under HTML_RESPONSES_FOLDER, named after the last part of the URL."""
+    os.makedirs(HTML_RESPONSES_FOLDER, exist_ok=True)
+    filename = url.rstrip("/").split("/")[-1] or "index"
+    with open(os.path.join(HTML_RESPONSES_FOLDER, f"{filename}.html"), "w", encoding="utf-8") as file:
+        file.write(text)
+
+def fetch_page(url):
+    """Fetches a URL, retrying with exponential backoff on 429 and 5xx responses."""
+    delay = RETRY_BACKOFF
+    for attempt in range(MAX_RETRIES + 1):
+        response = SESSION.get(url)
+        if response.status_code != 429 and response.status_code < 500:
+            return response
+        if attempt == MAX_RETRIES:
+            break
+        # Honour the server's Retry-After when it gives one in seconds
+        retry_after = response.headers.get("Retry-After", "")
+        wait = float(retry_after) if retry_after.replace(".", "", 1).isdigit() else delay
+        print(f"Got {response.status_code} for {url}, retrying in {wait:.1f}s")
+        time.sleep(wait)
+        delay *= 2
+    return response
+
+def scrape_page(url, cache, search):
+    """
+    Returns (video URL or None, settled) for a page, following its recommendations. search holds
+    the pages already followed in this call ("visited") and whether a request was throttled or
+    failed ("transient"). A page is not settled, and its None not cached, when a recommendation
+    led back into a page still being followed: the cache is shared by other workers and saved
+    between runs, so only final answers go into it.
+    """
     if url in cache:
         print(f"Cache hit for URL: {url}")
-        return cache[url]  # Return the cached URL if already found
+        return cache[url], True  # Return the cached URL if already found
+    if url in search["visited"]:
+        return None, False  # A recommendation cycle; the page that started it is still being followed
+    search["visited"].add(url)
     
     print(f"Fetching URL: {url}")
-    response = requests.get(url)
+    response = fetch_page(url)
     
-    # Log the HTML response to a file
-    # filename = url.split("/")[-1]  # Use the last part of the URL as filename
-    # with open(f"html_responses/{filename}_response.txt", "w", encoding="utf-8") as file:
-    #     file.write(response.text)
+    # Keep the raw page so parser changes can be benchmarked against it
+    if HTML_RESPONSES_FOLDER:
+        save_html_response(url, response.text)
     
     if response.status_code != 200:
         print(f"Failed to fetch: {url} (Status code: {response.status_code})")
-        cache[url] = None
-        return None
+        # Throttling and server errors may clear up, so only cache other failures
+        if response.status_code != 429 and response.status_code < 500:
+            cache[url] = None
+            return None, True
+        search["transient"] = True
+        return None, False
     
-    soup = BeautifulSoup(response.text, 'html.parser')
+    page = parse_page(response.text, PAGE_BACKEND)
     
     # Check if the 'no video found' message exists
-    if "Sorry, no video found for this word." in soup.text:
+    if page["no_video"]:
         print(f"No video found on page: {url}")
         cache[url] = None
-        return None
+        return None, True
     
-    # Find first video player
-    video = soup.find('video')
-    if video and video.find('source'):
-        video_url = video.find('source')['src']
+    # Use the first video player
+    if page["video_url"] is not None:
+        video_url = page["video_url"]
         print(f"Video found: {video_url} from {url}")
         cache[url] = video_url  # Cache the video URL
-        return video_url
+        return video_url, True
     
     # Check for "See also" or "Categories" recommendations
-    recommendations = soup.find_all('a', href=True)
-    for recommendation in recommendations:
-        if recommendation['href'].startswith('/sign/'):
-            # Follow the link and try again
-            new_url = f"https://www.signasl.org{recommendation['href']}"
-            print(f"No video found. Trying recommendation: {new_url}")
-            video_url = get_asl_video_from_page(new_url, cache)
-            if video_url:
-                return video_url
+    settled = True
+    for href in page["sign_links"]:
+        # Follow the link and try again
+        new_url = f"{SIGNASL_BASE_URL}{href}"
+        print(f"No video found. Trying recommendation: {new_url}")
+        video_url, recommendation_settled = scrape_page(new_url, cache, search)
+        if video_url:
+            cache[url] = video_url  # Remember where the recommendation led
+            return video_url, True
+        settled = settled and recommendation_settled
     
     print(f"No video found for: {url} and recommendations.")
-    cache[url] = None  # No video found, cache None
-    return None
+    if settled:
+        cache[url] = None  # No video found, cache None
+    return None, settled
+
+def get_asl_video_from_page(url, cache):
+    """Scrapes a given URL and returns the first video URL if available."""
+    search = {"visited": set(), "transient": False}
+    video_url, _ = scrape_page(url, cache, search)
+    if video_url is None and not search["transient"]:
+        # Every page reachable from here was fetched without finding a video, cycles included
+        for visited_url in search["visited"]:
+            cache.setdefault(visited_url, None)
+    return video_url
+
+def get_search_url(word):
+    """Returns the SignASL page URL for a word."""
+    return f"{SIGNASL_BASE_URL}/sign/{word.replace(' ', '-')}"
 
 def get_asl_video(word, cache):
     """Main function to scrape SignASL for a given word and return a video URL, following recommendations if necessary."""
-    search_url = f"https://www.signasl.org/sign/{word.replace(' ', '-')}"
+    search_url = get_search_url(word)
     print(f"Searching for word: {word}")
     return get_asl_video_from_page(search_url, cache)
 
-def process_quranic_phrases(phrases):
-    """Queries SignASL for each word in the phrases and stores results in a hashmap."""
-    results = {}
-    cache = {}  # Hashmap to store previously fetched word URLs
+def load_scrape_cache(cache_file=SCRAPE_CACHE_FILE):
+    """Loads the persistent URL cache written by previous scrape runs."""
+    if not os.path.exists(cache_file):
+        return {}
+    with open(cache_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_scrape_cache(cache, cache_file=SCRAPE_CACHE_FILE):
+    """
+    Writes the URL cache so later runs can skip pages that were already fetched. Entries saved
+    meanwhile by other workers are kept, and the file is replaced whole so a crash cannot truncate it.
+    """
+    merged = {**load_scrape_cache(cache_file), **cache}
+    temporary_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temporary_file, "w", encoding="utf-8") as f:
+        json.dump(merged, f, indent=4, sort_keys=True)
+    os.replace(temporary_file, cache_file)
+
+def resolve_sign(word, local_index, cache, download_folder="videos"):
+    """
+    Resolves a word to a local video path, trying the local sign index first, then the
+    scrape cache and only then SignASL. Returns (video_path, tier) where tier is
+    "local", "cache" or "network", or (None, tier) if that tier knows there is no video.
+    """
+    entry, match = lookup_local_sign(word, local_index)
+    if entry:
+        print(f"Local {match} match for word: {word} - {entry['path']}")
+        return entry["path"], "local"
+
+    search_url = get_search_url(word)
+    if search_url in cache:
+        tier = "cache"
+        video_url = cache[search_url]
+    else:
+        tier = "network"
+        video_url = get_asl_video(word, cache)
+
+    if not video_url:
+        return None, tier
+    return download_video(video_url, download_folder), tier
+
+def process_quranic_phrases(phrases, cache_file=SCRAPE_CACHE_FILE, manifest_file=None):
+    """
+    Splits each phrase into known signs, resolves each sign to a video and stores results in a hashmap.
+    With a manifest file, each phrase's result is stored as soon as it is resolved, so a restarted
+    run (or several workers sharing the manifest) skips the phrases already done.
+    """
+    cache = load_scrape_cache(cache_file)  # Hashmap of previously fetched page URLs
+    local_index = build_local_index()
+    sign_trie = build_sign_trie(load_sign_glosses(cache_file, local_index))
+    tier_counts = {"local": 0, "cache": 0, "network": 0}
     download_folder = "videos"  # Folder where videos will be saved
-    
-    for key, phrase in phrases.items():
+
+    def resolve_phrase(key):
+        phrase = phrases[key]
         print(f"Searching for phrase: {phrase}")
-        words = phrase.split()  # Split phrase into words
+        # Longest-match segmentation; untranslatable function words are dropped, and a sign is
+        # looked up by its gloss ("the Most Merciful" -> merciful) rather than the words it covers
+        segments = segment_phrase(phrase, sign_trie)
+        words = [segment["gloss"].lower() if segment["kind"] == "sign" else " ".join(segment["words"])
+                 for segment in segments if segment["kind"] != "dropped"]
         video_urls = []
+        used_network = False
         
         for word in words:
             print(f"Searching for word: {word}")
-            video_url = get_asl_video(word, cache)
-            if video_url:  # If a video URL was found
-                print(f"Found video URL for word: {word} - {video_url}")
-                video_path = download_video(video_url, download_folder)  # Download the video
-                if video_path:
-                    video_urls.append(video_path)  # Save the downloaded video path
+            video_path, tier = resolve_sign(word, local_index, cache, download_folder)
+            tier_counts[tier] += 1
+            used_network = used_network or tier == "network"
+            if video_path:  # If a video was found and downloaded
+                print(f"Found video for word: {word} - {video_path} ({tier})")
+                video_urls.append(video_path)  # Save the downloaded video path
             else:
                 print(f"No video found for word: {word}")
         
-        # Store the video URLs or null if none found
-        if video_urls:
-            results[key] = {phrase: video_urls}  # Save the phrase and its associated URLs
-        else:
-            results[key] = {phrase: None}  # If no videos were found, store None
-    
-        time.sleep(1)  # Be polite to the server
+        if used_network:
+            save_scrape_cache(cache, cache_file)
+            time.sleep(1)  # Be polite to the server
     
+        # Store the video URLs or null if none found
+        return {phrase: video_urls or None}
+
+    if manifest_file:
+        # Keyed by phrase text too, so a different phrase list never reuses another's results
+        results = run_jobs(open_manifest(manifest_file), "scrape", list(phrases), resolve_phrase,
+                           inputs=lambda key: {"phrase": phrases[key]})
+    else:
+        results = {key: resolve_phrase(key) for key in phrases}
+
+    print(f"Resolved words by tier: {tier_counts}")
     return results
 
 def download_video(url, download_folder="videos"):
@@ -107,12 +230,15 @@ def download_video(url, download_folder="videos"):
         return video_path
 
     print(f"Downloading video: {video_filename}")
-    video_response = requests.get(url, stream=True)
+    video_response = SESSION.get(url, stream=True)
     
     if video_response.status_code == 200:
-        with open(video_path, 'wb') as video_file:
+        # Download under a temporary name so an interrupted download is not mistaken for a finished one
+        partial_path = f"{video_path}.{os.getpid()}.part"
+        with open(partial_path, 'wb') as video_file:
             for chunk in video_response.iter_content(chunk_size=8192):
                 video_file.write(chunk)
+        os.replace(partial_path, video_path)
         print(f"Video downloaded: {video_filename}")
         return video_path
     else:
@@ -152,11 +278,20 @@ fatihah_phrases = {
     # "29": "of those who go astray"
 }
 
-# Run ASL matching
-results = process_quranic_phrases(fatihah_phrases)
+def main():
+    parser = argparse.ArgumentParser(description="Match the Al-Fatihah phrases to ASL videos.")
+    parser.add_argument("--manifest", default=None,
+                        help="Job manifest (e.g. outputs/job_manifest.sqlite) to checkpoint progress and resume from")
+    args = parser.parse_args()
+
+    # Run ASL matching
+    results = process_quranic_phrases(fatihah_phrases, manifest_file=args.manifest)
+
+    # Save to JSON file
+    with open("surah_fatihah_asl.json", "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
 
-# Save to JSON file
-with open("surah_fatihah_asl.json", "w", encoding="utf-8") as f:
-    json.dump(results, f, indent=4)
+    print("Done! Results saved to surah_fatihah_asl.json")
 
-print("Done! Results saved to surah_fatihah_asl.json")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import os
+import time
+from signasl_pages import PAGE_BACKENDS
+
+def load_pages(folder):
+    """Loads every saved .html page in a folder."""
+    pages = {}
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith(".html"):
+            with open(os.path.join(folder, filename), "r", encoding="utf-8") as file:
+                pages[filename] = file.read()
+    return pages
+
+def benchmark_backend(parse, pages, repeat):
+    """Parses every page `repeat` times and returns pages per second."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for page_html in pages.values():
+            parse(page_html)
+    elapsed = time.perf_counter() - start
+    return repeat * len(pages) / elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare SignASL page extraction backends on saved pages.")
+    parser.add_argument("folder", nargs="?", default="fixtures/signasl", help="Folder of saved .html pages")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the folder per backend")
+    args = parser.parse_args()
+
+    pages = load_pages(args.folder)
+    if not pages:
+        print(f"No .html pages found in {args.folder}")
+        return
+
+    # Every backend must agree with the reference BeautifulSoup backend
+    mismatches = 0
+    for filename, page_html in pages.items():
+        expected = PAGE_BACKENDS["bs4"](page_html)
+        for name, parse in PAGE_BACKENDS.items():
+            if parse(page_html) != expected:
+                mismatches += 1
+                print(f"Mismatch: {name} backend on {filename}")
+    print(f"Checked {len(pages)} pages, {mismatches} mismatches")
+
+    total_kb = sum(len(page_html) for page_html in pages.values()) / 1024
+    print(f"Benchmarking {len(pages)} pages ({total_kb:.0f} KB) x {args.repeat}")
+    rates = {}
+    for name, parse in PAGE_BACKENDS.items():
+        rates[name] = benchmark_backend(parse, pages, args.repeat)
+        print(f"{name:>5}: {rates[name]:8.1f} pages/sec")
+    print(f"Speedup of fast over bs4: {rates['fast'] / rates['bs4']:.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import json
+import re
+import string
+import time
+from collections import Counter
+from tokenizer import corpus_statistics, iter_corpus
+
+CORPUS_FILES = ['datasets/quran_verses.json', 'datasets/en-qurancom.json']
+
+def legacy_clean_and_split(text):
+    """The per-call clean_and_split that unique_words.py used to define."""
+    text = re.sub(r'\\\"', '', text)
+    text = re.sub(r'[\(\[].*?[\)\]]', '', text)
+    text = text.strip('"')
+    punctuation = string.punctuation.replace('-', '')
+    text = re.sub(r'[{}]'.format(punctuation), '', text)
+    text = text.lower()
+    return text.strip().split()
+
+def legacy_unique_words(corpus_file):
+    """The original load-and-tokenize loop, returning the sorted unique words."""
+    with open(corpus_file, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    unique_words = set()
+    for value in data.values():
+        texts = value.get("verses", []) if isinstance(value, dict) else [value]
+        for text in texts:
+            unique_words.update(legacy_clean_and_split(text))
+    return sorted(unique_words)
+
+def legacy_statistics(corpus_file):
+    """The same statistics as corpus_statistics, built on the legacy per-verse tokenizer."""
+    with open(corpus_file, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    frequencies = Counter()
+    first_occurrence = {}
+    for key, text in iter_corpus(data):
+        words = legacy_clean_and_split(text)
+        frequencies.update(words)
+        for index, word in enumerate(words):
+            first_occurrence.setdefault(word, (*key, index))
+    return {"vocabulary": sorted(frequencies), "frequencies": frequencies, "first_occurrence": first_occurrence}
+
+def best_time(function, corpus_file, repeat):
+    """Returns the best wall time of `repeat` runs and the last result."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function(corpus_file)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(repeat=5):
+    for corpus_file in CORPUS_FILES:
+        unique_time, legacy_vocabulary = best_time(legacy_unique_words, corpus_file, repeat)
+        legacy_time, legacy_stats = best_time(legacy_statistics, corpus_file, repeat)
+        new_time, stats = best_time(corpus_statistics, corpus_file, repeat)
+        same = all(stats[name] == legacy_stats[name] for name in legacy_stats)
+        same = same and stats["vocabulary"] == legacy_vocabulary
+        print(f"{corpus_file}: {len(legacy_vocabulary)} words, results {'identical' if same else 'DIFFERENT'}")
+        print(f"  legacy unique words only:     {unique_time * 1000:7.1f} ms")
+        print(f"  legacy tokenizer + statistics: {legacy_time * 1000:7.1f} ms")
+        print(f"  tokenizer.corpus_statistics:   {new_time * 1000:7.1f} ms ({legacy_time / new_time:.1f}x faster)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import re
+from xml.sax.saxutils import escape, quoteattr
+import numpy as np
+from corpus_store import ARABIC_LETTER_RE, BISMILLAH_WORDS, STORE_FILE, get_ayah, get_ayah_words, open_store
+from tokenizer import clean_and_split
+
+VERSES_FILE = "datasets/quran_verses.json"
+TTML_NAMESPACE = "http://www.w3.org/ns/ttml"
+MIN_WORD_SECONDS = 0.2  # Shortest word cue an anchor may leave to the words around it
+
+def load_ayah_texts(surah, ayahs, store_file=STORE_FILE, verses_file=VERSES_FILE):
+    """
+    Returns {ayah: {"en": verse, "ar": verse or None, "en_words": [...], "ar_words": [...]}} from the
+    corpus store, or from quran_verses.json (English verses only) before the store is built.
+    The word lists pair each Arabic word with its en-qurancom translation. Without aligned words the
+    English list falls back to the verse's own words, and the Arabic list stays empty unless it has
+    as many words as the English one.
+    """
+    texts = {}
+    if os.path.exists(store_file):
+        connection = open_store(store_file)
+        for ayah in ayahs:
+            verse = get_ayah(connection, surah, ayah) or {}
+            arabic_words = [token for token in (verse.get("arabic") or "").split() if ARABIC_LETTER_RE.search(token)]
+            if ayah == 1 and surah not in (1, 9):
+                arabic_words = arabic_words[BISMILLAH_WORDS:]
+            english_words = get_ayah_words(connection, surah, ayah) or (verse.get("english") or "").split()
+            texts[ayah] = {"en": verse.get("english"), "ar": verse.get("arabic"), "en_words": english_words,
+                           "ar_words": arabic_words if len(arabic_words) == len(english_words) else []}
+        connection.close()
+        return texts
+
+    with open(verses_file, "r", encoding="utf-8") as file:
+        verses = json.load(file)[str(surah)]["verses"]
+    english = {ayah: verses[ayah - 1] if ayah <= len(verses) else None for ayah in ayahs}
+    return {ayah: {"en": verse, "ar": None, "en_words": (verse or "").split(), "ar_words": []}
+            for ayah, verse in english.items()}
+
+def sign_tokens(gloss):
+    return set(re.split(r"[^a-z0-9]+", gloss.lower())) - {""}
+
+def word_times(words, ayah):
+    """
+    Spreads an ayah's words over its time span. A word naming one of the ayah's signs (in order) is
+    anchored to the start of that sign, unless that would squeeze the words around it below
+    MIN_WORD_SECONDS; the words between anchors are spaced evenly between them.
+    Returns [(start, end)] in seconds, one per word.
+    """
+    signs = [sign for phrase in ayah["phrases"] for sign in phrase["signs"]]
+    anchors = {0: ayah["start"], len(words): ayah["end"]}
+    last_index, last_time = 0, ayah["start"]
+    next_sign = 0
+    for index, word in enumerate(words):
+        tokens = set(clean_and_split(word))
+        match = next((k for k in range(next_sign, len(signs)) if tokens & sign_tokens(signs[k]["gloss"])), None)
+        if match is None:
+            continue
+        time = signs[match]["start"]
+        if (index == last_index or time >= last_time + (index - last_index) * MIN_WORD_SECONDS) and \
+                time <= ayah["end"] - (len(words) - index) * MIN_WORD_SECONDS:
+            anchors[index] = last_time = max(time, last_time)
+            last_index = index
+            next_sign = match + 1
+    positions = sorted(anchors)
+    starts = np.interp(np.arange(len(words) + 1), positions, [anchors[position] for position in positions])
+    return [(float(start), float(end)) for start, end in zip(starts[:-1], starts[1:])]
+
+def caption_cues(timeline, texts, language):
+    """Returns (ayah cues, word cues per ayah) as [(start, end, text)] lists for one language."""
+    ayah_cues, word_cues = [], []
+    for ayah in timeline["ayahs"]:
+        text = texts.get(int(ayah["ayah"]), {})
+        if not text.get(language):
+            continue
+        ayah_cues.append((ayah["start"], ayah["end"], text[language]))
+        words = text[f"{language}_words"]
+        word_cues.append([(start, end, word) for (start, end), word in zip(word_times(words, ayah), words)])
+    return ayah_cues, word_cues
+
+def vtt_time(seconds):
+    milliseconds = int(round(seconds * 1000))
+    return f"{milliseconds // 3600000:02d}:{milliseconds // 60000 % 60:02d}:{milliseconds // 1000 % 60:02d}.{milliseconds % 1000:03d}"
+
+def format_vtt(cues):
+    lines = ["WEBVTT", ""]
+    for start, end, text in cues:
+        lines += [f"{vtt_time(start)} --> {vtt_time(end)}", text.replace("-->", "->"), ""]
+    return "\n".join(lines)
+
+def format_ttml(ayah_cues, word_cues, language):
+    """One paragraph per ayah, with a timed span per word when word timings are known."""
+    paragraphs = []
+    for (start, end, text), words in zip(ayah_cues, word_cues):
+        if words:
+            # Span times are relative to the paragraph that contains them
+            content = " ".join(f'<span begin="{word_start - start:.3f}s" end="{word_end - start:.3f}s">{escape(word)}</span>'
+                               for word_start, word_end, word in words)
+        else:
+            content = escape(text)
+        paragraphs.append(f'      <p begin="{start:.3f}s" end="{end:.3f}s">{content}</p>')
+    return "\n".join([
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<tt xmlns="{TTML_NAMESPACE}" xml:lang={quoteattr(language)}>',
+        "  <body>",
+        "    <div>",
+        *paragraphs,
+        "    </div>",
+        "  </body>",
+        "</tt>",
+        "",
+    ])
+
+def write_captions(timeline_file, surah=None, store_file=STORE_FILE, verses_file=VERSES_FILE):
+    """
+    Writes WebVTT (ayah and word level) and TTML caption tracks per language next to the video a
+    timeline manifest describes: surah_001.en.vtt, surah_001.en.words.vtt, surah_001.en.ttml, and the
+    same for Arabic when the corpus has it. Returns the files written.
+    """
+    with open(timeline_file, "r", encoding="utf-8") as file:
+        timeline = json.load(file)
+    surah = surah or timeline.get("surah")
+    if surah is None:
+        raise ValueError(f"{timeline_file} does not name its surah; pass one")
+    texts = load_ayah_texts(int(surah), [int(ayah["ayah"]) for ayah in timeline["ayahs"]], store_file, verses_file)
+
+    base = timeline_file[:-len(".timeline.json")] if timeline_file.endswith(".timeline.json") else os.path.splitext(timeline_file)[0]
+    written = []
+    for language in ("en", "ar"):
+        ayah_cues, word_cues = caption_cues(timeline, texts, language)
+        if not ayah_cues:
+            continue
+        outputs = {f"{base}.{language}.vtt": format_vtt(ayah_cues),
+                   f"{base}.{language}.ttml": format_ttml(ayah_cues, word_cues, language)}
+        if any(word_cues):
+            outputs[f"{base}.{language}.words.vtt"] = format_vtt([cue for cues in word_cues for cue in cues])
+        else:
+            print(f"No {language} words to time for {timeline_file}; skipping {base}.{language}.words.vtt")
+        for path, content in outputs.items():
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(content)
+            written.append(path)
+    return written
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate caption tracks for a composed video from its timeline manifest.")
+    parser.add_argument("timeline_files", nargs="+", help="*.timeline.json files written by the compositor")
+    parser.add_argument("--surah", type=int, default=None, help="Surah number, if the timeline does not record it")
+    parser.add_argument("--store", default=STORE_FILE)
+    args = parser.parse_args()
+    for timeline_file in args.timeline_files:
+        for path in write_captions(timeline_file, args.surah, args.store):
+            print(f"Wrote {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+
+STORE_FILE = "datasets/quran_corpus.sqlite"
+TOC_FILE = "datasets/toc.csv"
+ENGLISH_FILE = "datasets/api-alquran-cloud-en.json"
+# python -c "from download_quran import download_quran; download_quran('quran-uthmani', 'datasets/api-alquran-cloud-ar.json')"
+ARABIC_FILE = "datasets/api-alquran-cloud-ar.json"
+WORDS_FILE = "datasets/en-qurancom.json"
+
+BISMILLAH_WORDS = 4  # Prefixed to ayah 1 of every surah but 1 and 9 in the alquran.cloud Arabic text
+ARABIC_LETTER_RE = re.compile(r"[ء-يٱ-ۓ]")
+REF_RE = re.compile(r"^(\d+):(\d+)(?::(\d+))?$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (name TEXT PRIMARY KEY, sha256 TEXT NOT NULL, imported_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS surahs (
+    number INTEGER PRIMARY KEY, name_arabic TEXT, name TEXT, english_meaning TEXT,
+    verse_count INTEGER, place TEXT, chronology INTEGER
+);
+CREATE TABLE IF NOT EXISTS verses (
+    surah INTEGER NOT NULL, ayah INTEGER NOT NULL, english TEXT, arabic TEXT,
+    PRIMARY KEY (surah, ayah)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS words (
+    word_id INTEGER PRIMARY KEY, text TEXT NOT NULL,
+    surah INTEGER, ayah INTEGER, position INTEGER
+);
+CREATE INDEX IF NOT EXISTS words_by_ayah ON words (surah, ayah, position);
+"""
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def read_toc(toc_file=TOC_FILE):
+    """Returns surah metadata rows from toc.csv."""
+    with open(toc_file, "r", encoding="utf-8", newline="") as file:
+        return [(int(row["No."]), row["Name Arabic"], row["Name"], row["English Meaning"],
+                 int(row["No of verses"]), row["Place"], int(row["Chronology"]))
+                for row in csv.DictReader(file)]
+
+def read_edition(edition_file):
+    """Returns [(surah, ayah, text)] from an alquran.cloud /quran/<edition> download."""
+    with open(edition_file, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    return [(surah["number"], ayah["numberInSurah"], ayah["text"])
+            for surah in data["data"]["surahs"] for ayah in surah["ayahs"]]
+
+def read_words(words_file=WORDS_FILE):
+    with open(words_file, "r", encoding="utf-8") as file:
+        return [(int(word_id), text) for word_id, text in json.load(file).items()]
+
+def arabic_word_count(surah, ayah, text):
+    """Counts the words quran.com numbers in an ayah, ignoring standalone pause marks and the bismillah prefix."""
+    count = sum(1 for token in text.split() if ARABIC_LETTER_RE.search(token))
+    if ayah == 1 and surah not in (1, 9):
+        count -= BISMILLAH_WORDS
+    return count
+
+def align_words(connection):
+    """
+    Gives each en-qurancom word its surah, ayah and position. The word ids run through the
+    whole Quran, so the ayah boundaries come from the Arabic word counts.
+    Returns False (and leaves the words unaligned) if the Arabic text is missing or the counts disagree.
+    """
+    rows = connection.execute("SELECT surah, ayah, arabic FROM verses ORDER BY surah, ayah").fetchall()
+    total_words = connection.execute("SELECT COUNT(*) FROM words").fetchone()[0]
+    if not rows or any(arabic is None for _, _, arabic in rows):
+        return False
+    counts = [(surah, ayah, arabic_word_count(surah, ayah, arabic)) for surah, ayah, arabic in rows]
+    if sum(count for _, _, count in counts) != total_words:
+        print(f"Arabic word counts ({sum(count for _, _, count in counts)}) do not match {total_words} words; not aligning")
+        return False
+
+    positions = []
+    word_id = 1
+    for surah, ayah, count in counts:
+        for position in range(1, count + 1):
+            positions.append((surah, ayah, position, word_id))
+            word_id += 1
+    connection.executemany("UPDATE words SET surah = ?, ayah = ?, position = ? WHERE word_id = ?", positions)
+    return True
+
+def import_corpus(store_file=STORE_FILE, toc_file=TOC_FILE, english_file=ENGLISH_FILE,
+                  arabic_file=ARABIC_FILE, words_file=WORDS_FILE):
+    """
+    Imports the source files into the store. Sources whose content hash is unchanged are skipped,
+    and only rows whose value changed are rewritten; rows a source no longer has are removed
+    (for a verse, its text from that source, and the verse once it has no text). Missing optional
+    sources are skipped.
+    Returns {source: rows changed, None if unchanged, or "missing"}.
+    """
+    sources = {
+        "toc": (toc_file, read_toc,
+                "INSERT INTO surahs VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (number) DO UPDATE SET "
+                "name_arabic = excluded.name_arabic, name = excluded.name, english_meaning = excluded.english_meaning, "
+                "verse_count = excluded.verse_count, place = excluded.place, chronology = excluded.chronology "
+                "WHERE (name_arabic, name, english_meaning, verse_count, place, chronology) IS NOT "
+                "(excluded.name_arabic, excluded.name, excluded.english_meaning, excluded.verse_count, "
+                "excluded.place, excluded.chronology)",
+                "SELECT number FROM surahs", "DELETE FROM surahs WHERE number = ?"),
+        "english": (english_file, read_edition,
+                    "INSERT INTO verses (surah, ayah, english) VALUES (?, ?, ?) ON CONFLICT (surah, ayah) "
+                    "DO UPDATE SET english = excluded.english WHERE english IS NOT excluded.english",
+                    "SELECT surah, ayah FROM verses WHERE english IS NOT NULL",
+                    "UPDATE verses SET english = NULL WHERE surah = ? AND ayah = ?"),
+        "arabic": (arabic_file, read_edition,
+                   "INSERT INTO verses (surah, ayah, arabic) VALUES (?, ?, ?) ON CONFLICT (surah, ayah) "
+                   "DO UPDATE SET arabic = excluded.arabic WHERE arabic IS NOT excluded.arabic",
+                   "SELECT surah, ayah FROM verses WHERE arabic IS NOT NULL",
+                   "UPDATE verses SET arabic = NULL WHERE surah = ? AND ayah = ?"),
+        "words": (words_file, read_words,
+                  "INSERT INTO words (word_id, text) VALUES (?, ?) ON CONFLICT (word_id) "
+                  "DO UPDATE SET text = excluded.text WHERE text IS NOT excluded.text",
+                  "SELECT word_id FROM words", "DELETE FROM words WHERE word_id = ?"),
+    }
+    changed = {}
+    with sqlite3.connect(store_file) as connection:
+        connection.executescript(SCHEMA)
+        stored = dict(connection.execute("SELECT name, sha256 FROM sources"))
+        for name, (path, reader, upsert, keys, remove) in sources.items():
+            if not os.path.exists(path):
+                changed[name] = "missing"
+                continue
+            digest = file_sha256(path)
+            if stored.get(name) == digest:
+                changed[name] = None
+                continue
+            before = connection.total_changes
+            rows = reader(path)
+            connection.executemany(upsert, rows)
+            stored_keys = connection.execute(keys).fetchall()
+            width = len(stored_keys[0]) if stored_keys else 0
+            connection.executemany(remove, set(stored_keys) - {tuple(row[:width]) for row in rows})
+            connection.execute("DELETE FROM verses WHERE english IS NULL AND arabic IS NULL")
+            changed[name] = connection.total_changes - before
+            connection.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?)", (name, digest, time.time()))
+        if any(isinstance(changed.get(name), int) and changed[name] for name in ("arabic", "words")):
+            changed["aligned"] = align_words(connection)
+    return changed
+
+def open_store(store_file=STORE_FILE):
+    """Opens the store read-only; run the importer first."""
+    if not os.path.exists(store_file):
+        raise FileNotFoundError(f"{store_file} not found; run python corpus_store.py --import")
+    connection = sqlite3.connect(f"file:{store_file}?mode=ro", uri=True, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+def get_surah(connection, surah):
+    """Returns the toc.csv metadata of a surah, or None."""
+    row = connection.execute("SELECT * FROM surahs WHERE number = ?", (surah,)).fetchone()
+    return dict(row) if row else None
+
+def get_ayah(connection, surah, ayah):
+    """Returns {"surah", "ayah", "english", "arabic"} for one ayah, or None."""
+    row = connection.execute("SELECT * FROM verses WHERE surah = ? AND ayah = ?", (surah, ayah)).fetchone()
+    return dict(row) if row else None
+
+def get_surah_verses(connection, surah, column="english"):
+    """Returns the verses of a surah in order, in English or Arabic."""
+    if column not in ("english", "arabic"):
+        raise ValueError(f"Unknown verse column: {column}")
+    return [text for text, in connection.execute(
+        f"SELECT {column} FROM verses WHERE surah = ? ORDER BY ayah", (surah,))]
+
+def get_word(connection, word_id):
+    """Returns {"word_id", "text", "surah", "ayah", "position"} for an en-qurancom word id, or None."""
+    row = connection.execute("SELECT * FROM words WHERE word_id = ?", (word_id,)).fetchone()
+    return dict(row) if row else None
+
+def get_ayah_words(connection, surah, ayah):
+    """Returns the word-by-word translations of an ayah in order (empty until the words are aligned)."""
+    return [text for text, in connection.execute(
+        "SELECT text FROM words WHERE surah = ? AND ayah = ? ORDER BY position", (surah, ayah))]
+
+def lookup_ref(connection, ref):
+    """Looks up "surah:ayah" or "surah:ayah:word" (word index within the ayah)."""
+    match = REF_RE.match(ref)
+    if not match:
+        raise ValueError(f"Expected surah:ayah or surah:ayah:word, got {ref!r}")
+    surah, ayah, position = (int(group) if group else None for group in match.groups())
+    if position is None:
+        found = get_ayah(connection, surah, ayah)
+        if found:
+            found["words"] = get_ayah_words(connection, surah, ayah)
+        return found
+    row = connection.execute("SELECT * FROM words WHERE surah = ? AND ayah = ? AND position = ?",
+                             (surah, ayah, position)).fetchone()
+    return dict(row) if row else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact random-access store for the Quran corpus.")
+    parser.add_argument("refs", nargs="*", help="surah:ayah or surah:ayah:word references to print")
+    parser.add_argument("--import", dest="run_import", action="store_true",
+                        help="Import changed source files into the store")
+    parser.add_argument("--word", type=int, action="append", default=[], help="Print an en-qurancom word by id")
+    parser.add_argument("--store", default=STORE_FILE)
+    args = parser.parse_args()
+
+    if args.run_import:
+        start = time.perf_counter()
+        changed = import_corpus(args.store)
+        print(f"Imported in {time.perf_counter() - start:.2f}s: " + ", ".join(
+            f"{name} {'unchanged' if count is None else count}" for name, count in changed.items()))
+
+    start = time.perf_counter()
+    connection = open_store(args.store)
+    for ref in args.refs:
+        print(f"{ref}: {lookup_ref(connection, ref)}")
+    for word_id in args.word:
+        print(f"word {word_id}: {get_word(connection, word_id)}")
+    if args.refs or args.word:
+        print(f"Looked up in {(time.perf_counter() - start) * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
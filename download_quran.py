@@ -1,15 +1,16 @@
 import requests
 import json
 
-def download_quran():
-    url = "http://api.alquran.cloud/v1/quran/en.sahih"
+# Arabic text for corpus_store.py: download_quran("quran-uthmani", "datasets/api-alquran-cloud-ar.json")
+def download_quran(edition="en.sahih", output_file="datasets/api-alquran-cloud-en.json"):
+    url = f"http://api.alquran.cloud/v1/quran/{edition}"
     response = requests.get(url)
     
     if response.status_code == 200:
         data = response.json()
-        with open("datasets/api-alquran-cloud-en.json", "w", encoding="utf-8") as file:
+        with open(output_file, "w", encoding="utf-8") as file:
             json.dump(data, file, indent=4, ensure_ascii=False)
-        print("Downloaded and saved as quran-en.json")
+        print(f"Downloaded and saved as {output_file}")
     else:
         print(f"Failed to download. Status code: {response.status_code}")
 
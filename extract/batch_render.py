@@ -0,0 +1,224 @@
+import argparse
+import csv
+import json
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+from timeline import build_timeline, sign_spans, write_timeline
+from video_encoder import CRF, PRESET, THREADS, open_encoder
+
+TOC_FILE = "datasets/toc.csv"
+FRAMES_PER_AYAH = 150  # Rough average used to estimate job sizes; only the ratios between jobs matter
+
+def load_verse_counts(toc_file=TOC_FILE):
+    """Returns {surah number: number of verses} from toc.csv."""
+    with open(toc_file, "r", encoding="utf-8", newline="") as file:
+        return {int(row["No."]): int(row["No of verses"]) for row in csv.DictReader(file)}
+
+def load_mapping(json_file):
+    """
+    Loads the whole-Quran mapping {surah: {ayah: {phrase: [video paths] or null}}}.
+    Returns {surah: [(ayah, [(phrase, video path)])]} in surah and ayah order.
+    """
+    with open(json_file, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    mapping = {}
+    for surah, ayahs in data.items():
+        mapping[int(surah)] = [
+            (int(ayah), [(phrase, path) for phrase, paths in phrases.items() for path in paths or []])
+            for ayah, phrases in sorted(ayahs.items(), key=lambda item: int(item[0]))
+        ]
+    return dict(sorted(mapping.items()))
+
+def plan_jobs(mapping, verse_counts, workers):
+    """
+    Splits the work into render jobs, longest first. A surah whose estimated frames exceed
+    an even share of one worker's load is split into runs of consecutive ayahs, so the
+    longest surah cannot hold up the whole batch.
+    Each job is {"surah", "part", "ayahs": [(ayah, [(phrase, path)])], "lead_in", "frames"}; lead_in lists the
+    clips before the part, latest first: the last of them with hands gives the transition into it.
+    """
+    estimates = {surah: verse_counts.get(surah, len(ayahs)) * FRAMES_PER_AYAH for surah, ayahs in mapping.items()}
+    max_job_frames = max(FRAMES_PER_AYAH, sum(estimates.values()) // (workers * 2) or FRAMES_PER_AYAH)
+
+    jobs = []
+    for surah, ayahs in mapping.items():
+        frames_per_ayah = estimates[surah] / max(len(ayahs), 1)
+        ayahs_per_job = max(1, int(max_job_frames // frames_per_ayah))
+        for part, start in enumerate(range(0, len(ayahs), ayahs_per_job)):
+            part_ayahs = ayahs[start:start + ayahs_per_job]
+            # Which clips have hands is only known once they are extracted, so the worker walks back
+            lead_in = [path for _, paths in reversed(ayahs[:start]) for _, path in reversed(paths)]
+            jobs.append({"surah": surah, "part": part, "ayahs": part_ayahs, "lead_in": list(dict.fromkeys(lead_in)),
+                         "frames": frames_per_ayah * len(part_ayahs)})
+    # Longest processing time first: the big jobs start early and small ones fill the gaps
+    return sorted(jobs, key=lambda job: -job["frames"])
+
+def part_file(parts_folder, job):
+    return os.path.join(parts_folder, f"surah_{job['surah']:03d}_part_{job['part']:03d}.mp4")
+
+def render_job(job, parts_folder, transition_frames=8, fps=30, encoder_options=None, normalize=False):
+    """
+    Renders one job in a worker process; normalize as in interpolate_extract.warp_landmarks_data.
+    Returns (job, part file or None, render_frames stats, sign spans within the part, seconds).
+    """
+    from interpolate_extract import (build_final_frames, clip_stretch, extract_hand_landmarks, find_last_frame_with_hands,
+                                     render_frames, sign_name, warp_landmarks_data)
+    from time_warp import clip_fps
+
+    start = time.perf_counter()
+    clips = {}  # The same sign recurs within a job; extract each clip once
+
+    def landmarks(path):
+        if path not in clips:
+            extracted = extract_hand_landmarks(path) if os.path.exists(path) else None
+            # Resampled from the clip's own frame rate to the output's
+            clips[path] = warp_landmarks_data([extracted], [clip_fps(path)], fps, normalize=normalize,
+                                              stretches=[clip_stretch(path)])[0] if extracted else None
+        return clips[path]
+
+    # The last hand an unsplit render would show before this part: skip clips without hands
+    previous_hand = None
+    for path in job["lead_in"]:
+        _, last_frame = find_last_frame_with_hands(landmarks(path) or [])
+        if last_frame:
+            previous_hand = last_frame[0]
+            break
+
+    landmarks_data_list = []
+    entries = []
+    for ayah, paths in job["ayahs"]:
+        for phrase, path in paths:
+            clip = landmarks(path)
+            if clip:
+                landmarks_data_list.append(clip)
+                entries.append({"ayah": ayah, "phrase": phrase, "gloss": sign_name(path), "video": path})
+    final_frames, segments = build_final_frames(landmarks_data_list, transition_frames, previous_hand)
+    if not final_frames:
+        return job, None, {"frames": 0, "drawn": 0, "duplicates": 0}, [], time.perf_counter() - start
+    output_file = part_file(parts_folder, job)
+    signs = sign_spans(entries, segments)
+    # Keyframes at the part's ayah starts survive the stream-copy stitch
+    keyframes = build_timeline(signs, len(final_frames), fps)["keyframes"]
+    stats = render_frames(final_frames, output_file, fps, keyframes=keyframes, encoder_options=encoder_options)
+    return job, output_file, stats, signs, time.perf_counter() - start
+
+def stitch_videos(part_files, output_file):
+    """
+    Joins videos in order: stream copy with ffmpeg when available, otherwise frame by frame.
+    Returns True when the parts were stream copied, so each one still starts on a keyframe.
+    """
+    if shutil.which("ffmpeg"):
+        list_file = output_file + ".txt"
+        with open(list_file, "w", encoding="utf-8") as file:
+            file.writelines(f"file '{os.path.abspath(path)}'\n" for path in part_files)
+        subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file,
+                        "-c", "copy", "-movflags", "+faststart", output_file], check=True)
+        os.remove(list_file)
+        return True
+
+    out = None
+    for path in part_files:
+        cap = cv2.VideoCapture(path)
+        if out is None:
+            size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+            out = open_encoder(output_file, cap.get(cv2.CAP_PROP_FPS), size, backend="opencv")
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(frame)
+        cap.release()
+    if out is not None:
+        out.close()
+    return False
+
+def render_quran(json_file, output_folder="outputs", workers=None, transition_frames=8, fps=30, surahs=None,
+                 encoder_options=None, normalize=False):
+    """
+    Renders every surah of the mapping across worker processes and writes one video per surah,
+    stitched from its parts in ayah order as soon as all of them are done, with its timeline manifest.
+    encoder_options go to video_encoder.open_encoder (backend, preset, crf, threads); normalize moves
+    every clip into the canonical signing space (see interpolate_extract.warp_landmarks_data).
+    Returns {surah: video file or None}.
+    """
+    workers = workers or os.cpu_count() or 1
+    mapping = load_mapping(json_file)
+    if surahs:
+        mapping = {surah: ayahs for surah, ayahs in mapping.items() if surah in surahs}
+    jobs = plan_jobs(mapping, load_verse_counts(), workers)
+    parts_folder = os.path.join(output_folder, "parts")
+    os.makedirs(parts_folder, exist_ok=True)
+
+    remaining = {surah: sum(1 for job in jobs if job["surah"] == surah) for surah in mapping}
+    parts = {surah: {} for surah in mapping}
+    outputs = {}
+    totals = {"frames": 0, "duplicates": 0, "encode_seconds": 0.0}
+    print(f"Rendering {len(mapping)} surahs as {len(jobs)} jobs on {workers} workers")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_job, job, parts_folder, transition_frames, fps, encoder_options, normalize)
+                   for job in jobs]
+        for future in as_completed(futures):
+            job, output_file, stats, signs, seconds = future.result()
+            surah = job["surah"]
+            frames = stats["frames"]
+            totals["frames"] += frames
+            totals["duplicates"] += stats["duplicates"]
+            totals["encode_seconds"] += stats["encoder"]["seconds"] if "encoder" in stats else 0.0
+            print(f"Surah {surah} part {job['part']} (ayahs {job['ayahs'][0][0]}-{job['ayahs'][-1][0]}): "
+                  f"{frames} frames ({stats['duplicates']} duplicates not redrawn) in {seconds:.1f}s")
+            if output_file:
+                parts[surah][job["part"]] = (output_file, frames, signs, stats["encoder"]["keyframes_forced"])
+            remaining[surah] -= 1
+            if remaining[surah] == 0:
+                ordered = [parts[surah][part] for part in sorted(parts[surah])]
+                outputs[surah] = os.path.join(output_folder, f"surah_{surah:03d}.mp4") if ordered else None
+                if ordered:
+                    stream_copied = stitch_videos([path for path, _, _, _ in ordered], outputs[surah])
+                    # Part timelines start at frame 0; shift each by the frames of the parts before it
+                    surah_signs, offset = [], 0
+                    for _, part_frames, part_signs, _ in ordered:
+                        surah_signs.extend({**sign, "start_frame": sign["start_frame"] + offset,
+                                            "end_frame": sign["end_frame"] + offset} for sign in part_signs)
+                        offset += part_frames
+                    write_timeline(outputs[surah], surah_signs, offset, fps, surah,
+                                   keyframes_forced=stream_copied and all(forced for _, _, _, forced in ordered))
+    print(f"Rendered {sum(1 for path in outputs.values() if path)} surahs in {time.perf_counter() - start:.1f}s; "
+          f"{totals['duplicates']} of {totals['frames']} frames "
+          f"({totals['duplicates'] / max(totals['frames'], 1):.0%}) were duplicates and not redrawn; "
+          f"encoding took {totals['encode_seconds']:.1f}s "
+          f"({totals['frames'] / max(totals['encode_seconds'], 1e-9):.0f} frames/s)")
+    return dict(sorted(outputs.items()))
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the whole Quran mapping in parallel, one video per surah.")
+    parser.add_argument("json_file", help="Mapping of {surah: {ayah: {phrase: [video paths]}}}")
+    parser.add_argument("--output-folder", default="outputs")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--transition-frames", type=int, default=8)
+    parser.add_argument("--surah", type=int, action="append", help="Only render these surahs")
+    parser.add_argument("--encoder", choices=("auto", "ffmpeg", "opencv"), default="auto")
+    parser.add_argument("--preset", default=PRESET)
+    parser.add_argument("--crf", type=int, default=CRF)
+    parser.add_argument("--threads", type=int, default=THREADS, help="Encoder threads per worker (0: automatic)")
+    parser.add_argument("--normalize", action="store_true",
+                        help="Move every clip into the canonical signing space so signs filmed differently line up")
+    parser.add_argument("--plan", action="store_true", help="Print the job plan without rendering")
+    args = parser.parse_args()
+
+    if args.plan:
+        jobs = plan_jobs(load_mapping(args.json_file), load_verse_counts(), args.workers or os.cpu_count() or 1)
+        for job in jobs:
+            print(f"surah {job['surah']:3d} part {job['part']:2d}: ayahs {job['ayahs'][0][0]}-{job['ayahs'][-1][0]}, "
+                  f"~{int(job['frames'])} frames")
+        return
+    render_quran(args.json_file, args.output_folder, args.workers, args.transition_frames, surahs=args.surah,
+                 encoder_options={"backend": args.encoder, "preset": args.preset, "crf": args.crf,
+                                  "threads": args.threads}, normalize=args.normalize)
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ import json
 import cv2
 import mediapipe as mp
 import requests
+from video_encoder import open_encoder
 
 # Initialize MediaPipe HandLandmarker
 mp_hands = mp.solutions.hands
@@ -46,8 +47,8 @@ def process_hand_landmarks(input_video_file, output_video_file):
     frame_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
-    # Initialize VideoWriter to save the processed video
-    out = cv2.VideoWriter(output_video_file, cv2.VideoWriter_fourcc(*'avc1'), 30.0, (frame_width, frame_height))
+    # Initialize the encoder to save the processed video
+    out = open_encoder(output_video_file, 30.0, (frame_width, frame_height))
 
     # Initialize hand detection model from MediaPipe
     with mp_hands.Hands(min_detection_confidence=0.5, min_tracking_confidence=0.5) as hands:
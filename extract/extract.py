@@ -3,6 +3,8 @@ import json
 import cv2
 import mediapipe as mp
 import numpy as np  
+from landmark_store import landmark_bounds, landmarks_to_array
+from video_encoder import open_encoder
 
 mp_hands = mp.solutions.hands
 
@@ -41,15 +43,12 @@ def save_hand_landmarks_video(landmarks_data, output_video_file, padding=20, fps
         print(f"No landmarks found for {output_video_file}. Skipping.")
         return
 
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')
-
     # Determine bounding box size
-    min_x, min_y, max_x, max_y = 1, 1, 0, 0
-    for frame_landmarks in landmarks_data:
-        for hand in frame_landmarks:
-            for landmark in hand:
-                min_x, min_y = min(min_x, landmark["x"]), min(min_y, landmark["y"])
-                max_x, max_y = max(max_x, landmark["x"]), max(max_y, landmark["y"])
+    bounds = landmark_bounds(landmarks_to_array(landmarks_data))
+    if bounds is None:
+        print(f"No hands found for {output_video_file}. Skipping.")
+        return
+    min_x, min_y, max_x, max_y = bounds
 
     # Convert to pixel coordinates
     screen_width, screen_height = 640, 480  # Base resolution
@@ -61,8 +60,8 @@ def save_hand_landmarks_video(landmarks_data, output_video_file, padding=20, fps
     max_x, max_y = min(max_x + padding, screen_width), min(max_y + padding, screen_height)
     cropped_width, cropped_height = max_x - min_x, max_y - min_y
 
-    # Initialize VideoWriter
-    out = cv2.VideoWriter(output_video_file, fourcc, fps, (cropped_width, cropped_height))
+    # Initialize the encoder
+    out = open_encoder(output_video_file, fps, (cropped_width, cropped_height))
 
     for frame_landmarks in landmarks_data:
         black_frame = np.zeros((screen_height, screen_width, 3), dtype=np.uint8)
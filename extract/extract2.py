@@ -3,6 +3,7 @@ import json
 import cv2
 import mediapipe as mp
 import numpy as np  
+from video_encoder import open_encoder
 
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
@@ -46,8 +47,7 @@ def save_hand_landmarks_video(landmarks_data, output_video_file, screen_width=64
         print(f"No landmarks found for {output_video_file}. Skipping.")
         return
 
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')
-    out = cv2.VideoWriter(output_video_file, fourcc, fps, (screen_width, screen_height))
+    out = open_encoder(output_video_file, fps, (screen_width, screen_height))
 
     for frame_landmarks in landmarks_data:
         black_frame = np.zeros((screen_height, screen_width, 3), dtype=np.uint8)
@@ -4,6 +4,7 @@ import mediapipe as mp
 from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 from mediapipe.framework.formats import landmark_pb2
+from video_encoder import open_encoder
 
 # Constants for text and drawing
 MARGIN = 10  # pixels
@@ -61,9 +62,8 @@ def process_video(input_video_path, output_video_path):
     frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = int(cap.get(cv2.CAP_PROP_FPS))
 
-    # Define the codec (AVC1) and create VideoWriter object
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')  # AVC1 codec for MP4
-    out = cv2.VideoWriter(output_video_path, fourcc, fps, (frame_width, frame_height))
+    # Create the encoder (ffmpeg when installed, else OpenCV)
+    out = open_encoder(output_video_path, fps, (frame_width, frame_height))
 
     # Initialize the hand detector
     base_options = python.BaseOptions(model_asset_path='hand_landmarker.task')
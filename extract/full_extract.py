@@ -3,6 +3,7 @@ import json
 import cv2
 import mediapipe as mp
 import numpy as np  
+from video_encoder import open_encoder
 
 mp_hands = mp.solutions.hands
 
@@ -41,11 +42,10 @@ def save_combined_hand_landmarks_video(landmarks_data_list, output_video_file, p
         print(f"No landmarks data to combine. Skipping.")
         return
 
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')
     screen_width, screen_height = 640, 480
 
-    # Create VideoWriter object for the combined video
-    out = cv2.VideoWriter(output_video_file, fourcc, fps, (screen_width, screen_height))
+    # Create the encoder for the combined video
+    out = open_encoder(output_video_file, fps, (screen_width, screen_height))
 
     for landmarks_data in landmarks_data_list:
         for frame_landmarks in landmarks_data:
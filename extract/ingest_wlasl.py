@@ -0,0 +1,263 @@
+import argparse
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+import numpy as np
+from landmark_store import (FACE_POINTS, HANDS, LANDMARKS, POSE_POINTS, STORE_FILE, gloss_variants,
+                            open_landmark_store, save_clip, stored_sources)
+
+WLASL_CLASS_LIST = "datasets/wlasl_class_list.txt"
+WLASL_VIDEOS_FOLDER = "wlasl_videos"
+VIDEO_EXTENSIONS = (".mov", ".mp4", ".webm", ".mkv")
+COMMIT_EVERY = 25  # Clips written between commits; a restart redoes at most this many
+MIN_HAND_PRESENCE = 0.5  # Clips below this are kept but reported as low quality
+HOLISTIC_STRIDE = 3  # Frames with hands between runs of the face and pose models, at least
+HOLISTIC_BUDGET = 0.5  # Face and pose time allowed, as a fraction of hands-only extraction time
+
+hands_detector = None  # One MediaPipe Hands instance per worker process
+face_detector = None  # Face mesh and pose, in holistic mode
+pose_detector = None
+
+def load_class_list(class_list_file=WLASL_CLASS_LIST):
+    """Loads the WLASL gloss names from the tab-separated class list."""
+    with open(class_list_file, "r", encoding="utf-8") as file:
+        return [line.split("\t", 1)[1].strip() for line in file if "\t" in line]
+
+def list_clips(video_folder, metadata_file=None):
+    """
+    Finds WLASL-style clips as [(clip_id, gloss, path)]. Either <video_folder>/<gloss>/<clip> folders,
+    or the flat <video_id>.mp4 layout of the WLASL release, with glosses from its WLASL_v0.3.json.
+    """
+    clips = []
+    if metadata_file:
+        with open(metadata_file, "r", encoding="utf-8") as file:
+            gloss_of = {instance["video_id"]: entry["gloss"] for entry in json.load(file) for instance in entry["instances"]}
+        for name in sorted(os.listdir(video_folder)):
+            video_id, extension = os.path.splitext(name)
+            if extension.lower() in VIDEO_EXTENSIONS and video_id in gloss_of:
+                clips.append((name, gloss_of[video_id], os.path.join(video_folder, name)))
+        return clips
+
+    for gloss in sorted(os.listdir(video_folder)):
+        gloss_folder = os.path.join(video_folder, gloss)
+        if not os.path.isdir(gloss_folder):
+            continue
+        for name in sorted(os.listdir(gloss_folder)):
+            if name.lower().endswith(VIDEO_EXTENSIONS):
+                clips.append((f"{gloss}/{name}", gloss, os.path.join(gloss_folder, name)))
+    return clips
+
+def init_worker(holistic=False):
+    global hands_detector, face_detector, pose_detector
+    import mediapipe as mp
+    hands_detector = mp.solutions.hands.Hands(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+    if holistic:
+        face_detector = mp.solutions.face_mesh.FaceMesh(max_num_faces=1, min_detection_confidence=0.5,
+                                                        min_tracking_confidence=0.5)
+        # The full model is the one mediapipe ships; the lite one is downloaded on first use, which
+        # fails offline. Only the shoulders, elbows and wrists are kept, and the stride bounds its cost
+        pose_detector = mp.solutions.pose.Pose(model_complexity=1, min_detection_confidence=0.5,
+                                               min_tracking_confidence=0.5)
+
+def fill_gated(array, sampled, hand_frames):
+    """
+    Fills the frames with hands that the face or pose model skipped (or found nothing on) by
+    interpolating linearly between the nearest frames it ran on, holding the first and last values
+    past the ends. Frames without hands stay NaN.
+    """
+    sampled = np.array([frame for frame in sampled if not np.isnan(array[frame, 0, 0])], dtype=np.int64)
+    targets = np.setdiff1d(hand_frames, sampled)
+    if not len(sampled) or not len(targets):
+        return array
+    right = np.clip(np.searchsorted(sampled, targets), 1, len(sampled) - 1) if len(sampled) > 1 else np.zeros_like(targets)
+    left = np.maximum(right - 1, 0)
+    span = np.maximum(sampled[right] - sampled[left], 1)
+    weight = np.clip((targets - sampled[left]) / span, 0.0, 1.0)[:, None, None]
+    array[targets] = (1 - weight) * array[sampled[left]] + weight * array[sampled[right]]
+    return array
+
+def extract_clip(path, holistic=False, stride=HOLISTIC_STRIDE):
+    """
+    Extracts a clip's hand landmarks in a worker process, placing each hand in its handedness slot.
+    With holistic, face and upper-body pose landmarks are extracted too, but the face and pose
+    models only run on frames with hands, every stride-th such frame (and whenever hands reappear),
+    with the frames between interpolated. The stride is widened as needed to keep the time those
+    models take within HOLISTIC_BUDGET of the hands-only extraction time.
+    Returns (landmark array, fps, width, height, holistic) where holistic is None, or {"face", "pose"
+    arrays, "frames" the models ran on, "seconds" they took, "hands_seconds" everything else took}.
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Failed to open video file: {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or None
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    frames, faces, poses = [], [], []
+    sampled, hand_frames = [], []
+    start = time.perf_counter()
+    holistic_seconds = 0.0
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        landmarks = np.full((HANDS, LANDMARKS, 3), np.nan, dtype=np.float32)
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        results = hands_detector.process(rgb_frame)
+        for hand_landmarks, handedness in zip(results.multi_hand_landmarks or [], results.multi_handedness or []):
+            slot = 0 if handedness.classification[0].label == "Left" else 1
+            if not np.isnan(landmarks[slot, 0, 0]):
+                slot = 1 - slot  # Both hands labelled the same: keep the second one anyway
+            landmarks[slot] = [[lm.x, lm.y, lm.z] for lm in hand_landmarks.landmark]
+        frames.append(landmarks)
+
+        if not holistic:
+            continue
+        face = np.full((len(FACE_POINTS), 3), np.nan, dtype=np.float32)
+        pose = np.full((len(POSE_POINTS), 3), np.nan, dtype=np.float32)
+        index = len(frames) - 1
+        if not np.isnan(landmarks[:, 0, 0]).all():
+            if not hand_frames or hand_frames[-1] != index - 1 or index - sampled[-1] >= stride:
+                model_start = time.perf_counter()
+                face_results = face_detector.process(rgb_frame)
+                if face_results.multi_face_landmarks:
+                    points = face_results.multi_face_landmarks[0].landmark
+                    face[:] = [[points[i].x, points[i].y, points[i].z] for i in FACE_POINTS]
+                pose_results = pose_detector.process(rgb_frame)
+                if pose_results.pose_landmarks:
+                    points = pose_results.pose_landmarks.landmark
+                    pose[:] = [[points[i].x, points[i].y, points[i].z] for i in POSE_POINTS]
+                holistic_seconds += time.perf_counter() - model_start
+                sampled.append(index)
+                # Stride at which the models' mean cost per run stays within budget of the per-frame cost
+                per_run = holistic_seconds / len(sampled)
+                per_frame = (time.perf_counter() - start - holistic_seconds) / len(frames)
+                stride = max(stride, int(np.ceil(per_run / (HOLISTIC_BUDGET * max(per_frame, 1e-9)))))
+            hand_frames.append(index)
+        faces.append(face)
+        poses.append(pose)
+    cap.release()
+    array = np.stack(frames) if frames else np.full((0, HANDS, LANDMARKS, 3), np.nan, dtype=np.float32)
+    if not holistic:
+        return array, fps, width, height, None
+    face = np.stack(faces) if faces else np.full((0, len(FACE_POINTS), 3), np.nan, dtype=np.float32)
+    pose = np.stack(poses) if poses else np.full((0, len(POSE_POINTS), 3), np.nan, dtype=np.float32)
+    return array, fps, width, height, {
+        "face": fill_gated(face, sampled, hand_frames),
+        "pose": fill_gated(pose, sampled, hand_frames),
+        "frames": len(sampled),
+        "seconds": holistic_seconds,
+        "hands_seconds": time.perf_counter() - start - holistic_seconds,
+    }
+
+def ingest(video_folder=WLASL_VIDEOS_FOLDER, class_list_file=WLASL_CLASS_LIST, store_file=STORE_FILE,
+           metadata_file=None, workers=None, max_variants=None, holistic=False, stride=HOLISTIC_STRIDE):
+    """
+    Extracts landmarks for every clip of a class-list gloss in parallel and writes them to the
+    landmark store as they finish. Clips already stored from the same source file are skipped,
+    so an interrupted run continues where it stopped. holistic adds gated face and pose landmarks
+    (see extract_clip), and re-extracts clips stored without them. Returns a summary dict.
+    """
+    classes = set(load_class_list(class_list_file))
+    clips = [clip for clip in list_clips(video_folder, metadata_file) if clip[1] in classes]
+    if max_variants:
+        per_gloss = Counter()
+        kept = []
+        for clip in clips:
+            per_gloss[clip[1]] += 1
+            if per_gloss[clip[1]] <= max_variants:
+                kept.append(clip)
+        clips = kept
+
+    connection = open_landmark_store(store_file)
+    stored = stored_sources(connection, holistic)
+    pending = []
+    for clip_id, gloss, path in clips:
+        stat = os.stat(path)
+        source = (stat.st_size, stat.st_mtime_ns)
+        if stored.get(clip_id) != source:
+            pending.append({"clip_id": clip_id, "gloss": gloss, "path": path,
+                            "source_size": source[0], "source_mtime": source[1]})
+    print(f"{len(clips)} clips for {len({clip[1] for clip in clips})} of {len(classes)} glosses; "
+          f"{len(clips) - len(pending)} already stored, {len(pending)} to extract")
+
+    start = time.perf_counter()
+    done, failed, frames = 0, 0, 0
+    gated = {"frames": 0, "seconds": 0.0, "hands_seconds": 0.0}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=init_worker,
+                             initargs=(holistic,)) as executor:
+        futures = {executor.submit(extract_clip, clip["path"], holistic, stride): clip for clip in pending}
+        for future in as_completed(futures):
+            clip = futures[future]
+            try:
+                array, clip["fps"], clip["width"], clip["height"], extras = future.result()
+            except Exception as err:
+                print(f"Failed {clip['clip_id']}: {err}")
+                failed += 1
+                continue
+            if extras:
+                save_clip(connection, clip, array, extras["face"], extras["pose"])
+                for key in gated:
+                    gated[key] += extras[key]
+            else:
+                save_clip(connection, clip, array)
+            done += 1
+            frames += len(array)
+            if done % COMMIT_EVERY == 0:
+                connection.commit()
+                minutes = (time.perf_counter() - start) / 60
+                print(f"{done}/{len(pending)} clips, {done / minutes:.0f} clips/min")
+    connection.commit()
+
+    minutes = (time.perf_counter() - start) / 60
+    quality = connection.execute("SELECT COUNT(*), AVG(hand_presence), AVG(jitter), "
+                                 "SUM(hand_presence < ?), COUNT(DISTINCT gloss) FROM clips", (MIN_HAND_PRESENCE,)).fetchone()
+    connection.close()
+    return {
+        "extracted": done,
+        "failed": failed,
+        "frames": frames,
+        "clips_per_minute": done / minutes if minutes else 0.0,
+        "stored_clips": quality[0],
+        "stored_glosses": quality[4],
+        "mean_hand_presence": quality[1],
+        "mean_jitter": quality[2],
+        "low_quality_clips": quality[3],
+        # Face and pose cost against hands-only extraction, in holistic mode
+        "holistic_frames": gated["frames"],
+        "holistic_overhead": gated["seconds"] / gated["hands_seconds"] if gated["hands_seconds"] else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract hand landmarks for a WLASL-style video collection.")
+    parser.add_argument("video_folder", nargs="?", default=WLASL_VIDEOS_FOLDER)
+    parser.add_argument("--class-list", default=WLASL_CLASS_LIST)
+    parser.add_argument("--metadata", default=None, help="WLASL_v0.3.json, for the flat <video_id>.mp4 layout")
+    parser.add_argument("--store", default=STORE_FILE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-variants", type=int, default=None, help="Clips to keep per gloss (default: all)")
+    parser.add_argument("--holistic", action="store_true",
+                        help="Also store face and upper-body pose landmarks, run on frames with hands only")
+    parser.add_argument("--stride", type=int, default=HOLISTIC_STRIDE,
+                        help="Run the face and pose models on every n-th frame with hands, interpolating between")
+    parser.add_argument("--show", default=None, help="List the stored variants of a gloss and exit")
+    args = parser.parse_args()
+
+    if args.show:
+        for variant in gloss_variants(open_landmark_store(args.store), args.show):
+            print(variant)
+        return
+    summary = ingest(args.video_folder, args.class_list, args.store, args.metadata, args.workers, args.max_variants,
+                     args.holistic, args.stride)
+    print(f"Extracted {summary['extracted']} clips ({summary['failed']} failed) at {summary['clips_per_minute']:.0f} clips/min. "
+          f"Store: {summary['stored_clips']} clips of {summary['stored_glosses']} glosses, "
+          f"mean hand presence {summary['mean_hand_presence'] or 0:.2f}, mean jitter {summary['mean_jitter'] or 0:.4f}, "
+          f"{summary['low_quality_clips']} below {MIN_HAND_PRESENCE} hand presence")
+    if summary["holistic_overhead"] is not None:
+        print(f"Face and pose ran on {summary['holistic_frames']} of {summary['frames']} frames, "
+              f"adding {summary['holistic_overhead']:.0%} to hands-only extraction time")
+
+if __name__ == "__main__":
+    main()
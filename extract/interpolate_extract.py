@@ -1,10 +1,23 @@
+import argparse
+import hashlib
 import os
 import json
+from bisect import bisect_right
 import cv2
 import mediapipe as mp
 import numpy as np
+from batch_render import stitch_videos
+from job_manifest import file_signature, job_key, open_manifest, run_jobs
+from landmark_store import (apply_transform, array_to_landmarks, aspect_stretch, canonical_transform, landmarks_to_array,
+                            open_landmark_store)
+from renditions import RENDITIONS, check_backend, render_renditions
+from timeline import build_timeline, sign_spans, timeline_file, write_timeline
+from video_encoder import CRF, PRESET, THREADS, open_encoder, resolve_backend
+from time_warp import DEFAULT_SOURCE_FPS, TARGET_FPS, clip_fps, parse_non_manual_features, sign_factors, warp_clips
+from variant_selection import adaptive_transition_length, load_candidates, select_surah
 
 mp_hands = mp.solutions.hands
+MANIFEST_FORMAT = 2  # Version of the job results stored in the manifest; bump it when they change
 
 # Define connections for fingers and palm
 HAND_CONNECTIONS = [
@@ -16,8 +29,17 @@ HAND_CONNECTIONS = [
     (0, 17)  # Palm base
 ]
 
+BASE_HEIGHT = 480  # Canvas height the line widths and fingertip size are chosen for
+
+def line_thickness(hand_landmarks, screen_height):
+    """draw_hand sizes every line of a hand from the depth of its last landmark, scaled with the canvas."""
+    return max(1, int((3 - hand_landmarks[-1].get("z", 0) * 10) * screen_height / BASE_HEIGHT))
+
 def draw_hand(frame, hand_landmarks, screen_width, screen_height):
-    """Draws a basic 2D hand model using the extracted hand landmarks."""
+    """
+    Draws a basic 2D hand model using the extracted hand landmarks.
+    Landmarks are projected onto the canvas size given, so any resolution is drawn sharp.
+    """
     points = {}
     for i, landmark in enumerate(hand_landmarks):
         x, y = int(landmark["x"] * screen_width), int(landmark["y"] * screen_height)
@@ -27,13 +49,13 @@ def draw_hand(frame, hand_landmarks, screen_width, screen_height):
     for connection in HAND_CONNECTIONS:
         if connection[0] in points and connection[1] in points:
             start, end = points[connection[0]], points[connection[1]]
-            thickness = max(1, int(3 - landmark.get("z", 0) * 10))
-            cv2.line(frame, start, end, (255, 255, 255), thickness)
+            cv2.line(frame, start, end, (255, 255, 255), line_thickness(hand_landmarks, screen_height))
 
     # Draw fingertips as circles
+    radius = max(1, round(6 * screen_height / BASE_HEIGHT))
     for fingertip in [4, 8, 12, 16, 20]:
         if fingertip in points:
-            cv2.circle(frame, points[fingertip], 6, (0, 255, 0), -1)
+            cv2.circle(frame, points[fingertip], radius, (0, 255, 0), -1)
 
 def find_first_frame_with_hands(frames):
     """Find the first frame in a clip that has hand data."""
@@ -100,64 +122,129 @@ def create_transition(last_hand, first_hand, num_frames):
     
     return transition_frames
 
-def blend_video_segments(landmarks_data_list, output_video_file, transition_frames=20, fps=30):
+def build_final_frames(landmarks_data_list, transition_frames=20, previous_hand=None, transition_length=None):
+    """
+    Joins clips of hand landmark data into one frame list, with interpolated transitions between clips.
+    previous_hand is the last hand shown before these clips (e.g. by the preceding part of a split
+    render), so the first clip gets a transition in as well.
+    transition_length(last_hand, first_hand, transition_frames), when given, sets each transition's
+    length instead of the fixed transition_frames.
+    Returns (final_frames, segments): segments give the frames of each clip that had hands as
+    {"clip": index in landmarks_data_list, "start": first frame, "end": frame after its last}.
+    """
+    final_frames = []
+    segments = []
+    last_hand = previous_hand
+
+    for clip_index, clip_landmarks in enumerate(landmarks_data_list):
+        # Trim empty frames at the start and end of the clip
+        first_idx, first_frame = find_first_frame_with_hands(clip_landmarks)
+        last_idx, last_frame = find_last_frame_with_hands(clip_landmarks)
+        if first_idx == -1 or last_idx == -1:
+            continue  # Skip clips with no hand data
+
+        if last_hand and first_frame[0]:
+            frames = transition_length(last_hand, first_frame[0], transition_frames) if transition_length else transition_frames
+            final_frames.extend(create_transition(last_hand, first_frame[0], frames))
+
+        segments.append({"clip": clip_index, "start": len(final_frames),
+                         "end": len(final_frames) + last_idx + 1 - first_idx})
+        final_frames.extend(clip_landmarks[first_idx:last_idx + 1])
+        last_hand = last_frame[0]
+
+    return final_frames, segments
+
+def frame_key(frame_data, screen_width, screen_height):
+    """
+    What draw_hand would draw for a frame: the pixel position of every landmark and each hand's line
+    thickness. Frames with equal keys produce identical images, however different their landmarks.
+    """
+    if not frame_data:
+        return b""
+    points = np.array([[landmark["x"], landmark["y"]] for hand in frame_data for landmark in hand], dtype=np.float64)
+    points *= (screen_width, screen_height)
+    thicknesses = [line_thickness(hand, screen_height) if hand else 0 for hand in frame_data]
+    return points.astype(np.int64).tobytes() + bytes(len(hand) for hand in frame_data) + bytes(thicknesses)
+
+def render_frames(final_frames, output_video_file, fps=30, screen_width=640, screen_height=480, vfr=False,
+                  keyframes=None, encoder_options=None):
+    """
+    Draws each frame's hands on a black canvas and writes the video.
+    A frame that would draw exactly like the one before it (holds, repeated poses, sub-pixel motion)
+    is not drawn again. With vfr and ffmpeg, such frames are not encoded either: each distinct frame
+    (and the last, so the video lasts as long) is stored once at its own timestamp, listed in
+    <video>.timestamps.txt (mkvmerge timestamp format v2). The OpenCV writer can only write a
+    constant frame rate, so it keeps every frame and <video>.duplicates.txt lists the repeated ones.
+    keyframes (frame numbers) and encoder_options are passed to video_encoder.open_encoder.
+    Returns {"frames", "drawn", "duplicates", "encoder": encoder stats}.
+    """
+    keys = [frame_key(frame_data, screen_width, screen_height) for frame_data in final_frames]
+    # Output frame numbers at which a newly drawn frame appears
+    shown_at = [index for index, key in enumerate(keys) if index == 0 or key != keys[index - 1]]
+    options = dict(encoder_options or {})
+    mux_vfr = vfr and resolve_backend(options.get("backend")) == "ffmpeg"
+    if mux_vfr:
+        kept = shown_at + [len(final_frames) - 1] if shown_at and shown_at[-1] != len(final_frames) - 1 else shown_at
+        options["keep_frames"] = kept
+        if keyframes:
+            # A keyframe on a dropped frame goes on the kept frame that holds it
+            keyframes = [kept[bisect_right(kept, frame) - 1] for frame in keyframes]
+    elif vfr:
+        print(f"The OpenCV writer cannot write variable frame rate; {output_video_file} keeps every frame")
+
+    out = open_encoder(output_video_file, fps, (screen_width, screen_height), keyframes=keyframes, **options)
+    frame = None
+    for index, frame_data in enumerate(final_frames):
+        if index == 0 or keys[index] != keys[index - 1]:
+            frame = np.zeros((screen_height, screen_width, 3), dtype=np.uint8)
+
+            for hand in frame_data:
+                draw_hand(frame, hand, screen_width, screen_height)
+
+        # Every frame goes to the encoder, so the ones it drops still count towards the timestamps of those it keeps
+        out.write(frame)
+
+    encoder_stats = out.close()
+    if mux_vfr:
+        with open(os.path.splitext(output_video_file)[0] + ".timestamps.txt", "w", encoding="utf-8") as file:
+            file.write("# timestamp format v2\n")
+            file.writelines(f"{index * 1000 / fps:.3f}\n" for index in kept)
+    elif vfr:
+        # Frame numbers that repeat the frame before them, for tools that can drop them when muxing
+        duplicates = sorted(set(range(len(final_frames))) - set(shown_at))
+        with open(os.path.splitext(output_video_file)[0] + ".duplicates.txt", "w", encoding="utf-8") as file:
+            file.writelines(f"{index}\n" for index in duplicates)
+    return {"frames": len(final_frames), "drawn": len(shown_at), "duplicates": len(final_frames) - len(shown_at),
+            "encoder": encoder_stats}
+
+def blend_video_segments(landmarks_data_list, output_video_file, transition_frames=20, fps=30, vfr=False,
+                         entries=None, encoder_options=None, transition_length=None):
     """
     Create a smoothly blended video from segments of hand landmark data.
     Ensures transitions between segments even when there are empty frames.
+    With vfr, repeated frames are stored once (see render_frames). entries, what each clip shows
+    (see timeline.sign_spans), puts keyframes at the ayah starts. transition_length goes to
+    build_final_frames.
+    Returns (final_frames, segments, render_frames stats), or None when nothing was rendered.
     """
     if not landmarks_data_list:
         print("No landmark data to process")
-        return
+        return None
     
-    # Clean the data to remove empty frames at start/end of each clip
-    cleaned_data = clean_landmarks_data(landmarks_data_list)
-    if not cleaned_data:
+    # Empty frames at the start/end of each clip are trimmed while joining
+    final_frames, segments = build_final_frames(landmarks_data_list, transition_frames, transition_length=transition_length)
+    if not final_frames:
         print("No valid hand data found in any clips")
-        return
-    
-    # Set up video writer
-    screen_width, screen_height = 640, 480
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')
-    out = cv2.VideoWriter(output_video_file, fourcc, fps, (screen_width, screen_height))
-    
-    # Process and write each clip with transitions
-    final_frames = []
-    
-    # Add first clip's frames
-    first_clip = cleaned_data[0]
-    for frame_data in first_clip:
-        final_frames.append(frame_data)
-    
-    # Process remaining clips with transitions
-    for i in range(1, len(cleaned_data)):
-        prev_clip = cleaned_data[i-1]
-        current_clip = cleaned_data[i]
-        
-        # Get last hand from previous clip and first hand from current clip
-        last_frame = prev_clip[-1]
-        first_frame = current_clip[0]
-        
-        if last_frame and first_frame and last_frame[0] and first_frame[0]:
-            # Create transition frames
-            transition = create_transition(last_frame[0], first_frame[0], transition_frames)
-            
-            # Add transition frames
-            final_frames.extend(transition)
-        
-        # Add current clip's frames
-        final_frames.extend(current_clip)
-    
-    # Render all frames
-    for frame_data in final_frames:
-        frame = np.zeros((screen_height, screen_width, 3), dtype=np.uint8)
-        
-        for hand in frame_data:
-            draw_hand(frame, hand, screen_width, screen_height)
-        
-        out.write(frame)
+        return None
     
-    out.release()
-    print(f"Blended video saved as {output_video_file}")
+    keyframes = build_timeline(sign_spans(entries, segments), len(final_frames), fps)["keyframes"] if entries else None
+    stats = render_frames(final_frames, output_video_file, fps, vfr=vfr, keyframes=keyframes,
+                          encoder_options=encoder_options)
+    encoder = stats["encoder"]
+    print(f"Blended video saved as {output_video_file} "
+          f"({stats['duplicates']} of {stats['frames']} frames were duplicates and not redrawn; "
+          f"encoded by {encoder['backend']} at {encoder['fps']:.0f} frames/s)")
+    return final_frames, segments, stats
 
 def extract_hand_landmarks(input_video_file):
     """Extracts hand landmarks from a video file."""
@@ -187,31 +274,231 @@ def extract_hand_landmarks(input_video_file):
     cap.release()
     return landmarks_data
 
-def process_videos_from_json(json_file, output_folder="outputs", transition_frames=20):
-    """Process videos from JSON and create a combined video with transitions."""
+def sign_name(video_path):
+    """The sign a clip shows, from its file name (videos/glorify.mp4 -> GLORIFY)."""
+    return os.path.splitext(os.path.basename(video_path))[0].upper()
+
+def phrase_glosses(phrase_data):
+    """The signs of an ayah's {phrase: [video paths]}, the names its NON_MANUAL_FEATURES may use."""
+    return {sign_name(video_path) for video_paths in phrase_data.values() for video_path in video_paths or []}
+
+def clip_stretch(video_path):
+    """landmark_store.aspect_stretch for a video, from the size in its header."""
+    cap = cv2.VideoCapture(video_path)
+    size = (cap.get(cv2.CAP_PROP_FRAME_WIDTH), cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) if cap.isOpened() else (0, 0)
+    cap.release()
+    return aspect_stretch(*size)
+
+def warp_landmarks_data(landmarks_data_list, source_fps_list, fps=TARGET_FPS, factors=None, normalize=False,
+                        stretches=None):
+    """
+    Resamples each clip from its own frame rate to the output frame rate, applying an optional
+    (speed, repeats) per clip, so signs keep their recorded pace whatever the source videos' fps.
+    With normalize, each clip is also moved into the canonical signing space (see
+    landmark_store.canonical_transform), so signs filmed at different positions and scales line up;
+    stretches gives each clip's aspect ratio correction (see clip_stretch), 1 when not given.
+    """
+    speeds, repeats = zip(*factors) if factors else (None, None)
+    # Trim empty frames first so a repeated sign loops through its hand frames only
+    trimmed = [clip[find_first_frame_with_hands(clip)[0]:find_last_frame_with_hands(clip)[0] + 1]
+               for clip in landmarks_data_list]
+    arrays = [landmarks_to_array(clip) for clip in trimmed]
+    if normalize:
+        arrays = [apply_transform(array, canonical_transform(array, stretch))
+                  for array, stretch in zip(arrays, stretches or [1.0] * len(arrays))]
+    arrays = warp_clips(arrays, source_fps_list, fps, speeds, repeats)
+    return [array_to_landmarks(array) for array in arrays]
+
+def process_videos_resumable(json_data, output_folder, transition_frames, manifest_file, fps=TARGET_FPS, features=None,
+                             surah=None, encoder_options=None, normalize=False):
+    """
+    Like process_videos_from_json, but each extracted clip and each rendered ayah is stored in a
+    job manifest as soon as it is finished. A restarted run, or several workers sharing the
+    manifest, carries on from there instead of starting over.
+    """
+    connection = open_manifest(manifest_file)
+    clip_paths = list(dict.fromkeys(video_path for phrase_data in json_data.values()
+                                    for video_paths in phrase_data.values() for video_path in video_paths or []))
+
+    def extract(video_path):
+        if not os.path.exists(video_path):
+            print(f"Skipping missing video: {video_path}")
+            return None
+        landmarks = extract_hand_landmarks(video_path)
+        if not landmarks or not any(landmarks):
+            print(f"No hands detected in {video_path}")
+            return None
+        print(f"Extracted {len(landmarks)} frames ({sum(1 for frame in landmarks if frame)} with hands) from {video_path}")
+        return {"fps": clip_fps(video_path), "landmarks": landmarks}
+
+    # A clip is extracted again when its video file changes
+    clips = run_jobs(connection, "landmarks", clip_paths, extract,
+                     inputs=lambda video_path: {"format": MANIFEST_FORMAT, "source": file_signature(video_path)})
+
+    # Time-warp every ayah's clips up front in one pass; it takes milliseconds and decodes no video
+    ayah_paths = [(phrase_number, phrase, video_path) for phrase_number, phrase_data in json_data.items()
+                  for phrase, video_paths in phrase_data.items() for video_path in video_paths or []
+                  if clips.get(video_path)]
+    parsed = {phrase_number: parse_non_manual_features((features or {}).get(phrase_number), phrase_glosses(phrase_data))
+              for phrase_number, phrase_data in json_data.items()}
+    warped = warp_landmarks_data([clips[video_path]["landmarks"] for _, _, video_path in ayah_paths],
+                                 [clips[video_path]["fps"] for _, _, video_path in ayah_paths], fps,
+                                 [sign_factors(sign_name(video_path), parsed[phrase_number])
+                                  for phrase_number, _, video_path in ayah_paths], normalize,
+                                 [clip_stretch(video_path) for _, _, video_path in ayah_paths] if normalize else None)
+    ayah_clips = {phrase_number: [] for phrase_number in json_data}
+    ayah_entries = {phrase_number: [] for phrase_number in json_data}
+    for (phrase_number, phrase, video_path), landmarks in zip(ayah_paths, warped):
+        ayah_clips[phrase_number].append(landmarks)
+        ayah_entries[phrase_number].append({"ayah": phrase_number, "phrase": phrase, "gloss": sign_name(video_path),
+                                            "video": video_path})
+
+    # The hand each ayah transitions from: the last one shown by the ayahs before it
+    previous_hands = {}
+    last_hand = None
+    for phrase_number in json_data:
+        previous_hands[phrase_number] = last_hand
+        for landmarks in ayah_clips[phrase_number]:
+            _, last_frame = find_last_frame_with_hands(landmarks)
+            last_hand = last_frame[0] if last_frame else last_hand
+
+    parts_folder = os.path.join(output_folder, "parts")
+    os.makedirs(parts_folder, exist_ok=True)
+
+    # Everything a rendered ayah depends on: its warped clips (so the sources, frame rates and
+    # speed hints all count), the hand it comes in from, and the render settings
+    render_inputs = {}
+    for phrase_number in json_data:
+        landmarks = hashlib.sha256()
+        for clip in ayah_clips[phrase_number]:
+            landmarks.update(landmarks_to_array(clip).tobytes())
+        render_inputs[phrase_number] = {
+            "format": MANIFEST_FORMAT, "landmarks": landmarks.hexdigest(), "entries": ayah_entries[phrase_number],
+            "previous_hand": previous_hands[phrase_number], "transition_frames": transition_frames, "fps": fps,
+            "encoder": encoder_options}
+
+    def render(phrase_number):
+        final_frames, segments = build_final_frames(ayah_clips[phrase_number], transition_frames,
+                                                    previous_hands[phrase_number])
+        if not final_frames:
+            return None
+        # Named after its inputs, so a run with other inputs never reuses or overwrites it
+        digest = job_key(phrase_number, render_inputs[phrase_number]).rpartition("#")[2]
+        part_file = os.path.join(parts_folder, f"ayah_{phrase_number}_{digest}.mp4")
+        # Each part starts an ayah, and starts with a keyframe
+        stats = render_frames(final_frames, part_file, fps, encoder_options=encoder_options)
+        return {"file": part_file, "frames": len(final_frames), "segments": segments, "duplicates": stats["duplicates"]}
+
+    parts = run_jobs(connection, "render", list(json_data), render, inputs=render_inputs.get)
+
+    ordered = [phrase_number for phrase_number in json_data if parts.get(phrase_number)]
+    if not ordered:
+        print("No valid hand data found in any clips")
+        return
+    signs = []
+    total_frames = 0
+    for phrase_number in ordered:
+        signs.extend(sign_spans(ayah_entries[phrase_number], parts[phrase_number]["segments"], total_frames))
+        total_frames += parts[phrase_number]["frames"]
+    # Stitch to a file of our own first: every worker sharing the manifest ends with this step
+    output_video_file = os.path.join(output_folder, "blended_asl_animation.mp4")
+    temporary_file = os.path.join(output_folder, f"blended_asl_animation.{os.getpid()}.mp4")
+    stream_copied = stitch_videos([parts[phrase_number]["file"] for phrase_number in ordered], temporary_file)
+    write_timeline(temporary_file, signs, total_frames, fps, surah, keyframes_forced=stream_copied)
+    os.replace(timeline_file(temporary_file), timeline_file(output_video_file))
+    os.replace(temporary_file, output_video_file)
+    duplicates = sum(parts[phrase_number].get("duplicates", 0) for phrase_number in ordered)
+    print(f"Blended video saved as {output_video_file} "
+          f"({duplicates} of {total_frames} frames were duplicates and not redrawn)")
+
+def process_videos_from_json(json_file, output_folder="outputs", transition_frames=20, manifest_file=None,
+                             fps=TARGET_FPS, features=None, surah=None, vfr=False, encoder_options=None,
+                             renditions=None, variants_store=None, normalize=False):
+    """
+    Process videos from JSON and create a combined video with transitions.
+    Clips are resampled to fps; features maps phrase numbers to NON_MANUAL_FEATURES text whose
+    speed and repetition hints are applied per sign (see time_warp.parse_non_manual_features).
+    With a manifest file, progress is checkpointed and the run can be resumed (see process_videos_resumable).
+    A timeline of where each ayah, phrase and sign starts is written next to the video (see timeline.py).
+    vfr stores each distinct frame once at its own timestamp when encoding with ffmpeg, rather than
+    repeating held frames (see render_frames); resumable runs stitch constant frame rate parts and
+    cannot take it. encoder_options go to video_encoder.open_encoder (backend, preset, crf, threads).
+    renditions (see renditions.RENDITIONS) also draws the animation at each of their sizes, for an
+    HLS package in <output_folder>/blended_asl_animation_hls segmented by ayah, in runs without a
+    manifest. It needs the ffmpeg encoder, and raises RuntimeError before any work is done without it.
+    variants_store, a landmark store (see landmark_store.py), replaces each sign that has stored clips
+    with the variant of it that joins its neighbours best (see variant_selection.select_surah), and
+    sizes transitions by how far the hands move, in runs without a manifest.
+    Resumable runs raise ValueError when given vfr, renditions or a variants_store.
+    normalize moves every extracted clip into the canonical signing space (see warp_landmarks_data),
+    where stored variants already are; a variants_store implies it, so both kinds of clip line up.
+    """
+    if manifest_file:
+        unsupported = [name for name, value in (("vfr", vfr), ("renditions", renditions),
+                                                ("variants_store", variants_store)) if value]
+        if unsupported:
+            raise ValueError(f"Resumable runs (with a manifest) do not support {', '.join(unsupported)}")
+    if renditions:
+        check_backend((encoder_options or {}).get("backend"))
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
     with open(json_file, 'r', encoding='utf-8') as f:
         json_data = json.load(f)
 
+    if manifest_file:
+        return process_videos_resumable(json_data, output_folder, transition_frames, manifest_file, fps, features, surah,
+                                        encoder_options, normalize)
+
+    candidates, selected = {}, {}
+    if variants_store and os.path.exists(variants_store):
+        normalize = True  # Stored variants are in the canonical signing space; bring extracted clips there too
+        # Stored clips are keyed by lower-case WLASL gloss
+        ayah_glosses = {phrase_number: [sign_name(video_path).lower() for video_paths in phrase_data.values()
+                                        for video_path in video_paths or []]
+                        for phrase_number, phrase_data in json_data.items()}
+        connection = open_landmark_store(variants_store)
+        candidates = load_candidates(connection, [gloss for glosses in ayah_glosses.values() for gloss in glosses])
+        connection.close()
+        by_ayah, report = select_surah(ayah_glosses, candidates)
+        selected = {phrase_number: iter(variants) for phrase_number, variants in by_ayah.items()}
+        print(f"Selected stored variants for {report['signs']} signs ({report['skipped']} without stored clips): "
+              f"transition distance {report['first']['transition_distance']} -> {report['selected']['transition_distance']}")
+    elif variants_store:
+        print(f"Landmark store {variants_store} not found; using the phrase JSON's videos")
+
     landmarks_data_list = []
+    entries = []
+    source_fps_list = []
+    stretches = []
+    factors = []
     
     # Process videos
     for phrase_number, phrase_data in json_data.items():
+        parsed = parse_non_manual_features((features or {}).get(phrase_number), phrase_glosses(phrase_data))
         for phrase, video_paths in phrase_data.items():
             print(f"Processing phrase: {phrase}")
 
-            for video_path in video_paths:
-                if not os.path.exists(video_path):
+            for video_path in video_paths or []:  # None when no sign was found for the phrase
+                if sign_name(video_path).lower() in candidates:
+                    variant = next(selected[phrase_number])
+                    landmarks = array_to_landmarks(variant["array"])
+                    source_fps = variant["fps"] or DEFAULT_SOURCE_FPS
+                    stretch = 1.0  # Stored variants come in the canonical signing space already
+                    source = variant["clip_id"]
+                    print(f"Using stored variant {source} for {video_path}")
+                elif not os.path.exists(video_path):
                     print(f"Skipping missing video: {video_path}")
                     continue
-
-                # Extract landmarks
-                landmarks = extract_hand_landmarks(video_path)
-                if not landmarks:
-                    print(f"No landmarks found in {video_path}")
-                    continue
+                else:
+                    # Extract landmarks
+                    landmarks = extract_hand_landmarks(video_path)
+                    if not landmarks:
+                        print(f"No landmarks found in {video_path}")
+                        continue
+                    source_fps = clip_fps(video_path)
+                    stretch = clip_stretch(video_path)
+                    source = video_path
                 
                 # Check if we have at least some frames with hands
                 has_hands = False
@@ -222,18 +509,72 @@ def process_videos_from_json(json_file, output_folder="outputs", transition_fram
                 
                 if has_hands:
                     landmarks_data_list.append(landmarks)
+                    source_fps_list.append(source_fps)
+                    stretches.append(stretch)
+                    factors.append(sign_factors(sign_name(video_path), parsed))
+                    entries.append({"ayah": phrase_number, "phrase": phrase, "gloss": sign_name(video_path),
+                                    "video": source})
                     # Print the first few frames to help debug
                     hand_frames = sum(1 for frame in landmarks if frame)
-                    print(f"Extracted {len(landmarks)} frames ({hand_frames} with hands) from {video_path}")
+                    print(f"Extracted {len(landmarks)} frames ({hand_frames} with hands) from {source}")
                 else:
-                    print(f"No hands detected in {video_path}")
+                    print(f"No hands detected in {source}")
+
+    # Play every clip at the output frame rate, with the requested speed and repetitions
+    landmarks_data_list = warp_landmarks_data(landmarks_data_list, source_fps_list, fps, factors, normalize, stretches)
 
     # Create blended video
     output_video_file = os.path.join(output_folder, "blended_asl_animation.mp4")
-    blend_video_segments(landmarks_data_list, output_video_file, transition_frames=transition_frames)
+    rendered = blend_video_segments(landmarks_data_list, output_video_file, transition_frames=transition_frames, fps=fps,
+                                    vfr=vfr, entries=entries, encoder_options=encoder_options,
+                                    transition_length=adaptive_transition_length if candidates else None)
+    if rendered:
+        final_frames, segments, stats = rendered
+        manifest = write_timeline(output_video_file, sign_spans(entries, segments), len(final_frames), fps, surah,
+                                  keyframes_forced=stats["encoder"]["keyframes_forced"])
+        print(f"Timeline saved as {manifest}")
+        if renditions:
+            with open(manifest, "r", encoding="utf-8") as file:
+                timeline = json.load(file)
+            master_file = render_renditions(final_frames, timeline, os.path.join(output_folder, "blended_asl_animation_hls"),
+                                            renditions, encoder_options=encoder_options)
+            print(f"Rendition ladder saved as {master_file}")
 
 def main():
-    json_file = "surah_test.json"
+    parser = argparse.ArgumentParser(description="Blend the sign videos listed in a phrase JSON into one animation.")
+    parser.add_argument("json_file", nargs="?", default="surah_test.json")
+    parser.add_argument("--manifest", default=None,
+                        help="Job manifest (e.g. outputs/job_manifest.sqlite) to checkpoint progress and resume from")
+    parser.add_argument("--fps", type=float, default=TARGET_FPS, help="Output frame rate; clips are resampled to it")
+    parser.add_argument("--vfr", action="store_true",
+                        help="Store repeated frames once, as variable frame rate (ffmpeg only; the OpenCV writer "
+                             "keeps every frame and lists the repeated ones in <video>.duplicates.txt)")
+    parser.add_argument("--encoder", choices=("auto", "ffmpeg", "opencv"), default="auto",
+                        help="Video encoder: ffmpeg through a pipe, or the OpenCV writer (auto: ffmpeg when installed)")
+    parser.add_argument("--preset", default=PRESET, help="ffmpeg encoder preset")
+    parser.add_argument("--crf", type=int, default=CRF, help="ffmpeg constant rate factor (lower is better quality)")
+    parser.add_argument("--threads", type=int, default=THREADS, help="ffmpeg encoder threads (0: automatic)")
+    parser.add_argument("--surah", type=int, default=None, help="Surah number recorded in the timeline manifest")
+    parser.add_argument("--renditions", nargs="*", default=None, choices=[rendition["name"] for rendition in RENDITIONS],
+                        help="Also render an HLS rendition ladder segmented by ayah (no names: every rendition); needs ffmpeg")
+    parser.add_argument("--variants", default=None, metavar="STORE",
+                        help="Landmark store (e.g. datasets/wlasl_landmarks.sqlite) to take the best-joining stored "
+                             "variant of each sign from, with transitions sized by hand travel (implies --normalize)")
+    parser.add_argument("--normalize", action="store_true",
+                        help="Move every clip into the canonical signing space (wrists centred, hands one size, "
+                             "corrected for the video's aspect ratio) so signs filmed differently line up")
+    parser.add_argument("--features", default=None,
+                        help="JSON of {phrase number: NON_MANUAL_FEATURES text} with speed/repetition hints")
+    args = parser.parse_args()
+    if args.manifest and (args.vfr or args.renditions is not None or args.variants):
+        parser.error("--manifest cannot be combined with --vfr, --renditions or --variants")
+    if args.renditions is not None and resolve_backend(args.encoder) != "ffmpeg":
+        parser.error("--renditions needs ffmpeg to write HLS segments (install it, or use --encoder ffmpeg)")
+    json_file = args.json_file
+    features = None
+    if args.features:
+        with open(args.features, 'r', encoding='utf-8') as f:
+            features = json.load(f)
     if not os.path.exists(json_file):
         print(f"JSON file '{json_file}' not found.")
         return
@@ -241,7 +582,13 @@ def main():
     # Set transition frames (adjust as needed)
     transition_frames = 8
     
-    process_videos_from_json(json_file, transition_frames=transition_frames)
+    process_videos_from_json(json_file, transition_frames=transition_frames, manifest_file=args.manifest,
+                             fps=args.fps, features=features, surah=args.surah, vfr=args.vfr,
+                             encoder_options={"backend": args.encoder, "preset": args.preset, "crf": args.crf,
+                                              "threads": args.threads},
+                             renditions=None if args.renditions is None else
+                             [rendition for rendition in RENDITIONS if not args.renditions or rendition["name"] in args.renditions],
+                             variants_store=args.variants, normalize=args.normalize)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -5,6 +5,7 @@ from mediapipe.tasks import python
 from mediapipe.tasks.python import vision
 from mediapipe.framework.formats import landmark_pb2
 from collections import deque
+from video_encoder import open_encoder
 
 # Constants
 SMOOTHING_FRAMES = 5  # Number of frames to smooth over
@@ -81,8 +82,7 @@ def process_video(input_video_path, output_video_path):
     frame_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = int(cap.get(cv2.CAP_PROP_FPS))
 
-    fourcc = cv2.VideoWriter_fourcc(*'avc1')
-    out = cv2.VideoWriter(output_video_path, fourcc, fps, (frame_width, frame_height))
+    out = open_encoder(output_video_path, fps, (frame_width, frame_height))
 
     # Initialize hand detector
     base_options = python.BaseOptions(model_asset_path='hand_landmarker.task')
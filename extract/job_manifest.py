@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+MANIFEST_FILE = "outputs/job_manifest.sqlite"
+LEASE_SECONDS = 600  # A running job whose lease is not renewed within this is assumed lost and handed out again
+MAX_ATTEMPTS = 3
+POLL_SECONDS = 1.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    kind TEXT NOT NULL, key TEXT NOT NULL, position INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending', worker TEXT, attempts INTEGER NOT NULL DEFAULT 0,
+    lease_until REAL, result TEXT, error TEXT, updated_at REAL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (kind, status, position);
+"""
+
+def worker_name():
+    """Identifies this process across hosts sharing the manifest."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def open_manifest(manifest_file=MANIFEST_FILE):
+    """
+    Opens (creating if needed) the job manifest. WAL mode lets several worker processes
+    read while one writes; writes wait for each other instead of failing.
+    """
+    folder = os.path.dirname(manifest_file)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    connection = sqlite3.connect(manifest_file, timeout=60, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+def add_jobs(connection, kind, keys):
+    """Registers jobs in order. Jobs already in the manifest keep their status and results."""
+    with connection:
+        connection.execute("BEGIN IMMEDIATE")
+        start = connection.execute("SELECT COUNT(*) FROM jobs WHERE kind = ?", (kind,)).fetchone()[0]
+        connection.executemany("INSERT OR IGNORE INTO jobs (kind, key, position) VALUES (?, ?, ?)",
+                               [(kind, key, start + offset) for offset, key in enumerate(keys)])
+
+def requeue_dead_workers(connection, kind):
+    """Hands out again the running jobs of workers on this host whose process has exited (e.g. crashed)."""
+    host = socket.gethostname()
+    dead = []
+    for key, worker in connection.execute(
+            "SELECT key, worker FROM jobs WHERE kind = ? AND status = 'running'", (kind,)).fetchall():
+        worker_host, _, pid = (worker or "").rpartition(":")
+        if worker_host == host and pid.isdigit() and not pid_alive(int(pid)):
+            dead.append((kind, key))
+    if dead:
+        with connection:
+            connection.executemany("UPDATE jobs SET status = 'pending', worker = NULL WHERE kind = ? AND key = ? "
+                                   "AND status = 'running'", dead)
+    return len(dead)
+
+def pid_alive(pid):
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def scope_jobs(connection, kind, keys):
+    """
+    Limits claim_job, job_counts and job_results called with scoped=True to these keys, for this
+    connection only: the manifest may also hold jobs of runs with other inputs.
+    """
+    connection.execute("CREATE TEMP TABLE IF NOT EXISTS scoped_jobs (kind TEXT NOT NULL, key TEXT NOT NULL, "
+                       "PRIMARY KEY (kind, key))")
+    with connection:
+        connection.execute("DELETE FROM temp.scoped_jobs WHERE kind = ?", (kind,))
+        connection.executemany("INSERT OR IGNORE INTO temp.scoped_jobs VALUES (?, ?)", [(kind, key) for key in keys])
+
+def scope_condition(scoped):
+    return " AND key IN (SELECT key FROM temp.scoped_jobs WHERE kind = jobs.kind)" if scoped else ""
+
+def claim_job(connection, kind, worker=None, lease_seconds=LEASE_SECONDS, scoped=False):
+    """
+    Atomically takes the first pending job (or one whose lease ran out) for this worker.
+    Returns its key, or None if there is nothing left to claim.
+    """
+    now = time.time()
+    row = connection.execute(
+        "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, lease_until = ?, updated_at = ? "
+        "WHERE rowid = (SELECT rowid FROM jobs WHERE kind = ? AND "
+        f"(status = 'pending' OR (status = 'running' AND lease_until < ?)){scope_condition(scoped)} "
+        "ORDER BY position LIMIT 1) RETURNING key",
+        (worker or worker_name(), now + lease_seconds, now, kind, now)).fetchone()
+    return row[0] if row else None
+
+def owner_condition(worker):
+    return " AND status = 'running' AND worker = ?" if worker else ""
+
+def complete_job(connection, kind, key, result=None, worker=None):
+    """
+    Stores a finished job's result (anything JSON serializable) as soon as it is done. With worker,
+    only while that worker still holds the job. Returns whether the result was stored.
+    """
+    cursor = connection.execute("UPDATE jobs SET status = 'done', result = ?, error = NULL, lease_until = NULL, "
+                                f"updated_at = ? WHERE kind = ? AND key = ?{owner_condition(worker)}",
+                                (json.dumps(result), time.time(), kind, key) + ((worker,) if worker else ()))
+    return cursor.rowcount > 0
+
+def fail_job(connection, kind, key, error, max_attempts=MAX_ATTEMPTS, worker=None):
+    """
+    Puts a job back in the queue, or marks it failed once it has used its attempts. With worker,
+    only while that worker still holds the job. Returns whether the job was updated.
+    """
+    cursor = connection.execute("UPDATE jobs SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END, "
+                                f"error = ?, lease_until = NULL, updated_at = ? WHERE kind = ? AND key = ?"
+                                f"{owner_condition(worker)}",
+                                (max_attempts, str(error), time.time(), kind, key) + ((worker,) if worker else ()))
+    return cursor.rowcount > 0
+
+def renew_lease(connection, kind, key, worker, lease_seconds=LEASE_SECONDS):
+    """Extends the lease of a job this worker holds. Returns False once the job is no longer its own."""
+    cursor = connection.execute("UPDATE jobs SET lease_until = ? WHERE kind = ? AND key = ?"
+                                f"{owner_condition(worker)}", (time.time() + lease_seconds, kind, key, worker))
+    return cursor.rowcount > 0
+
+def keep_lease(manifest_file, kind, key, worker, lease_seconds, stop):
+    """
+    Renews a job's lease every third of lease_seconds until stop is set, from a thread of its own
+    (with its own connection), so a slow job is not handed to a second worker while it still runs.
+    """
+    connection = open_manifest(manifest_file)
+    try:
+        while not stop.wait(lease_seconds / 3):
+            if not renew_lease(connection, kind, key, worker, lease_seconds):
+                break
+    finally:
+        connection.close()
+
+def job_counts(connection, kind, scoped=False):
+    """Returns {status: number of jobs} for one kind of job."""
+    return dict(connection.execute(f"SELECT status, COUNT(*) FROM jobs WHERE kind = ?{scope_condition(scoped)} "
+                                   "GROUP BY status", (kind,)))
+
+def job_results(connection, kind, scoped=False):
+    """Returns {key: result} of the finished jobs, in the order they were added."""
+    return {key: json.loads(result) for key, result in connection.execute(
+        f"SELECT key, result FROM jobs WHERE kind = ? AND status = 'done'{scope_condition(scoped)} ORDER BY position",
+        (kind,))}
+
+def job_key(key, inputs=None):
+    """
+    The manifest key of a job: its key plus a digest of everything its result depends on, so a
+    run with other inputs or settings (or expecting another result format) gets jobs of its own.
+    """
+    if inputs is None:
+        return key
+    digest = hashlib.sha256(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return f"{key}#{digest[:16]}"
+
+def file_signature(path):
+    """(size, modification time) of a file, or None if it is missing: cheap to compare between runs."""
+    if not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def run_jobs(connection, kind, keys, handler, worker=None, lease_seconds=LEASE_SECONDS, inputs=None):
+    """
+    Registers the jobs and works through them with handler(key) -> result until every job is
+    done or failed, including jobs claimed by other workers sharing the manifest. Jobs finished
+    by an earlier (possibly crashed) run are not redone, as long as inputs(key), which describes
+    what the job's result depends on (source files, settings, result format), is unchanged.
+    Returns {key: result} for this run's finished jobs.
+    """
+    stored = {job_key(key, inputs(key) if inputs else None): key for key in keys}
+    add_jobs(connection, kind, list(stored))
+    scope_jobs(connection, kind, list(stored))
+    worker = worker or worker_name()
+    manifest_file = connection.execute("PRAGMA main.database_list").fetchone()[2]
+    requeue_dead_workers(connection, kind)
+    counts = job_counts(connection, kind, scoped=True)
+    print(f"{kind}: {counts.get('done', 0)} of {sum(counts.values())} jobs already done")
+    while True:
+        key = claim_job(connection, kind, worker, lease_seconds, scoped=True)
+        if key is None:
+            if not job_counts(connection, kind, scoped=True).get("running"):
+                break
+            time.sleep(POLL_SECONDS)  # Other workers are still busy; their jobs return if they die
+            requeue_dead_workers(connection, kind)
+            continue
+        stop = threading.Event()
+        lease = threading.Thread(target=keep_lease, args=(manifest_file, kind, key, worker, lease_seconds, stop),
+                                 daemon=True)
+        lease.start()
+        try:
+            result = handler(stored[key])
+        except Exception as err:
+            print(f"{kind} job {key} failed: {err}")
+            fail_job(connection, kind, key, err, worker=worker)
+            continue
+        finally:
+            stop.set()
+            lease.join()
+        if not complete_job(connection, kind, key, result, worker):
+            print(f"{kind} job {key} was handed to another worker meanwhile; its result is theirs to store")
+
+    counts = job_counts(connection, kind, scoped=True)
+    if counts.get("failed"):
+        print(f"{kind}: {counts['failed']} jobs failed after {MAX_ATTEMPTS} attempts")
+    return {stored[key]: result for key, result in job_results(connection, kind, scoped=True).items()}
@@ -0,0 +1,210 @@
+import os
+import sqlite3
+import zlib
+import numpy as np
+
+STORE_FILE = "datasets/wlasl_landmarks.sqlite"
+HANDS = 2  # Slot 0 is the left hand, slot 1 the right (or detection order when handedness is unknown)
+LANDMARKS = 21
+COORDINATES = ("x", "y", "z")
+# Non-manual features, stored by holistic ingestion: the face mesh points of the eyebrows, eyes,
+# lips, nose tip and chin, and the pose points of the upper body (nose, shoulders, elbows, wrists)
+FACE_POINTS = (70, 63, 105, 66, 107, 336, 296, 334, 293, 300,
+               33, 160, 158, 133, 153, 144, 362, 385, 387, 263, 373, 380,
+               61, 291, 0, 17, 13, 14, 78, 308, 1, 152)
+POSE_POINTS = (0, 11, 12, 13, 14, 15, 16)
+WRIST, MIDDLE_KNUCKLE = 0, 9  # Their distance measures hand size, whichever way the hand is turned
+
+# Canonical signing space: where a clip's wrists are centred and how big its hands are drawn,
+# so clips filmed with different framing join without jumps
+CANONICAL_WRIST = (0.5, 0.55)
+CANONICAL_HAND_SIZE = 0.12
+CANONICAL_ASPECT = 640 / 480  # Width over height of the canvas the signing space is drawn on
+MIN_SCALE, MAX_SCALE = 0.5, 2.0  # Bounds on rescaling, against a clip with bad detections
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS clips (
+    clip_id TEXT PRIMARY KEY, gloss TEXT NOT NULL, source_size INTEGER, source_mtime INTEGER,
+    fps REAL, frames INTEGER NOT NULL, width INTEGER, height INTEGER,
+    hand_presence REAL, jitter REAL, landmarks BLOB NOT NULL,
+    scale REAL, offset_x REAL, offset_y REAL, stretch REAL, face BLOB, pose BLOB
+);
+CREATE INDEX IF NOT EXISTS clips_by_gloss ON clips (gloss);
+"""
+QUALITY_ORDER = "hand_presence DESC, jitter ASC"
+TRANSFORM_COLUMNS = ("scale", "offset_x", "offset_y", "stretch")
+# Columns added after the first stores were built, and their types
+ADDED_COLUMNS = {"scale": "REAL", "offset_x": "REAL", "offset_y": "REAL", "face": "BLOB", "pose": "BLOB",
+                 "stretch": "REAL"}
+
+def landmarks_to_array(frames):
+    """
+    Converts the [[hand, ...], ...] frame lists used by the extract scripts (each hand a list of
+    {"x", "y", "z"} dicts) to a (frames, HANDS, LANDMARKS, 3) float32 array, NaN where no hand was seen.
+    """
+    array = np.full((len(frames), HANDS, LANDMARKS, 3), np.nan, dtype=np.float32)
+    for i, frame in enumerate(frames):
+        for slot, hand in enumerate(frame[:HANDS]):
+            array[i, slot, :len(hand)] = [[landmark["x"], landmark["y"], landmark.get("z", 0.0)] for landmark in hand]
+    return array
+
+def array_to_landmarks(array):
+    """Converts a landmark array back to [[hand, ...], ...] frame lists for the renderers."""
+    frames = []
+    for frame in array:
+        hands = []
+        for hand in frame:
+            if not np.isnan(hand[0, 0]):
+                hands.append([dict(zip(COORDINATES, map(float, landmark))) for landmark in hand])
+        frames.append(hands)
+    return frames
+
+def hand_presence(array):
+    """Fraction of frames in which at least one hand was detected."""
+    if not len(array):
+        return 0.0
+    return float(np.mean(~np.isnan(array[:, :, 0, 0]).all(axis=1)))
+
+def landmark_jitter(array):
+    """
+    Mean frame-to-frame acceleration of the x/y landmarks, a measure of tracking noise: smooth
+    signing moves with little acceleration while detection noise makes points jump back and forth.
+    NaN when no hand was tracked over three consecutive frames.
+    """
+    if len(array) < 3:
+        return float("nan")
+    acceleration = array[2:, :, :, :2] - 2 * array[1:-1, :, :, :2] + array[:-2, :, :, :2]
+    magnitude = np.linalg.norm(acceleration, axis=-1)
+    return float(np.nanmean(magnitude)) if not np.isnan(magnitude).all() else float("nan")
+
+def landmark_bounds(array):
+    """(min_x, min_y, max_x, max_y) of every landmark in a clip, or None when it has no hands."""
+    points = array[..., :2].reshape(-1, 2)
+    points = points[~np.isnan(points[:, 0])]
+    if not len(points):
+        return None
+    (min_x, min_y), (max_x, max_y) = points.min(axis=0), points.max(axis=0)
+    return float(min_x), float(min_y), float(max_x), float(max_y)
+
+def aspect_stretch(width=None, height=None):
+    """
+    How much a clip's normalized x must be stretched for its hands to keep their shape on the
+    canvas: 1 for a clip of the canvas's aspect ratio, or of unknown size.
+    """
+    if not width or not height:
+        return 1.0
+    return width / height / CANONICAL_ASPECT
+
+def canonical_transform(array, stretch=1.0):
+    """
+    The similarity transform taking a clip into the canonical signing space: the mean of its wrist
+    positions moves to CANONICAL_WRIST, and its median hand size (wrist to middle knuckle) is scaled
+    to CANONICAL_HAND_SIZE. Both hands share one transform, so their layout is kept. stretch (see
+    aspect_stretch) first corrects x for the source video's aspect ratio, so a hand is measured and
+    drawn at its true proportions whatever the video's shape.
+    Returns {"scale", "offset_x", "offset_y", "stretch"} (canonical x = x * stretch * scale + offset_x,
+    y = y * scale + offset_y), or None for a clip without hands.
+    """
+    wrists = array[:, :, WRIST, :2].reshape(-1, 2) * (stretch, 1.0)
+    present = ~np.isnan(wrists[:, 0])
+    if not present.any():
+        return None
+    bones = (array[:, :, MIDDLE_KNUCKLE, :2] - array[:, :, WRIST, :2]) * (stretch, 1.0)
+    size = float(np.median(np.linalg.norm(bones, axis=-1).ravel()[present]))
+    scale = float(np.clip(CANONICAL_HAND_SIZE / size, MIN_SCALE, MAX_SCALE)) if size > 0 else 1.0
+    anchor = wrists[present].mean(axis=0)
+    return {"scale": scale, "offset_x": CANONICAL_WRIST[0] - float(anchor[0]) * scale,
+            "offset_y": CANONICAL_WRIST[1] - float(anchor[1]) * scale, "stretch": float(stretch)}
+
+def apply_transform(array, transform):
+    """Maps a whole clip with a canonical_transform in one array operation (depth is scaled too)."""
+    if not transform or transform.get("scale") is None:
+        return array
+    offset = np.array([transform["offset_x"], transform["offset_y"], 0.0], dtype=array.dtype)
+    scale = transform["scale"] * np.array([transform.get("stretch") or 1.0, 1.0, 1.0], dtype=array.dtype)
+    return array * scale + offset
+
+def encode_landmarks(array):
+    """Packs a landmark array as compressed float16, about 10x smaller than the JSON landmarks."""
+    return zlib.compress(np.ascontiguousarray(array, dtype=np.float16).tobytes(), 6)
+
+def decode_landmarks(blob, frames, shape=(HANDS, LANDMARKS, 3)):
+    """Unpacks encode_landmarks output: (frames, *shape), by default a hand landmark array."""
+    return np.frombuffer(zlib.decompress(blob), dtype=np.float16).reshape(frames, *shape).astype(np.float32)
+
+def open_landmark_store(store_file=STORE_FILE):
+    folder = os.path.dirname(store_file)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    connection = sqlite3.connect(store_file, timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    columns = {row[1] for row in connection.execute("PRAGMA table_info(clips)")}
+    for column, kind in ADDED_COLUMNS.items():
+        if column not in columns:
+            connection.execute(f"ALTER TABLE clips ADD COLUMN {column} {kind}")
+    return connection
+
+def save_clip(connection, clip, array, face=None, pose=None):
+    """
+    Stores (or replaces) one clip: clip is {"clip_id", "gloss", "source_size", "source_mtime", "fps", "width", "height"}.
+    The landmarks are stored as detected, with the clip's canonical_transform (for its width and height) next to them.
+    face (frames, len(FACE_POINTS), 3) and pose (frames, len(POSE_POINTS), 3) come from holistic ingestion.
+    """
+    transform = (canonical_transform(array, aspect_stretch(clip.get("width"), clip.get("height")))
+                 or dict.fromkeys(TRANSFORM_COLUMNS))
+    connection.execute(
+        "INSERT OR REPLACE INTO clips (clip_id, gloss, source_size, source_mtime, fps, frames, width, height, "
+        "hand_presence, jitter, landmarks, scale, offset_x, offset_y, stretch, face, pose) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (clip["clip_id"], clip["gloss"], clip.get("source_size"), clip.get("source_mtime"), clip.get("fps"),
+         len(array), clip.get("width"), clip.get("height"), hand_presence(array), landmark_jitter(array),
+         encode_landmarks(array), transform["scale"], transform["offset_x"], transform["offset_y"], transform["stretch"],
+         None if face is None else encode_landmarks(face), None if pose is None else encode_landmarks(pose)))
+
+def stored_sources(connection, holistic=False):
+    """
+    Returns {clip_id: (source_size, source_mtime)} so an interrupted ingestion can skip finished clips.
+    With holistic, clips stored without face and pose landmarks are left out, to be extracted again.
+    """
+    condition = " WHERE face IS NOT NULL AND pose IS NOT NULL" if holistic else ""
+    return {clip_id: (size, mtime) for clip_id, size, mtime in
+            connection.execute("SELECT clip_id, source_size, source_mtime FROM clips" + condition)}
+
+def stored_transform(clip, array):
+    """
+    A clip's stored canonical_transform, computed from its landmarks and size for clips stored
+    without one, or before transforms allowed for the aspect ratio (no stretch).
+    """
+    if clip.get("scale") is not None and clip.get("stretch") is not None:
+        return {column: clip[column] for column in TRANSFORM_COLUMNS}
+    return canonical_transform(array, aspect_stretch(clip.get("width"), clip.get("height")))
+
+def load_clip(connection, clip_id, normalized=True):
+    """
+    Returns (clip record, landmark array), or (None, None) if the clip is not stored.
+    The record's "face" and "pose" are arrays for clips stored by holistic ingestion, else None.
+    All landmarks are in the canonical signing space unless normalized is False.
+    """
+    connection.row_factory = sqlite3.Row
+    row = connection.execute("SELECT * FROM clips WHERE clip_id = ?", (clip_id,)).fetchone()
+    connection.row_factory = None
+    if row is None:
+        return None, None
+    clip = dict(row)
+    array = decode_landmarks(clip.pop("landmarks"), clip["frames"])
+    transform = stored_transform(clip, array) if normalized else None
+    for column, points in (("face", FACE_POINTS), ("pose", POSE_POINTS)):
+        if clip[column] is not None:
+            # The same transform as the hands, so face and body stay where they were relative to them
+            clip[column] = apply_transform(decode_landmarks(clip[column], clip["frames"], (len(points), 3)), transform)
+    return clip, apply_transform(array, transform)
+
+def gloss_variants(connection, gloss):
+    """Returns the stored clips of a gloss without their landmarks, best quality first."""
+    connection.row_factory = sqlite3.Row
+    rows = connection.execute(
+        "SELECT clip_id, gloss, fps, frames, width, height, hand_presence, jitter FROM clips "
+        f"WHERE gloss = ? ORDER BY {QUALITY_ORDER}", (gloss,)).fetchall()
+    connection.row_factory = None
+    return [dict(row) for row in rows]
@@ -0,0 +1,140 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from video_encoder import resolve_backend
+
+# The hands are drawn from normalized landmarks, so each rendition is drawn at its own size rather
+# than scaled from another; 4:3 like the 640x480 canvas the landmarks are laid out on
+RENDITIONS = [
+    {"name": "240p", "width": 320, "height": 240, "crf": 28},
+    {"name": "360p", "width": 480, "height": 360, "crf": 26},
+    {"name": "480p", "width": 640, "height": 480, "crf": 23},
+    {"name": "720p", "width": 960, "height": 720, "crf": 21},
+]
+MAX_SEGMENT_SECONDS = 10  # Longer ayahs are cut again at phrase starts
+MASTER_PLAYLIST = "master.m3u8"
+MEDIA_PLAYLIST = "index.m3u8"
+
+def segment_bounds(timeline, max_seconds=MAX_SEGMENT_SECONDS):
+    """
+    Frame ranges [(start, end)] to cut a rendered timeline into: one per ayah, so a client can fetch
+    and seek by ayah, with an ayah longer than max_seconds also cut where one of its phrases starts.
+    """
+    max_frames = max(1, int(max_seconds * timeline["fps"]))
+    bounds = []
+    for ayah in timeline["ayahs"]:
+        cuts = [ayah["start_frame"]]
+        starts = [phrase["start_frame"] for phrase in ayah["phrases"]
+                  if ayah["start_frame"] < phrase["start_frame"] < ayah["end_frame"]]
+        for start, following in zip(starts, starts[1:] + [ayah["end_frame"]]):
+            if following - cuts[-1] > max_frames:
+                cuts.append(start)
+        bounds.extend(zip(cuts, cuts[1:] + [ayah["end_frame"]]))
+    return [(start, end) for start, end in bounds if end > start]
+
+def check_backend(backend=None):
+    """Raises RuntimeError unless backend resolves to ffmpeg, the only encoder that writes HLS segments."""
+    if resolve_backend(backend) != "ffmpeg":
+        raise RuntimeError("Rendition ladders need ffmpeg to write MPEG-TS segments; install ffmpeg or "
+                           "render without renditions")
+
+def render_rendition(rendition, final_frames, bounds, folder, fps=30, encoder_options=None):
+    """
+    Draws and encodes one rendition in a worker process, one MPEG-TS segment file per frame range,
+    each carrying its position in the stream as HLS expects.
+    Returns (rendition, [(segment file, frames, bytes)], seconds).
+    """
+    from interpolate_extract import render_frames
+
+    start = time.perf_counter()
+    options = dict(encoder_options or {})
+    if "crf" in rendition:
+        options["crf"] = rendition["crf"]
+    os.makedirs(folder, exist_ok=True)
+    segments = []
+    for index, (first, end) in enumerate(bounds):
+        path = os.path.join(folder, f"segment_{index:03d}.ts")
+        # Timestamps continue from the previous segment, so the playlist plays as one stream
+        output_args = ["-output_ts_offset", f"{first / fps:.6f}"]
+        stats = render_frames(final_frames[first:end], path, fps, rendition["width"], rendition["height"],
+                              encoder_options={**options, "output_args": output_args})
+        segments.append((os.path.basename(path), end - first, stats["encoder"]["bytes"]))
+    return rendition, segments, time.perf_counter() - start
+
+def media_playlist(segments, fps):
+    """An HLS VOD playlist of [(segment file, frames, bytes)]."""
+    durations = [frames / fps for _, frames, _ in segments]
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", f"#EXT-X-TARGETDURATION:{max(round(d) for d in durations) or 1}",
+             "#EXT-X-MEDIA-SEQUENCE:0", "#EXT-X-PLAYLIST-TYPE:VOD"]
+    for (name, _, _), duration in zip(segments, durations):
+        lines += [f"#EXTINF:{duration:.3f},", name]
+    return "\n".join(lines + ["#EXT-X-ENDLIST", ""])
+
+def master_playlist(variants, fps):
+    """An HLS master playlist of [(rendition, segments)], with peak and average bits per second."""
+    lines = ["#EXTM3U", "#EXT-X-VERSION:3", "#EXT-X-INDEPENDENT-SEGMENTS"]
+    for rendition, segments in sorted(variants, key=lambda variant: variant[0]["height"]):
+        seconds = sum(frames for _, frames, _ in segments) / fps
+        peak = max(size * 8 * fps / frames for _, frames, size in segments)
+        average = sum(size for _, _, size in segments) * 8 / seconds
+        lines += [f"#EXT-X-STREAM-INF:BANDWIDTH={int(peak)},AVERAGE-BANDWIDTH={int(average)},"
+                  f"RESOLUTION={rendition['width']}x{rendition['height']},FRAME-RATE={fps:.3f}",
+                  f"{rendition['name']}/{MEDIA_PLAYLIST}"]
+    return "\n".join(lines + [""])
+
+def render_renditions(final_frames, timeline, output_folder, renditions=RENDITIONS, workers=None,
+                      encoder_options=None, max_seconds=MAX_SEGMENT_SECONDS):
+    """
+    Renders the frames at every rendition of the ladder in parallel and writes an HLS-style package:
+    <output_folder>/<rendition>/segment_NNN.ts with an index.m3u8 each, and master.m3u8 listing them.
+    Segments follow the ayah boundaries of the timeline (see timeline.build_timeline), which is
+    copied alongside. Returns the master playlist file.
+    Raises RuntimeError unless the encoder is ffmpeg: the OpenCV writer cannot write MPEG-TS segments.
+    """
+    check_backend((encoder_options or {}).get("backend"))
+    fps = timeline["fps"]
+    bounds = segment_bounds(timeline, max_seconds)
+    workers = min(workers or os.cpu_count() or 1, len(renditions))
+    options = dict(encoder_options or {})
+    if not options.get("threads"):
+        # Share the cores between the encoders running at once rather than each taking all of them
+        options["threads"] = max(1, (os.cpu_count() or 1) // workers)
+    os.makedirs(output_folder, exist_ok=True)
+    print(f"Rendering {len(renditions)} renditions of {len(bounds)} segments on {workers} workers")
+
+    variants = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(render_rendition, rendition, final_frames, bounds,
+                                   os.path.join(output_folder, rendition["name"]), fps, options)
+                   for rendition in renditions]
+        for future in as_completed(futures):
+            rendition, segments, seconds = future.result()
+            with open(os.path.join(output_folder, rendition["name"], MEDIA_PLAYLIST), "w", encoding="utf-8") as file:
+                file.write(media_playlist(segments, fps))
+            print(f"{rendition['name']} ({rendition['width']}x{rendition['height']}): {len(segments)} segments, "
+                  f"{sum(size for _, _, size in segments) / 1024:.0f} KiB in {seconds:.1f}s")
+            variants.append((rendition, segments))
+
+    master_file = os.path.join(output_folder, MASTER_PLAYLIST)
+    with open(master_file, "w", encoding="utf-8") as file:
+        file.write(master_playlist(variants, fps))
+    with open(os.path.join(output_folder, "timeline.json"), "w", encoding="utf-8") as file:
+        json.dump(timeline, file, ensure_ascii=False, indent=2)
+    return master_file
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the segments a timeline manifest would be cut into for the rendition ladder.")
+    parser.add_argument("timeline_file", help="*.timeline.json written by the compositor")
+    parser.add_argument("--max-seconds", type=float, default=MAX_SEGMENT_SECONDS)
+    args = parser.parse_args()
+    with open(args.timeline_file, "r", encoding="utf-8") as file:
+        timeline = json.load(file)
+    for index, (start, end) in enumerate(segment_bounds(timeline, args.max_seconds)):
+        print(f"segment_{index:03d}: frames {start}-{end} ({start / timeline['fps']:.2f}s-{end / timeline['fps']:.2f}s)")
+    for rendition in RENDITIONS:
+        print(f"{rendition['name']}: {rendition['width']}x{rendition['height']}, crf {rendition['crf']}")
+
+if __name__ == "__main__":
+    main()
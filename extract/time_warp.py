@@ -0,0 +1,149 @@
+import argparse
+import re
+import time
+import cv2
+import numpy as np
+from landmark_store import HANDS, LANDMARKS, STORE_FILE, load_clip, open_landmark_store
+
+TARGET_FPS = 30
+DEFAULT_SOURCE_FPS = 30.0  # Used when a video does not report its frame rate
+
+# NON_MANUAL_FEATURES wording (see prompt_extra.txt) and the speed factor or repetition count it implies
+SPEED_WORDS = {
+    "slow": 0.75, "slowly": 0.75, "deliberate": 0.8, "deliberately": 0.8, "measured": 0.85,
+    "fast": 1.3, "quick": 1.3, "quickly": 1.3, "rapid": 1.5, "rapidly": 1.5,
+}
+REPETITION_WORDS = {"single": 1, "once": 1, "double": 2, "twice": 2, "repeated": 2, "triple": 3, "multiple": 3}
+CLAUSE_SPLIT_RE = re.compile(r"[;\[\]\n]|\.(?!\d)")  # Sentences, semicolons and bracketed groups
+SIGN_RE = re.compile(r"\b[A-Z][A-Z\-]+\b")
+REPEAT_COUNT_RE = re.compile(r"(?<![a-z])[x\u00d7]\s?(\d+)\b", re.IGNORECASE)  # "MERCY x2"
+
+def clip_fps(video_path):
+    """Reads a video's frame rate from its header without decoding any frames."""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) if cap.isOpened() else 0
+    cap.release()
+    return fps or DEFAULT_SOURCE_FPS
+
+def hint_factors(part):
+    """The speed and repetition hints in one part of a NON_MANUAL_FEATURES description, as a dict."""
+    words = re.findall(r"[a-z]+", part.lower())
+    factors = {}
+    speeds = [SPEED_WORDS[word] for word in words if word in SPEED_WORDS]
+    if speeds:
+        factors["speed"] = speeds[-1]
+    repeats = [REPETITION_WORDS[word] for word in words if word in REPETITION_WORDS]
+    repeats += [int(count) for count in REPEAT_COUNT_RE.findall(part) if int(count) > 0]
+    if repeats:
+        factors["repeats"] = repeats[-1]
+    return factors
+
+def parse_non_manual_features(text, glosses=None):
+    """
+    Reads speed and repetition hints from a NON_MANUAL_FEATURES description. Signs are named in
+    capitals ("ALLAH slow and deliberate", "MERCY x2"); with glosses given (the ayah's signs), only
+    those count, so capitalised emphasis ("FAST") is read as a hint rather than a sign.
+    A hint goes to the sign named in its comma-separated part, else to the nearest sign named in the
+    same sentence (before it first), else to the last sign named in an earlier sentence; hints given
+    before any sign is named apply to the whole verse.
+    Returns ({"speed", "repeats"} for the verse, {SIGN: {"speed", "repeats"}}).
+    """
+    glosses = None if glosses is None else {gloss.upper() for gloss in glosses}
+    default = {"speed": 1.0, "repeats": 1}
+    signs = {}
+    last_named = []
+    for clause in CLAUSE_SPLIT_RE.split(text or ""):
+        parts = clause.split(",")
+        names = [[sign for sign in SIGN_RE.findall(part) if glosses is None or sign in glosses] for part in parts]
+        for index, part in enumerate(parts):
+            factors = hint_factors(part)
+            if not factors:
+                continue
+            # "ALLAH signed slowly, repeated twice" and "Slow, emphatic MERCY" are both about the named sign
+            before = [named for named in names[:index + 1] if named]
+            after = [named for named in names[index + 1:] if named]
+            named = before[-1] if before else after[0] if after else last_named
+            for sign in named:
+                signs.setdefault(sign, {}).update(factors)
+            if not named:
+                default.update(factors)
+        last_named = next((named for named in reversed(names) if named), last_named)
+    return default, {sign: {**default, **factors} for sign, factors in signs.items()}
+
+def sign_factors(sign, parsed):
+    """Returns (speed, repeats) for a sign given parse_non_manual_features output."""
+    default, signs = parsed
+    factors = signs.get(sign.upper(), default)
+    return factors.get("speed", default["speed"]), factors.get("repeats", default["repeats"])
+
+def warp_clips(arrays, source_fps, target_fps=TARGET_FPS, speeds=None, repeats=None):
+    """
+    Resamples landmark arrays of shape (frames, HANDS, LANDMARKS, 3) to target_fps, played at
+    speed (2.0 = twice as fast) and repeated, in one vectorized pass over all clips.
+    Landmarks are linearly interpolated between neighbouring frames; where one neighbour has no
+    hand the nearer frame is used, so hands do not fade in from NaN.
+    Returns the warped arrays in the same order.
+    """
+    if not arrays:
+        return []
+    speeds = np.asarray(speeds if speeds is not None else [1.0] * len(arrays), dtype=np.float64)
+    repeats = np.asarray(repeats if repeats is not None else [1] * len(arrays), dtype=np.int64)
+    lengths = np.array([len(array) for array in arrays])
+    # Source frames advanced per output frame, and output frames per clip (one play)
+    steps = np.asarray(source_fps, dtype=np.float64) / target_fps * speeds
+    counts = np.where(lengths > 1, np.floor((lengths - 1) / steps).astype(np.int64) + 1, lengths)
+
+    # Source position of every output frame of every clip, as one flat vector
+    clip_of = np.repeat(np.arange(len(arrays)), counts)
+    offsets = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    positions = (np.arange(counts.sum()) - np.repeat(offsets, counts)) * steps[clip_of]
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    lower = np.minimum(np.floor(positions).astype(np.int64), np.maximum(lengths[clip_of] - 1, 0))
+    upper = np.minimum(lower + 1, np.maximum(lengths[clip_of] - 1, 0))
+    weight = (positions - lower).astype(np.float32)[:, None, None, None]
+
+    source = np.concatenate(arrays) if lengths.sum() else np.empty((0, HANDS, LANDMARKS, 3), np.float32)
+    before, after = source[starts[clip_of] + lower], source[starts[clip_of] + upper]
+    warped = after - before
+    warped *= weight
+    warped += before
+    # A hand seen on only one side: take the nearer frame rather than NaN
+    rows, hands = np.nonzero(np.isnan(warped[:, :, 0, 0]))
+    nearer = np.where(weight[rows, 0, 0, 0, None, None] < 0.5, before[rows, hands], after[rows, hands])
+    warped[rows, hands] = nearer
+
+    results = np.split(warped, np.cumsum(counts)[:-1])
+    return [np.tile(result, (count, 1, 1, 1)) if count > 1 else result for result, count in zip(results, repeats)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Time-warp stored landmark clips and report the cost.")
+    parser.add_argument("clip_ids", nargs="*", help="Clips from the landmark store (default: synthetic surah-sized data)")
+    parser.add_argument("--store", default=STORE_FILE)
+    parser.add_argument("--fps", type=float, default=TARGET_FPS)
+    parser.add_argument("--features", default="", help='NON_MANUAL_FEATURES text, e.g. "slow, ALLAH double"')
+    parser.add_argument("--clips", type=int, default=2000, help="Synthetic clips when no clip ids are given")
+    args = parser.parse_args()
+
+    if args.clip_ids:
+        connection = open_landmark_store(args.store)
+        loaded = [load_clip(connection, clip_id) for clip_id in args.clip_ids]
+        arrays = [array for _, array in loaded]
+        source_fps = [clip["fps"] or DEFAULT_SOURCE_FPS for clip, _ in loaded]
+        signs = [clip["gloss"] for clip, _ in loaded]
+    else:
+        random = np.random.default_rng(0)
+        lengths = random.integers(40, 120, args.clips)
+        arrays = [random.random((length, HANDS, LANDMARKS, 3), dtype=np.float32) for length in lengths]
+        source_fps = random.choice([24.0, 25.0, 29.97, 30.0, 60.0], args.clips)
+        signs = ["SIGN"] * args.clips
+
+    parsed = parse_non_manual_features(args.features, set(signs))
+    speeds, repeats = zip(*(sign_factors(sign, parsed) for sign in signs))
+    start = time.perf_counter()
+    warped = warp_clips(arrays, source_fps, args.fps, speeds, repeats)
+    elapsed = time.perf_counter() - start
+    print(f"Warped {len(arrays)} clips ({sum(map(len, arrays))} -> {sum(map(len, warped))} frames) "
+          f"to {args.fps} fps in {elapsed * 1000:.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import json
+import os
+import shutil
+import subprocess
+
+def timeline_file(video_file):
+    """The sidecar manifest written next to a video (surah_001.mp4 -> surah_001.timeline.json)."""
+    return os.path.splitext(video_file)[0] + ".timeline.json"
+
+def sign_spans(entries, segments, offset=0):
+    """
+    Pairs build_final_frames segments with what each clip shows. entries is a list, per clip passed to
+    build_final_frames, of {"ayah", "phrase", "gloss", "video"}; clips without hands have no segment.
+    Returns the entries of the rendered clips with "start_frame" and "end_frame" (exclusive), shifted
+    by offset frames (for a part rendered after others).
+    """
+    return [{**entries[segment["clip"]], "start_frame": segment["start"] + offset, "end_frame": segment["end"] + offset}
+            for segment in segments]
+
+def build_timeline(signs, total_frames, fps, surah=None):
+    """
+    Groups sign spans into ayahs and phrases. An ayah runs from the end of the previous ayah's last
+    sign, so the transition into it belongs to it, and the last ayah runs to the end of the video.
+    Every ayah start is a keyframe position, where a client can seek without decoding what precedes it.
+    """
+    ayahs = []
+    for sign in signs:
+        if not ayahs or ayahs[-1]["ayah"] != sign["ayah"]:
+            ayahs.append({"ayah": sign["ayah"], "start_frame": ayahs[-1]["end_frame"] if ayahs else 0, "phrases": []})
+        ayah = ayahs[-1]
+        if not ayah["phrases"] or ayah["phrases"][-1]["phrase"] != sign["phrase"]:
+            ayah["phrases"].append({"phrase": sign["phrase"], "start_frame": sign["start_frame"], "signs": []})
+        phrase = ayah["phrases"][-1]
+        phrase["signs"].append({"gloss": sign["gloss"], "video": sign["video"],
+                                "start_frame": sign["start_frame"], "end_frame": sign["end_frame"]})
+        phrase["end_frame"] = ayah["end_frame"] = sign["end_frame"]
+    if ayahs:
+        ayahs[-1]["end_frame"] = total_frames
+
+    def seconds(frame):
+        return round(frame / fps, 3)
+
+    for ayah in ayahs:
+        for span in [ayah] + ayah["phrases"] + [sign for phrase in ayah["phrases"] for sign in phrase["signs"]]:
+            span["start"], span["end"] = seconds(span["start_frame"]), seconds(span["end_frame"])
+    return {
+        "surah": surah,
+        "fps": fps,
+        "frames": total_frames,
+        "duration": seconds(total_frames),
+        "keyframes": [ayah["start_frame"] for ayah in ayahs],
+        "ayahs": ayahs,
+    }
+
+def force_keyframes(video_file, keyframes, fps):
+    """
+    Re-encodes a video with ffmpeg so every listed frame is a keyframe, with the index at the front
+    of the file for byte-range requests. Returns False (leaving the video as it is) without ffmpeg.
+    """
+    if not shutil.which("ffmpeg") or not keyframes:
+        return False
+    temporary_file = os.path.splitext(video_file)[0] + f".keyframes.{os.getpid()}.mp4"
+    times = ",".join(f"{frame / fps:.3f}" for frame in keyframes)
+    subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-i", video_file, "-c:v", "libx264", "-pix_fmt", "yuv420p",
+                    "-force_key_frames", times, "-movflags", "+faststart", temporary_file], check=True)
+    os.replace(temporary_file, video_file)
+    return True
+
+def keyframe_offsets(video_file):
+    """Returns [(seconds, byte offset)] of the video's keyframes using ffprobe, or None without it."""
+    if not shutil.which("ffprobe"):
+        return None
+    result = subprocess.run(["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries",
+                             "packet=pts_time,pos,flags", "-of", "csv=p=0", video_file],
+                            capture_output=True, text=True, check=True)
+    offsets = []
+    for line in result.stdout.splitlines():
+        pts_time, pos, flags = (line.split(",") + ["", "", ""])[:3]
+        if "K" in flags and pos not in ("", "N/A"):
+            offsets.append((float(pts_time), int(pos)))
+    return offsets
+
+def write_timeline(video_file, signs, total_frames, fps, surah=None, keyframes_forced=False):
+    """
+    Builds the timeline of a rendered video, forces keyframes at its ayah boundaries when ffmpeg is
+    available, and writes the sidecar manifest. Returns the manifest file.
+    keyframes_forced says the encoder already put them there, so the video is not re-encoded.
+    """
+    timeline = build_timeline(signs, total_frames, fps, surah)
+    timeline["keyframes_forced"] = keyframes_forced or force_keyframes(video_file, timeline["keyframes"], fps)
+    offsets = keyframe_offsets(video_file) if timeline["keyframes_forced"] else None
+    if offsets:
+        # Byte offset of the keyframe at (or just before) each ayah start, for range requests
+        for ayah in timeline["ayahs"]:
+            ayah["byte_offset"] = max((pos for time, pos in offsets if time <= ayah["start"] + 1e-3), default=0)
+    manifest_file = timeline_file(video_file)
+    with open(manifest_file, "w", encoding="utf-8") as file:
+        json.dump(timeline, file, ensure_ascii=False, indent=2)
+    return manifest_file
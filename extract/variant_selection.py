@@ -0,0 +1,215 @@
+import argparse
+import json
+import time
+import numpy as np
+from landmark_store import (HANDS, LANDMARKS, QUALITY_ORDER, STORE_FILE, apply_transform, array_to_landmarks,
+                            decode_landmarks, open_landmark_store, stored_transform)
+
+MISSING_HAND_COST = 0.3  # Pose distance charged for a hand present on only one side of a transition
+QUALITY_WEIGHT = 0.2  # Cost of a clip with no hand frames at all, relative to a full-screen move
+JITTER_WEIGHT = 10.0  # Landmark jitter is small (~0.01) next to pose distances
+FRAME_COST = 0.001  # Small preference for shorter variants
+MAX_HAND_SPEED = 0.04  # Normalized screen units a hand moves per transition frame
+TRANSITION_CHUNK = 256  # Signs whose transition matrices are computed together
+MIN_TRANSITION_FRAMES = 2
+MAX_TRANSITION_FRAMES = 20
+
+def boundary_poses(arrays):
+    """
+    Returns (start poses, end poses) of shape (clips, HANDS, LANDMARKS, 2): the x/y landmarks of the
+    first and last frame with a hand in each clip (NaN for a clip with no hands).
+    """
+    starts = np.full((len(arrays), HANDS, LANDMARKS, 2), np.nan, dtype=np.float32)
+    ends = starts.copy()
+    for i, array in enumerate(arrays):
+        with_hands = np.flatnonzero(~np.isnan(array[:, :, 0, 0]).all(axis=1))
+        if len(with_hands):
+            starts[i] = array[with_hands[0], :, :, :2]
+            ends[i] = array[with_hands[-1], :, :, :2]
+    return starts, ends
+
+def pose_distances(ends, starts):
+    """
+    Transition distances from end poses to start poses of shape (..., HANDS, LANDMARKS, 2), broadcast
+    against each other: the mean landmark displacement per hand, MISSING_HAND_COST for a hand that
+    appears or disappears, averaged over the hands present on either side.
+    ends[:, None] against starts[None] gives the full (n, m) matrix of transitions.
+    """
+    displacement = np.linalg.norm(ends - starts, axis=-1).mean(axis=-1)  # (..., HANDS)
+    end_present = ~np.isnan(ends[..., 0, 0])
+    start_present = ~np.isnan(starts[..., 0, 0])
+    either = end_present | start_present
+    per_hand = np.where(end_present & start_present, displacement, np.where(either, MISSING_HAND_COST, 0.0))
+    return per_hand.sum(axis=-1) / np.maximum(either.sum(axis=-1), 1)
+
+def quality_penalty(variants):
+    """Cost of using each variant on its own: missing hand frames, tracking jitter and length."""
+    presence = np.array([variant.get("hand_presence") or 0.0 for variant in variants])
+    jitter = np.nan_to_num(np.array([variant.get("jitter") or 0.0 for variant in variants], dtype=np.float64))
+    frames = np.array([variant["frames"] for variant in variants])
+    return QUALITY_WEIGHT * ((1 - presence) + JITTER_WEIGHT * jitter) + FRAME_COST * frames
+
+def transition_frames_for(distance, max_frames=MAX_TRANSITION_FRAMES):
+    """Transition length proportional to how far the hands travel, instead of a fixed count."""
+    if not np.isfinite(distance):
+        return max_frames
+    return int(np.clip(np.ceil(distance / MAX_HAND_SPEED), MIN_TRANSITION_FRAMES, max_frames))
+
+def adaptive_transition_length(last_hand, first_hand, max_frames=MAX_TRANSITION_FRAMES):
+    """Frames for a transition between two hands (landmark dict lists), from the distance between them."""
+    last = np.array([[landmark["x"], landmark["y"]] for landmark in last_hand])
+    first = np.array([[landmark["x"], landmark["y"]] for landmark in first_hand])
+    count = min(len(last), len(first))
+    return transition_frames_for(float(np.linalg.norm(last[:count] - first[:count], axis=-1).mean()), max_frames)
+
+def select_variants(candidates, poses=None):
+    """
+    Chooses one variant per sign minimizing the summed quality penalties plus transition distances
+    (Viterbi over the sequence). candidates is a list, per sign, of variant dicts with "array"
+    (frames, HANDS, LANDMARKS, 3), "frames", "hand_presence" and "jitter"; poses optionally gives
+    their boundary_poses, so a sign recurring through a surah is only measured once.
+    Returns (chosen index per sign, total cost).
+    """
+    if not candidates:
+        return [], 0.0
+    if poses is None:
+        poses = [boundary_poses([variant["array"] for variant in variants]) for variants in candidates]
+    # Pad every sign to the same number of variants so all transitions are computed in batches
+    width = max(len(variants) for variants in candidates)
+    starts = np.full((len(candidates), width, HANDS, LANDMARKS, 2), np.nan, dtype=np.float32)
+    ends = starts.copy()
+    penalties = np.full((len(candidates), width), np.inf)
+    for i, variants in enumerate(candidates):
+        starts[i, :len(variants)], ends[i, :len(variants)] = poses[i]
+        penalties[i, :len(variants)] = quality_penalty(variants)
+
+    transitions = np.empty((len(candidates) - 1, width, width))
+    for chunk in range(0, len(candidates) - 1, TRANSITION_CHUNK):
+        stop = min(chunk + TRANSITION_CHUNK, len(candidates) - 1)
+        transitions[chunk:stop] = pose_distances(ends[chunk:stop, :, None], starts[chunk + 1:stop + 1, None])
+    np.nan_to_num(transitions, copy=False, nan=MISSING_HAND_COST)
+
+    cost = penalties[0]
+    back = np.empty((len(candidates) - 1, width), dtype=np.int64)
+    columns = np.arange(width)
+    for i, transition in enumerate(transitions):
+        total = cost[:, None] + transition
+        back[i] = np.argmin(total, axis=0)
+        cost = total[back[i], columns] + penalties[i + 1]
+
+    chosen = [int(np.argmin(cost))]
+    for pointers in back[::-1]:
+        chosen.append(int(pointers[chosen[-1]]))
+    return chosen[::-1], float(cost.min())
+
+def sequence_transitions(variants):
+    """Transition distances and frame counts between consecutive chosen variants."""
+    starts, ends = boundary_poses([variant["array"] for variant in variants])
+    distances = [float(distance) for distance in np.nan_to_num(pose_distances(ends[:-1], starts[1:]), nan=MISSING_HAND_COST)]
+    return distances, [transition_frames_for(distance) for distance in distances]
+
+def load_candidates(connection, glosses):
+    """
+    Loads every stored variant of each gloss, best quality first, in the canonical signing space.
+    Returns {gloss: [variant]} for the glosses that have clips.
+    """
+    candidates = {}
+    for gloss in dict.fromkeys(glosses):
+        rows = connection.execute("SELECT clip_id, fps, frames, width, height, hand_presence, jitter, landmarks, "
+                                  "scale, offset_x, offset_y, stretch "
+                                  f"FROM clips WHERE gloss = ? ORDER BY {QUALITY_ORDER}", (gloss,)).fetchall()
+        variants = []
+        for clip_id, fps, frames, width, height, presence, jitter, blob, scale, offset_x, offset_y, stretch in rows:
+            array = decode_landmarks(blob, frames)
+            transform = stored_transform({"width": width, "height": height, "scale": scale, "offset_x": offset_x,
+                                          "offset_y": offset_y, "stretch": stretch}, array)
+            variants.append({"clip_id": clip_id, "fps": fps, "frames": frames, "hand_presence": presence,
+                             "jitter": jitter, "array": apply_transform(array, transform)})
+        if variants:
+            candidates[gloss] = variants
+    return candidates
+
+def select_surah(ayah_glosses, candidates):
+    """
+    Selects variants for a whole surah as one sequence, so transitions across ayah boundaries
+    count too. ayah_glosses is {ayah: [gloss, ...]}; glosses without stored clips are skipped.
+    Returns ({ayah: [variant]}, report comparing against always taking each gloss's best-quality variant).
+    """
+    sequence = [(ayah, gloss) for ayah, glosses in ayah_glosses.items() for gloss in glosses if gloss in candidates]
+    poses = {gloss: boundary_poses([variant["array"] for variant in candidates[gloss]])
+             for gloss in dict.fromkeys(gloss for _, gloss in sequence)}
+    chosen, _ = select_variants([candidates[gloss] for _, gloss in sequence], [poses[gloss] for _, gloss in sequence])
+    selected = [candidates[gloss][index] for (_, gloss), index in zip(sequence, chosen)]
+    first = [candidates[gloss][0] for _, gloss in sequence]
+
+    report = {"signs": len(sequence), "skipped": sum(len(glosses) for glosses in ayah_glosses.values()) - len(sequence)}
+    for name, variants in (("first", first), ("selected", selected)):
+        distances, frames = sequence_transitions(variants)
+        report[name] = {"transition_distance": round(sum(distances), 3), "transition_frames": sum(frames),
+                        "frames": sum(frames) + sum(variant["frames"] for variant in variants)}
+
+    by_ayah = {ayah: [] for ayah in ayah_glosses}
+    for (ayah, _), variant in zip(sequence, selected):
+        by_ayah[ayah].append(variant)
+    return by_ayah, report
+
+def synthetic_candidates(signs, variants_per_sign, random):
+    """Random clips standing in for stored variants, for timing the selection."""
+    candidates = {}
+    for sign in range(signs):
+        candidates[f"sign{sign}"] = [{"clip_id": f"sign{sign}/{v}", "frames": int(frames),
+                                      "hand_presence": float(random.uniform(0.5, 1.0)),
+                                      "jitter": float(random.uniform(0.0, 0.02)),
+                                      "array": random.random((frames, HANDS, LANDMARKS, 3), dtype=np.float32)}
+                                     for v, frames in enumerate(random.integers(30, 90, variants_per_sign))]
+    return candidates
+
+def main():
+    parser = argparse.ArgumentParser(description="Choose sign variants for a surah that minimize transition cost.")
+    parser.add_argument("surah", nargs="?", type=int, default=None)
+    parser.add_argument("--glosses", default="asl_gloss_rules.json", help="Gloss JSON of {surah: {ayah: {GLOSS}}}")
+    parser.add_argument("--store", default=STORE_FILE)
+    parser.add_argument("--output", default=None, help="Write the chosen clip ids as JSON")
+    parser.add_argument("--render", default=None, help="Render the surah with the chosen variants to this video")
+    parser.add_argument("--synthetic", type=int, default=0, help="Time a synthetic surah of this many signs instead")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        random = np.random.default_rng(0)
+        candidates = synthetic_candidates(200, 6, random)
+        names = list(candidates)
+        ayah_glosses = {str(ayah): [names[i] for i in random.integers(0, len(names), 12)]
+                        for ayah in range(1, args.synthetic // 12 + 1)}
+    else:
+        with open(args.glosses, "r", encoding="utf-8") as file:
+            verses = json.load(file)[str(args.surah)]
+        ayah_glosses = {ayah: [sign.strip().lower() for sign in (verse.get("GLOSS") or "").split(",") if sign.strip()]
+                        for ayah, verse in verses.items()}
+        candidates = load_candidates(open_landmark_store(args.store),
+                                     [gloss for glosses in ayah_glosses.values() for gloss in glosses])
+
+    start = time.perf_counter()
+    by_ayah, report = select_surah(ayah_glosses, candidates)
+    elapsed = time.perf_counter() - start
+    print(f"Selected variants for {report['signs']} signs ({report['skipped']} without clips) in {elapsed * 1000:.0f}ms")
+    for name in ("first", "selected"):
+        print(f"  {name:8s}: transition distance {report[name]['transition_distance']}, "
+              f"{report[name]['transition_frames']} transition frames, {report[name]['frames']} frames in total")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump({ayah: [variant["clip_id"] for variant in variants] for ayah, variants in by_ayah.items()},
+                      file, indent=4)
+    if args.render:
+        from interpolate_extract import build_final_frames, render_frames
+        from time_warp import DEFAULT_SOURCE_FPS, TARGET_FPS, warp_clips
+        variants = [variant for chosen in by_ayah.values() for variant in chosen]
+        warped = warp_clips([variant["array"] for variant in variants],
+                            [variant.get("fps") or DEFAULT_SOURCE_FPS for variant in variants], TARGET_FPS)
+        final_frames, _ = build_final_frames([array_to_landmarks(array) for array in warped], MAX_TRANSITION_FRAMES,
+                                             transition_length=adaptive_transition_length)
+        render_frames(final_frames, args.render, TARGET_FPS)
+        print(f"Rendered {len(final_frames)} frames to {args.render}")
+
+if __name__ == "__main__":
+    main()
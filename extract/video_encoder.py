@@ -0,0 +1,219 @@
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import cv2
+import numpy as np
+
+BACKEND = "auto"  # "ffmpeg", "opencv", or "auto": ffmpeg when it is installed
+CODEC = "libx264"
+PRESET = "veryfast"
+CRF = 23
+THREADS = 0  # 0 lets the encoder choose
+PIXEL_FORMAT = "yuv420p"  # What phones and browsers can decode
+OPENCV_FOURCCS = ("avc1", "mp4v")  # Tried in order; builds without an H.264 encoder can still write MPEG-4
+
+class Encoder:
+    """
+    Writes BGR frames of one size to a video, with the cv2.VideoWriter write/release interface.
+    Closing the encoder checks the file it produced and returns throughput figures.
+    """
+    backend = None
+    keyframes_forced = False
+
+    def __init__(self, path, fps, size):
+        self.path, self.fps, self.size = path, fps, tuple(size)
+        self.output_size = self.size
+        self.frames = 0
+        self.output_frames = None  # Frames in the file when the encoder drops some of those written
+        self.seconds = 0.0
+        self.stats = None
+
+    def write(self, frame):
+        if frame.shape != (self.size[1], self.size[0], 3):
+            raise ValueError(f"Frame of shape {frame.shape} written to a {self.size[0]}x{self.size[1]} video")
+        start = time.perf_counter()
+        self._write(frame)
+        self.seconds += time.perf_counter() - start
+        self.frames += 1
+
+    def close(self):
+        """Finishes the file and validates it. Returns {"backend", "frames", "seconds", "fps", "bytes"}."""
+        if self.stats is None:
+            start = time.perf_counter()
+            self._finish()
+            self.seconds += time.perf_counter() - start
+            validate_video(self.path, self.frames if self.output_frames is None else self.output_frames, self.output_size)
+            self.stats = {"backend": self.backend, "frames": self.frames, "seconds": self.seconds,
+                          "fps": self.frames / self.seconds if self.seconds else 0.0,
+                          "bytes": os.path.getsize(self.path), "keyframes_forced": self.keyframes_forced}
+        return self.stats
+
+    release = close
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        if exc_info[0] is None:
+            self.close()
+        else:
+            self._finish()
+
+class FFmpegEncoder(Encoder):
+    """
+    Pipes raw frames to an ffmpeg process, with control over preset, CRF, threads and keyframes.
+    With keep_frames (frame numbers), only those frames are encoded, each keeping its own timestamp:
+    the file has a variable frame rate and plays in step with a file that has every frame.
+    """
+    backend = "ffmpeg"
+
+    def __init__(self, path, fps, size, preset=PRESET, crf=CRF, threads=THREADS, keyframes=None, codec=CODEC,
+                 output_args=(), keep_frames=None):
+        super().__init__(path, fps, size)
+        command = ["ffmpeg", "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "bgr24",
+                   "-s", f"{size[0]}x{size[1]}", "-r", str(fps), "-i", "-", "-an", "-c:v", codec,
+                   "-preset", preset, "-crf", str(crf), "-threads", str(threads), "-pix_fmt", PIXEL_FORMAT,
+                   "-movflags", "+faststart"]
+        filters = []
+        if keep_frames is not None:
+            kept = sorted(set(keep_frames))
+            self.output_frames = len(kept)
+            # Drop the runs of frames between kept ones; the rest keep the timestamps -r gave them
+            dropped = [f"between(n,{first + 1},{following - 1})" for first, following in zip(kept, kept[1:])
+                       if following > first + 1] + ([f"gte(n,{kept[-1] + 1})"] if kept else [])
+            if dropped:
+                filters.append(f"select='not({'+'.join(dropped)})'")
+            command += ["-fps_mode", "vfr"]
+        if size[0] % 2 or size[1] % 2:
+            # 4:2:0 chroma needs even dimensions; pad odd ones (cropped renders) with a black edge
+            self.output_size = (size[0] + size[0] % 2, size[1] + size[1] % 2)
+            filters.append(f"pad={self.output_size[0]}:{self.output_size[1]}")
+        self.filter_script = None
+        if filters:
+            # A long select expression can exceed the command line limit, so it goes through a file
+            with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+                file.write(",".join(filters))
+            self.filter_script = file.name
+            command += ["-filter_script:v", self.filter_script]
+        if keyframes:
+            # Keyframes where clients seek to (e.g. ayah starts); times, as ffmpeg expects them
+            command += ["-force_key_frames", ",".join(f"{frame / fps:.6f}" for frame in sorted(set(keyframes)))]
+            self.keyframes_forced = True
+        self.errors = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(command + list(output_args) + [path], stdin=subprocess.PIPE, stderr=self.errors)
+
+    def _write(self, frame):
+        try:
+            self.process.stdin.write(np.ascontiguousarray(frame).data)
+        except BrokenPipeError:
+            self._finish()
+
+    def _finish(self):
+        if self.process.stdin and not self.process.stdin.closed:
+            try:
+                self.process.stdin.close()
+            except BrokenPipeError:
+                pass
+        returncode = self.process.wait()
+        if self.filter_script and os.path.exists(self.filter_script):
+            os.remove(self.filter_script)
+        if returncode != 0:
+            self.errors.seek(0)
+            message = self.errors.read().decode("utf-8", "replace").strip()
+            raise RuntimeError(f"ffmpeg failed writing {self.path}: {message}")
+
+class OpenCVEncoder(Encoder):
+    """
+    cv2.VideoWriter, trying each of OPENCV_FOURCCS until one opens. Odd sizes are padded with a black
+    edge like the ffmpeg backend does: the codecs would otherwise round them down themselves.
+    """
+    backend = "opencv"
+
+    def __init__(self, path, fps, size):
+        super().__init__(path, fps, size)
+        self.output_size = (self.size[0] + self.size[0] % 2, self.size[1] + self.size[1] % 2)
+        for fourcc in OPENCV_FOURCCS:
+            self.writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*fourcc), fps, self.output_size)
+            if self.writer.isOpened():
+                self.backend = f"opencv-{fourcc}"
+                return
+        raise RuntimeError(f"OpenCV cannot open a video writer for {path} with any of {', '.join(OPENCV_FOURCCS)}")
+
+    def _write(self, frame):
+        if self.output_size != self.size:
+            frame = cv2.copyMakeBorder(frame, 0, self.output_size[1] - self.size[1], 0, self.output_size[0] - self.size[0],
+                                       cv2.BORDER_CONSTANT, value=(0, 0, 0))
+        self.writer.write(frame)
+
+    def _finish(self):
+        self.writer.release()
+
+def resolve_backend(backend=None):
+    """The backend open_encoder would use: "ffmpeg" or "opencv"."""
+    backend = backend or BACKEND
+    if backend == "auto":
+        return "ffmpeg" if shutil.which("ffmpeg") else "opencv"
+    return backend
+
+def open_encoder(path, fps, size, backend=None, **options):
+    """
+    Opens an encoder for a video of size (width, height). options (preset, crf, threads, keyframes
+    and keep_frames as frame numbers, codec, output_args placed before the output file) apply to the
+    ffmpeg backend; the OpenCV writer ignores them.
+    """
+    backend = resolve_backend(backend)
+    if backend == "ffmpeg":
+        return FFmpegEncoder(path, fps, size, **options)
+    if backend == "opencv":
+        return OpenCVEncoder(path, fps, size)
+    raise ValueError(f"Unknown encoder backend: {backend}")
+
+def validate_video(path, expected_frames, size):
+    """Raises RuntimeError unless path opens as a video of the expected size and frame count."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise RuntimeError(f"{path} was not written as a readable video")
+    found = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    if frames != expected_frames:
+        # Containers without an index (MPEG-TS) only give an estimate; count by decoding
+        frames = 0
+        while cap.grab():
+            frames += 1
+    cap.release()
+    if found != tuple(size) or frames != expected_frames:
+        raise RuntimeError(f"{path} has {frames} frames of {found[0]}x{found[1]}, "
+                           f"expected {expected_frames} frames of {size[0]}x{size[1]}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure encoder throughput on synthetic hand-animation frames.")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--size", default="640x480")
+    parser.add_argument("--backend", action="append", help="Backends to compare (default: every available one)")
+    parser.add_argument("--preset", default=PRESET)
+    parser.add_argument("--crf", type=int, default=CRF)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    args = parser.parse_args()
+
+    width, height = map(int, args.size.split("x"))
+    frames = np.zeros((args.frames, height, width, 3), dtype=np.uint8)
+    for i, frame in enumerate(frames):
+        centre = (int(width * (0.3 + 0.4 * i / args.frames)), height // 2)
+        cv2.circle(frame, centre, height // 8, (255, 255, 255), 3)
+    backends = args.backend or (["ffmpeg"] if shutil.which("ffmpeg") else []) + ["opencv"]
+    for backend in backends:
+        with tempfile.TemporaryDirectory() as folder:
+            encoder = open_encoder(os.path.join(folder, "benchmark.mp4"), 30, (width, height), backend,
+                                   **({"preset": args.preset, "crf": args.crf, "threads": args.threads}
+                                      if backend == "ffmpeg" else {}))
+            for frame in frames:
+                encoder.write(frame)
+            stats = encoder.close()
+        print(f"{stats['backend']}: {stats['frames']} frames in {stats['seconds']:.2f}s "
+              f"({stats['fps']:.0f} frames/s), {stats['bytes'] / 1024:.0f} KiB")
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
 import json
+from fuzzy_match import build_fuzzy_index, suggest_all
+from phrase_segmenter import load_sign_glosses
+from tokenizer import corpus_statistics, numbered_vocabulary
 
 # Function to load the words from the .txt file and remove the numbers
 def load_txt_words(txt_file):
@@ -7,9 +10,8 @@ def load_txt_words(txt_file):
         txt_words = set(line.split(maxsplit=1)[1].strip() for line in file.readlines() if line.strip())
     return txt_words
 
-# Load the dataset from the JSON file
-with open('datasets/unique_words2.json', 'r', encoding='utf-8') as file:
-    json_data = json.load(file)
+# Tokenize the verses directly instead of reloading unique_words2.json
+json_data = numbered_vocabulary(corpus_statistics('datasets/quran_verses.json')["vocabulary"])
 
 # Load words from the .txt file
 txt_words = load_txt_words('datasets/wlasl_class_list.txt')
@@ -26,4 +28,12 @@ for key, word in words_not_in_txt.items():
 with open('datasets/missing.json', 'w', encoding='utf-8') as output_file:
     json.dump(words_not_in_txt, output_file, indent=4)
 
-print("\nWords not in the .txt file have been saved to 'missing.json'.")
\ No newline at end of file
+print("\nWords not in the .txt file have been saved to 'missing.json'.")
+
+# Rank candidate glosses for every missing word from the known sign vocabulary
+fuzzy_index = build_fuzzy_index(load_sign_glosses())
+suggestions = suggest_all(list(words_not_in_txt.values()), fuzzy_index)
+with open('datasets/missing_suggestions.json', 'w', encoding='utf-8') as output_file:
+    json.dump(suggestions, output_file, indent=4)
+
+print(f"Suggestions for {sum(1 for s in suggestions.values() if s)} of {len(suggestions)} missing words saved to 'missing_suggestions.json'.")
@@ -0,0 +1,168 @@
+import argparse
+import json
+import re
+import time
+from collections import Counter
+from phrase_segmenter import load_sign_glosses
+
+MAX_EDIT_DISTANCE = 2
+MIN_TRIGRAM_SIMILARITY = 0.4
+TOP_K = 5
+# Edit and trigram matches between two real words are mostly different words ("seal" -> "steal"),
+# so they are only suggested this similar (trigram Dice) or when both reduce to the same lemma
+MIN_SUGGESTION_SIMILARITY = 0.7
+WORD_RE = re.compile(r"[a-z]+(?:['\-][a-z]+)*")  # Tokens such as "-" or numbers get no suggestions
+
+# (suffix, replacement) rules tried in order; each one that applies gives a candidate lemma
+SUFFIX_RULES = [
+    ("'s", ""), ("ies", "y"), ("ied", "y"), ("ves", "f"), ("ves", "fe"), ("es", ""), ("s", ""),
+    ("ing", ""), ("ing", "e"), ("ed", ""), ("ed", "e"), ("d", ""), ("ers", ""), ("er", ""), ("er", "e"),
+    ("est", ""), ("ly", ""), ("ily", "y"), ("ness", ""), ("ful", ""), ("ment", ""),
+]
+
+def lemma_candidates(word, depth=2):
+    """Returns possible base forms of a word from simple English suffix rules, applied up to depth times."""
+    candidates = []
+    for suffix, replacement in SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= 2:
+            stem = word[:-len(suffix)]
+            candidates.append(stem + replacement)
+            # Undo consonant doubling: "running" -> "run", "stopped" -> "stop"
+            if replacement == "" and len(stem) > 2 and stem[-1] == stem[-2] and stem[-1] not in "aeiouls":
+                candidates.append(stem[:-1])
+    if depth > 1:
+        # "believers" -> "believer" -> "believe"
+        candidates += [deeper for lemma in candidates for deeper in lemma_candidates(lemma, depth - 1)]
+    return candidates
+
+def deletes(word, max_distance):
+    """Returns every string reachable from word by deleting up to max_distance characters."""
+    results = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        results |= frontier
+    return results
+
+def allowed_distance(word, max_distance):
+    """Short words get fewer edits: two edits turn most three-letter words into other words."""
+    if len(word) <= 3:
+        return 0
+    return min(max_distance, 1 if len(word) <= 5 else 2)
+
+def edit_distance(a, b, max_distance):
+    """Levenshtein distance, or max_distance + 1 as soon as it is known to be larger."""
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > max_distance:
+            return max_distance + 1
+        previous = current
+    return previous[-1]
+
+def trigrams(word):
+    """Character trigrams of a word padded with spaces."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def trigram_similarity(word_trigrams, gloss_trigram_count, shared):
+    """Dice coefficient of two trigram sets, given the number of trigrams they share."""
+    return 2 * shared / (len(word_trigrams) + gloss_trigram_count)
+
+def build_fuzzy_index(vocabulary, max_distance=MAX_EDIT_DISTANCE):
+    """
+    Builds the lookup structures once: an exact set, a deletion index for edit-distance
+    candidates (SymSpell-style, instead of walking a BK-tree) and a trigram index.
+    """
+    index = {"vocabulary": set(vocabulary), "max_distance": max_distance,
+             "deletes": {}, "trigrams": {}, "trigram_counts": {}}
+    for gloss in index["vocabulary"]:
+        for deleted in deletes(gloss, max_distance):
+            index["deletes"].setdefault(deleted, set()).add(gloss)
+        gloss_trigrams = trigrams(gloss)
+        index["trigram_counts"][gloss] = len(gloss_trigrams)
+        for trigram in gloss_trigrams:
+            index["trigrams"].setdefault(trigram, set()).add(gloss)
+    return index
+
+def suggest(word, index, top_k=TOP_K):
+    """
+    Returns up to top_k (gloss, score, method) candidates for a word, best first; none for
+    tokens that are not words.
+    """
+    if not WORD_RE.fullmatch(word):
+        return []
+    vocabulary = index["vocabulary"]
+    max_distance = allowed_distance(word, index["max_distance"])
+    scores = {}
+
+    def offer(gloss, score, method):
+        if score > scores.get(gloss, (0, None))[0]:
+            scores[gloss] = (score, method)
+
+    if word in vocabulary:
+        offer(word, 1.0, "exact")
+    lemmas = set(lemma_candidates(word))
+    for lemma in lemmas:
+        if lemma in vocabulary:
+            offer(lemma, 0.95, "lemma")
+
+    word_trigrams = trigrams(word)
+    shared = Counter()
+    for trigram in word_trigrams:
+        shared.update(index["trigrams"].get(trigram, ()))
+
+    def plausible(gloss):
+        if trigram_similarity(word_trigrams, index["trigram_counts"][gloss], shared[gloss]) >= MIN_SUGGESTION_SIMILARITY:
+            return True
+        return bool((lemmas | {word}) & ({gloss} | set(lemma_candidates(gloss))))
+
+    candidates = set()
+    for deleted in deletes(word, max_distance) if max_distance else ():
+        candidates |= index["deletes"].get(deleted, set())
+    for gloss in candidates - {word}:
+        distance = edit_distance(word, gloss, max_distance)
+        if distance <= max_distance and plausible(gloss):
+            offer(gloss, 0.9 - 0.5 * distance / max(len(word), len(gloss)), "edit")
+
+    for gloss, count in shared.items():
+        similarity = trigram_similarity(word_trigrams, index["trigram_counts"][gloss], count)
+        if similarity >= MIN_TRIGRAM_SIMILARITY and plausible(gloss):
+            offer(gloss, 0.8 * similarity, "trigram")
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1][0], item[0]))
+    return [(gloss, round(score, 3), method) for gloss, (score, method) in ranked[:top_k]]
+
+def suggest_all(words, index, top_k=TOP_K):
+    """Suggests glosses for many words at once, leaving out tokens that are not words."""
+    return {word: suggest(word, index, top_k) for word in words if WORD_RE.fullmatch(word)}
+
+def main():
+    parser = argparse.ArgumentParser(description="Suggest ASL glosses for words missing from the vocabulary.")
+    parser.add_argument("words", nargs="*", help="Words to look up (default: datasets/missing.json)")
+    parser.add_argument("--top", type=int, default=TOP_K)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_fuzzy_index(load_sign_glosses())
+    print(f"Built index over {len(index['vocabulary'])} glosses in {time.perf_counter() - start:.2f}s")
+
+    words = args.words
+    if not words:
+        with open('datasets/missing.json', 'r', encoding='utf-8') as file:
+            words = list(json.load(file).values())
+
+    start = time.perf_counter()
+    suggestions = suggest_all(words, index, args.top)
+    elapsed = time.perf_counter() - start
+    for word in list(suggestions)[:20] if not args.words else suggestions:
+        print(f"{word}: " + ", ".join(f"{gloss} ({score}, {method})" for gloss, score, method in suggestions[word]))
+    matched = sum(1 for candidates in suggestions.values() if candidates)
+    print(f"Suggested glosses for {matched}/{len(suggestions)} words in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+import argparse
+import re
+from collections import Counter
+from tokenizer import stream_corpus, tokenize_texts
+
+VERSES_FILE = "datasets/quran_verses.json"
+
+# Clause boundaries: punctuation runs and spaced or unspaced dashes between words
+CLAUSE_SPLIT_RE = re.compile(r"\s*(?:[,;:.!?]+|\s[-–—]+\s|[–—])\s*")
+QUOTES = "\"“”‘’' "
+
+def split_units(verse, granularity="clause"):
+    """Splits a verse into translation units: the whole verse, or its clauses."""
+    if granularity == "verse":
+        return [verse]
+    clauses = (clause.strip(QUOTES) for clause in CLAUSE_SPLIT_RE.split(verse))
+    return [clause for clause in clauses if clause]
+
+def plan_units(verses, granularity="clause"):
+    """
+    Finds the distinct units across verses. Units with the same words (ignoring case,
+    punctuation and bracketed insertions) share one key.
+    Returns (verse_keys, unit_texts, counts): the unit keys of each verse, the first text
+    seen for each key, and how often each key occurs.
+    """
+    verse_units = [split_units(verse, granularity) for verse in verses]
+    flat_units = [unit for units in verse_units for unit in units]
+    flat_keys = [" ".join(words) for words in tokenize_texts(flat_units)] if flat_units else []
+
+    unit_texts = {}
+    for key, unit in zip(flat_keys, flat_units):
+        if key:
+            unit_texts.setdefault(key, unit)
+
+    verse_keys = []
+    position = 0
+    for units in verse_units:
+        verse_keys.append([key for key in flat_keys[position:position + len(units)] if key])
+        position += len(units)
+    return verse_keys, unit_texts, Counter(key for key in flat_keys if key)
+
+def dedup_report(counts):
+    """Summarises how much work memoization saves."""
+    total_units = sum(counts.values())
+    total_words = sum(len(key.split()) * count for key, count in counts.items())
+    distinct_words = sum(len(key.split()) for key in counts)
+    return {
+        "units": total_units,
+        "distinct_units": len(counts),
+        "unit_dedup_ratio": 1 - len(counts) / total_units if total_units else 0.0,
+        "words": total_words,
+        "distinct_unit_words": distinct_words,
+        "word_dedup_ratio": 1 - distinct_words / total_words if total_words else 0.0,
+    }
+
+def memoized_translate(verses, translate_units, granularity="clause", joiner=", "):
+    """
+    Translates each distinct unit once with translate_units([unit text, ...]) -> {unit text: gloss}
+    and reassembles one gloss per verse. Verses with an untranslated unit get None.
+    Returns ({verse: gloss}, report).
+    """
+    verse_keys, unit_texts, counts = plan_units(verses, granularity)
+    unit_glosses = translate_units(list(unit_texts.values()))
+
+    glosses = {}
+    for verse, keys in zip(verses, verse_keys):
+        parts = [unit_glosses.get(unit_texts[key]) for key in keys]
+        glosses[verse] = joiner.join(parts) if parts and all(parts) else None
+    return glosses, dedup_report(counts)
+
+def main():
+    parser = argparse.ArgumentParser(description="Report how often verses and phrases repeat across the Quran.")
+    parser.add_argument("--verses", default=VERSES_FILE)
+    parser.add_argument("--top", type=int, default=10, help="Most repeated units to list")
+    args = parser.parse_args()
+
+    verses = [verse for _, verse in stream_corpus(args.verses)]
+    for granularity in ("verse", "clause"):
+        _, unit_texts, counts = plan_units(verses, granularity)
+        report = dedup_report(counts)
+        print(f"{granularity}: {report['units']} units, {report['distinct_units']} distinct "
+              f"({report['unit_dedup_ratio']:.1%} saved); {report['words']} words, "
+              f"{report['distinct_unit_words']} to translate ({report['word_dedup_ratio']:.1%} saved)")
+        for key, count in counts.most_common(args.top):
+            if count > 1:
+                print(f"  {count:4d}x {unit_texts[key]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from corpus_store import STORE_FILE, get_surah_verses, open_store
+from dotenv import load_dotenv
+from gloss_memo import memoized_translate
+from openai import APIConnectionError, APIStatusError, OpenAI, RateLimitError
+
+PROMPT_FILE = "prompt.txt"
+VERSES_FILE = "datasets/quran_verses.json"
+GLOSS_CACHE_FILE = "datasets/gloss_cache.json"
+OUTPUT_FILE = "asl_gloss.json"
+MODEL = "gpt-4o-mini"
+
+MAX_PROMPT_TOKENS = 3000  # Prompt template plus packed verses
+MAX_VERSES_PER_REQUEST = 20  # Keeps each response well inside the output limit
+CHARS_PER_TOKEN = 4  # Rough English estimate, good enough for packing
+MAX_RETRIES = 5
+BACKOFF_SECONDS = 2.0  # First retry delay, doubled after each rate limit
+
+RESPONSE_RE = re.compile(
+    r'"VERSE"\s*:\s*"((?:[^"\\]|\\.)*)"\s*,\s*"(?:ASL_)?GLOSS"\s*:\s*"((?:[^"\\]|\\.)*)"', re.DOTALL)
+GLOSS_RE = re.compile(r"^[A-Z0-9][A-Z0-9 ,'\-]*$")
+NORMALIZE_RE = re.compile(r"[^\w]+")
+
+def load_prompt_template(prompt_file=PROMPT_FILE):
+    """Returns prompt.txt up to and including 'REQUEST:', dropping the sample request after it."""
+    with open(prompt_file, "r", encoding="utf-8") as file:
+        prompt = file.read()
+    marker = prompt.rindex("REQUEST:") + len("REQUEST:")
+    return prompt[:marker] + "\n"
+
+def build_prompt(template, verses):
+    """Appends the verses to the template as the JSON list the prompt expects."""
+    return template + json.dumps(verses, ensure_ascii=False)
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def cache_key(template_hash, verse):
+    """Cache entries are keyed by prompt template and verse text, so editing the prompt invalidates them."""
+    return hashlib.sha256(f"{template_hash}\n{verse}".encode("utf-8")).hexdigest()
+
+def load_gloss_cache(cache_file=GLOSS_CACHE_FILE):
+    if not os.path.exists(cache_file):
+        return {}
+    with open(cache_file, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def save_gloss_cache(cache, cache_file=GLOSS_CACHE_FILE):
+    """
+    Writes the gloss cache, keeping entries saved meanwhile by other runs. The file is replaced
+    whole, so a crash mid-write cannot truncate the translations already paid for.
+    """
+    merged = {**load_gloss_cache(cache_file), **cache}
+    temporary_file = f"{cache_file}.{os.getpid()}.tmp"
+    with open(temporary_file, "w", encoding="utf-8") as file:
+        json.dump(merged, file, indent=4, ensure_ascii=False, sort_keys=True)
+    os.replace(temporary_file, cache_file)
+
+def pack_batches(verses, template, max_prompt_tokens=MAX_PROMPT_TOKENS, max_verses=MAX_VERSES_PER_REQUEST):
+    """Groups verses into requests whose estimated prompt size stays within the token budget."""
+    budget = max_prompt_tokens - estimate_tokens(template)
+    batches = []
+    batch, batch_tokens = [], 0
+    for verse in verses:
+        verse_tokens = estimate_tokens(json.dumps(verse, ensure_ascii=False)) + 1
+        if batch and (batch_tokens + verse_tokens > budget or len(batch) >= max_verses):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(verse)
+        batch_tokens += verse_tokens
+    if batch:
+        batches.append(batch)
+    return batches
+
+def normalize_verse(text):
+    """Lowercased words only, so trailing punctuation the model adds or drops still matches."""
+    return NORMALIZE_RE.sub(" ", text.lower()).strip()
+
+def parse_gloss_response(content, verses):
+    """
+    Parses the VERSE/GLOSS objects from a response and matches them to the requested verses.
+    Returns {verse: gloss} for the verses with a valid gloss; the rest are missing, including any
+    whose strings are not valid JSON (a bad escape or a raw line break).
+    """
+    parsed = []
+    for verse, gloss in RESPONSE_RE.findall(content):
+        try:
+            parsed.append((json.loads(f'"{verse}"'), json.loads(f'"{gloss}"')))
+        except json.JSONDecodeError:
+            continue
+    by_text = {normalize_verse(verse): verse for verse in verses}
+    glosses = {}
+    for position, (verse_text, gloss) in enumerate(parsed):
+        verse = by_text.get(normalize_verse(verse_text))
+        if verse is None and len(parsed) == len(verses):
+            verse = verses[position]  # Same count: trust the order even if the model reworded the verse
+        gloss = gloss.strip().strip("[]").strip()
+        if verse is not None and GLOSS_RE.match(gloss):
+            glosses[verse] = gloss
+    return glosses
+
+class RateLimiter:
+    """Client-side limiter spacing requests evenly to stay under a requests-per-minute quota."""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self.next_time = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            wait = self.next_time - now
+            self.next_time = max(now, self.next_time) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+def request_glosses(client, template, verses, limiter, model=MODEL):
+    """
+    Sends one packed request, backing off exponentially on rate limits, connection problems and
+    server (5xx) errors. Other API errors, or running out of retries, fail the batch: its verses
+    come back missing rather than stopping the run.
+    Returns ({verse: gloss}, attempts made).
+    """
+    prompt = build_prompt(template, verses)
+    delay = BACKOFF_SECONDS
+    for attempt in range(1, MAX_RETRIES + 2):
+        limiter.acquire()
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+            )
+            return parse_gloss_response(completion.choices[0].message.content or "", verses), attempt
+        except (RateLimitError, APIConnectionError, APIStatusError) as err:
+            if isinstance(err, APIStatusError) and not isinstance(err, RateLimitError) and err.status_code < 500:
+                # A request the API rejects (bad request, auth) fails the same way when retried
+                print(f"Failed {len(verses)} verses: {err}")
+                return {}, attempt
+            if attempt > MAX_RETRIES:
+                print(f"Giving up on {len(verses)} verses after {attempt} attempts: {err}")
+                return {}, attempt
+            wait = delay * (1 + random.random() * 0.25)  # Jitter keeps workers from retrying in step
+            print(f"{type(err).__name__}, retrying in {wait:.1f}s")
+            time.sleep(wait)
+            delay *= 2
+
+def translate_verses(verses, client, template=None, cache_file=GLOSS_CACHE_FILE, workers=4,
+                     requests_per_minute=60, max_prompt_tokens=MAX_PROMPT_TOKENS, model=MODEL):
+    """
+    Glosses verses through the chat completions API. Cached verses are not sent again;
+    verses whose response fails validation are retried once on their own.
+    Returns ({verse: gloss}, stats).
+    """
+    template = template or load_prompt_template()
+    template_hash = hashlib.sha256(template.encode("utf-8")).hexdigest()
+    cache = load_gloss_cache(cache_file)
+    cache_lock = threading.Lock()
+    limiter = RateLimiter(requests_per_minute)
+    stats = {"verses": len(verses), "cache_hits": 0, "requests": 0, "retries": 0, "failed": 0}
+
+    results = {}
+    pending = []
+    for verse in dict.fromkeys(verses):  # Each distinct verse is translated once
+        key = cache_key(template_hash, verse)
+        if key in cache:
+            results[verse] = cache[key]
+            stats["cache_hits"] += 1
+        else:
+            pending.append(verse)
+
+    def run(batch):
+        glosses, attempts = request_glosses(client, template, batch, limiter, model)
+        requests = [attempts]
+        if len(batch) > 1:
+            for verse in batch:
+                if verse not in glosses:
+                    retried, attempts = request_glosses(client, template, [verse], limiter, model)
+                    glosses.update(retried)
+                    requests.append(attempts)
+        with cache_lock:
+            stats["requests"] += sum(requests)
+            stats["retries"] += sum(requests) - len(requests)
+            for verse, gloss in glosses.items():
+                cache[cache_key(template_hash, verse)] = gloss
+            save_gloss_cache(cache, cache_file)
+        return glosses
+
+    batches = pack_batches(pending, template, max_prompt_tokens)
+    print(f"{len(verses)} verses: {stats['cache_hits']} cached, {len(pending)} to translate in {len(batches)} requests")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for glosses in executor.map(run, batches):
+            results.update(glosses)
+
+    stats["failed"] = sum(1 for verse in pending if verse not in results)
+    return results, stats
+
+def load_surah_verses(surahs, verses_file=VERSES_FILE):
+    """
+    Returns [(surah, ayah, verse)] for the requested surah numbers, read from the corpus store
+    when it has been imported, otherwise from the verses JSON.
+    """
+    if os.path.exists(STORE_FILE):
+        with closing(open_store()) as connection:
+            return [(surah, ayah, verse)
+                    for surah in surahs
+                    for ayah, verse in enumerate(get_surah_verses(connection, surah), start=1)]
+    with open(verses_file, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    return [(surah, ayah, verse)
+            for surah in surahs
+            for ayah, verse in enumerate(data[str(surah)]["verses"], start=1)]
+
+def main():
+    parser = argparse.ArgumentParser(description="Translate Quran verses to ASL gloss with the prompt.txt format.")
+    parser.add_argument("surahs", nargs="+", type=int, help="Surah numbers to translate")
+    parser.add_argument("--base-url", default=None, help="Chat completions endpoint, e.g. a local mock")
+    parser.add_argument("--mock", action="store_true", help="Start mock_chat_server in-process and use it")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rpm", type=float, default=60, help="Client-side requests per minute")
+    parser.add_argument("--max-prompt-tokens", type=int, default=MAX_PROMPT_TOKENS)
+    parser.add_argument("--granularity", choices=["verse", "clause"], default="verse",
+                        help="Translate whole verses, or each distinct clause once and reassemble")
+    parser.add_argument("--rules-threshold", type=float, default=None,
+                        help="Gloss verses offline with rule_gloss.py and send only those below this confidence to the LLM")
+    parser.add_argument("--cache", default=GLOSS_CACHE_FILE)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    load_dotenv()
+    base_url = args.base_url
+    if args.mock:
+        from mock_chat_server import MockChatState, start_mock_server
+        _, base_url = start_mock_server(MockChatState(latency=0.2, rate_limit_every=7, malformed_every=5))
+        print(f"Using mock chat completions at {base_url}")
+    # Retries are handled here, with backoff shared across workers
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY", "local-mock"), base_url=base_url, max_retries=0)
+
+    surah_verses = load_surah_verses(args.surahs)
+    verses = [verse for _, _, verse in surah_verses]
+    stats = {}
+
+    rule_glosses = {}
+    if args.rules_threshold is not None:
+        from rule_gloss import build_rule_lexicon, gloss_verses
+        trie, lexicon = build_rule_lexicon()
+        rule_glosses = {verse: result["GLOSS"] for verse, result in gloss_verses(verses, trie, lexicon).items()
+                        if result["CONFIDENCE"] >= args.rules_threshold}
+        print(f"Rules glossed {len(rule_glosses)}/{len(set(verses))} distinct verses at or above "
+              f"{args.rules_threshold} confidence")
+
+    def translate_units(units):
+        glosses, unit_stats = translate_verses(units, client, cache_file=args.cache, workers=args.workers,
+                                               requests_per_minute=args.rpm, max_prompt_tokens=args.max_prompt_tokens)
+        stats.update(unit_stats)
+        return glosses
+
+    # Repeated verses and phrases are translated once and reused wherever they appear
+    start = time.perf_counter()
+    llm_verses = [verse for verse in verses if verse not in rule_glosses]
+    glosses, report = memoized_translate(llm_verses, translate_units, args.granularity)
+    elapsed = time.perf_counter() - start
+    print(f"{report['units']} {args.granularity} units, {report['distinct_units']} distinct "
+          f"({report['unit_dedup_ratio']:.1%} deduplicated)")
+
+    output = {}
+    for surah, ayah, verse in surah_verses:
+        source = "rules" if verse in rule_glosses else "llm"
+        output.setdefault(str(surah), {})[str(ayah)] = {"VERSE": verse, "GLOSS": rule_glosses.get(verse, glosses.get(verse)),
+                                                        "SOURCE": source}
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(output, file, indent=4, ensure_ascii=False)
+
+    print(f"Done in {elapsed:.1f}s: {stats}. Saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
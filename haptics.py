@@ -0,0 +1,234 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import time
+import wave
+import numpy as np
+
+HOP_SECONDS = 0.02  # Analysis frames per second: 50
+WINDOW_SECONDS = 0.064  # Long enough to resolve the pitch of a low voice
+CHUNK_SECONDS = 10.0  # Audio decoded and analysed at a time; memory does not grow with the surah
+DECODE_RATE = 16000  # Sample rate ffmpeg decodes compressed recitations to
+PITCH_RANGE = (70.0, 500.0)  # Hz, the range of a reciting voice
+HARMONICS = 3  # Harmonic product spectrum depth used for the pitch estimate
+PITCH_ZERO_PADDING = 4  # The pitch spectrum is zero-padded to this many times the window, so harmonics land on bins
+SUBOCTAVE_RATIO = 0.2  # An octave below the product peak is taken when its product is at least this share of it
+SILENCE_BELOW_PEAK_DB = 35.0  # Frames this far below the loud frames count as silence
+MIN_PAUSE_SECONDS = 0.25
+LOUDNESS_RANGE_DB = 40.0  # Dynamic range mapped onto vibration intensity
+HAPTIC_STEP_MS = 50  # Resolution of the emitted pattern; phones cannot vibrate much finer
+LEVELS = 16  # Intensity and sharpness levels; equal neighbouring steps are merged
+
+def audio_chunks(audio_file, chunk_seconds=CHUNK_SECONDS):
+    """
+    Opens a recitation for streaming. WAV files are read directly; anything else is decoded by
+    ffmpeg to mono DECODE_RATE PCM through a pipe.
+    Returns (sample rate, iterator of mono float32 chunks).
+    """
+    if audio_file.lower().endswith(".wav"):
+        reader = wave.open(audio_file, "rb")
+        rate, channels, width = reader.getframerate(), reader.getnchannels(), reader.getsampwidth()
+
+        def wav_chunks():
+            with reader:
+                while True:
+                    data = reader.readframes(int(rate * chunk_seconds))
+                    if not data:
+                        return
+                    if width == 3:  # 24-bit: widen to 32-bit
+                        raw = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3)
+                        data = np.pad(raw, ((0, 0), (1, 0))).tobytes()
+                    samples = np.frombuffer(data, dtype={1: np.uint8, 2: np.int16, 3: np.int32, 4: np.int32}[width])
+                    samples = samples.astype(np.float32)
+                    if width == 1:
+                        samples -= 128
+                    samples /= float(1 << (8 * (4 if width == 3 else width) - 1))
+                    yield samples.reshape(-1, channels).mean(axis=1)
+
+        return rate, wav_chunks()
+
+    if not shutil.which("ffmpeg"):
+        raise RuntimeError(f"ffmpeg is needed to decode {audio_file}; convert it to WAV or install ffmpeg")
+
+    def ffmpeg_chunks():
+        process = subprocess.Popen(["ffmpeg", "-loglevel", "error", "-i", audio_file, "-f", "s16le", "-ac", "1",
+                                    "-ar", str(DECODE_RATE), "-"], stdout=subprocess.PIPE)
+        try:
+            while True:
+                data = process.stdout.read(int(DECODE_RATE * chunk_seconds) * 2)
+                if not data:
+                    break
+                yield np.frombuffer(data[:len(data) // 2 * 2], dtype=np.int16).astype(np.float32) / 32768
+        finally:
+            process.stdout.close()
+            process.wait()
+
+    return DECODE_RATE, ffmpeg_chunks()
+
+def analyze_recitation(audio_file, chunk_seconds=CHUNK_SECONDS):
+    """
+    Computes the loudness (dB) and pitch (Hz, NaN when unvoiced or silent) of every HOP_SECONDS frame
+    with a short-time Fourier transform, a chunk of audio at a time; the samples overlapping the next
+    chunk are carried over, so the result is the same as analysing the whole file at once.
+    Returns (loudness, pitch, audio seconds).
+    """
+    rate, chunks = audio_chunks(audio_file, chunk_seconds)
+    hop = int(round(rate * HOP_SECONDS))
+    window_size = 1 << int(np.ceil(np.log2(rate * WINDOW_SECONDS)))
+    window = np.hanning(window_size).astype(np.float32)
+    pitch_size = window_size * PITCH_ZERO_PADDING
+    bin_hz = rate / pitch_size
+    low, high = int(PITCH_RANGE[0] / bin_hz), int(np.ceil(PITCH_RANGE[1] / bin_hz)) + 1
+
+    loudness, pitch = [], []
+    carry = np.zeros(window_size // 2, dtype=np.float32)  # Centres the first frame on the first sample
+    total_samples = 0
+
+    def analyse(buffer):
+        count = (len(buffer) - window_size) // hop + 1
+        if count <= 0:
+            return buffer
+        frames = np.lib.stride_tricks.sliding_window_view(buffer, window_size)[::hop][:count] * window
+        magnitude = np.abs(np.fft.rfft(frames, axis=1))
+        power = magnitude ** 2
+        loudness.append(10 * np.log10(power.mean(axis=1) / window_size + 1e-12))
+        # Harmonic product spectrum: the fundamental lines up with its harmonics. On the window's own
+        # bins a harmonic can fall between two of them and the octave above wins, so pad first
+        fine = np.abs(np.fft.rfft(frames, n=pitch_size, axis=1))
+        product = fine[:, :high].copy()
+        for harmonic in range(2, HARMONICS + 1):
+            product *= fine[:, ::harmonic][:, :high]
+        peak = np.argmax(product[:, low:high], axis=1) + low
+        rows = np.arange(count)
+        # The usual sub-octave check: the fundamental's product can lose narrowly to its octave's
+        below = peak // 2
+        lower = (below >= low) & (product[rows, below] >= SUBOCTAVE_RATIO * product[rows, peak])
+        peak = np.where(lower, below, peak)
+        # Parabolic interpolation around the peak bin for sub-bin accuracy
+        left, centre, right = (np.log(product[rows, np.clip(peak + offset, 0, high - 1)] + 1e-20) for offset in (-1, 0, 1))
+        denominator = left - 2 * centre + right
+        shift = np.where(denominator < 0, 0.5 * (left - right) / np.where(denominator < 0, denominator, -1), 0.0)
+        pitch.append((peak + np.clip(shift, -0.5, 0.5)) * bin_hz)
+        return buffer[count * hop:]
+
+    for chunk in chunks:
+        total_samples += len(chunk)
+        carry = analyse(np.concatenate((carry, chunk)))
+    # Flush: frames centred on the last samples see zeros past the end
+    expected = total_samples // hop + 1
+    done = sum(map(len, loudness))
+    if done < expected:
+        analyse(np.concatenate((carry, np.zeros(window_size + hop * (expected - done), dtype=np.float32))))
+
+    loudness = np.concatenate(loudness)[:expected] if loudness else np.empty(0)
+    pitch = np.concatenate(pitch)[:expected] if pitch else np.empty(0)
+    pitch[loudness < silence_threshold(loudness)] = np.nan
+    return loudness, pitch, total_samples / rate
+
+def silence_threshold(loudness):
+    return (np.percentile(loudness, 95) if len(loudness) else 0.0) - SILENCE_BELOW_PEAK_DB
+
+def find_ayah_spans(loudness, ayah_count, weights=None):
+    """
+    Splits a recitation into ayahs at its ayah_count - 1 longest pauses, as reciters stop between
+    ayahs. Leading and trailing silence are left out. When there are too few pauses, the recited
+    time is divided in proportion to weights (e.g. the video durations of the ayahs).
+    Returns [(start seconds, end seconds)] per ayah.
+    """
+    voiced = np.flatnonzero(loudness >= silence_threshold(loudness))
+    if not len(voiced):
+        return [(0.0, 0.0)] * ayah_count
+    first, last = voiced[0], voiced[-1] + 1
+    silent = np.concatenate(([False], loudness[first:last] < silence_threshold(loudness), [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(silent))
+    pause_starts, pause_ends = edges[::2] + first, edges[1::2] + first
+    lengths = pause_ends - pause_starts
+    keep = lengths * HOP_SECONDS >= MIN_PAUSE_SECONDS
+    pause_starts, pause_ends, lengths = pause_starts[keep], pause_ends[keep], lengths[keep]
+
+    if len(lengths) >= ayah_count - 1:
+        longest = np.sort(np.argsort(-lengths, kind="stable")[:ayah_count - 1])
+        starts = [first] + list(pause_ends[longest])
+        ends = list(pause_starts[longest]) + [last]
+    else:
+        print(f"Found {len(lengths)} pauses for {ayah_count} ayahs; dividing the recitation proportionally")
+        weights = np.asarray(weights if weights is not None else [1.0] * ayah_count, dtype=np.float64)
+        bounds = first + np.concatenate(([0], np.cumsum(weights) / weights.sum())) * (last - first)
+        starts, ends = bounds[:-1], bounds[1:]
+    return [(float(start) * HOP_SECONDS, float(end) * HOP_SECONDS) for start, end in zip(starts, ends)]
+
+def quantize(values):
+    return np.clip(np.round(values * (LEVELS - 1)), 0, LEVELS - 1).astype(np.int64) * 255 // (LEVELS - 1)
+
+def ayah_pattern(loudness, pitch, audio_span, video_span):
+    """
+    Stretches an ayah's recitation envelope onto its span in the video, in HAPTIC_STEP_MS steps.
+    Intensity follows loudness and sharpness follows pitch (0 while unvoiced); equal consecutive
+    steps are merged. Returns {"timings": [ms], "intensity": [0-255], "sharpness": [0-255]}.
+    """
+    steps = max(1, int(round((video_span[1] - video_span[0]) * 1000 / HAPTIC_STEP_MS)))
+    audio_times = audio_span[0] + (np.arange(steps) + 0.5) / steps * (audio_span[1] - audio_span[0])
+    frames = np.clip((audio_times / HOP_SECONDS).astype(np.int64), 0, max(len(loudness) - 1, 0))
+    peak = np.percentile(loudness, 95) if len(loudness) else 0.0
+    intensity = quantize((loudness[frames] - (peak - LOUDNESS_RANGE_DB)) / LOUDNESS_RANGE_DB)
+    log_pitch = (np.log(pitch[frames]) - np.log(PITCH_RANGE[0])) / (np.log(PITCH_RANGE[1]) - np.log(PITCH_RANGE[0]))
+    sharpness = np.where(np.isnan(log_pitch), 0, quantize(np.nan_to_num(log_pitch)))
+
+    changes = np.flatnonzero((np.diff(intensity) != 0) | (np.diff(sharpness) != 0)) + 1
+    starts = np.concatenate(([0], changes))
+    durations = np.diff(np.concatenate((starts, [steps]))) * HAPTIC_STEP_MS
+    return {"timings": durations.tolist(), "intensity": intensity[starts].tolist(), "sharpness": sharpness[starts].tolist()}
+
+def build_haptics(audio_file, timeline, ayah_times=None):
+    """
+    Builds the haptic pattern of a surah video from its recitation: one waveform per ayah of the
+    timeline, covering that ayah's span in the video. ayah_times optionally gives the recitation's
+    own [start, end] seconds per ayah instead of finding them from pauses.
+    """
+    start = time.perf_counter()
+    loudness, pitch, seconds = analyze_recitation(audio_file)
+    analysis_seconds = time.perf_counter() - start
+    ayahs = timeline["ayahs"]
+    if ayah_times:
+        audio_spans = [tuple(ayah_times[str(ayah["ayah"])]) for ayah in ayahs]
+    else:
+        audio_spans = find_ayah_spans(loudness, len(ayahs), [ayah["end"] - ayah["start"] for ayah in ayahs])
+    return {
+        "surah": timeline.get("surah"),
+        "audio": os.path.basename(audio_file),
+        "audio_seconds": round(seconds, 3),
+        "analysis_seconds": round(analysis_seconds, 3),
+        "step_ms": HAPTIC_STEP_MS,
+        "ayahs": [{"ayah": ayah["ayah"], "start": ayah["start"], "end": ayah["end"],
+                   "audio_start": round(audio_span[0], 3), "audio_end": round(audio_span[1], 3),
+                   **ayah_pattern(loudness, pitch, audio_span, (ayah["start"], ayah["end"]))}
+                  for ayah, audio_span in zip(ayahs, audio_spans)],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a vibration pattern synced to a surah's recitation.")
+    parser.add_argument("audio_file", help="Recitation of the surah (WAV, or any format ffmpeg decodes)")
+    parser.add_argument("timeline_file", help="*.timeline.json written by the compositor for the surah video")
+    parser.add_argument("--ayah-times", default=None, help="JSON of {ayah: [start, end]} seconds in the recitation")
+    parser.add_argument("--output", default=None, help="Default: <video>.haptics.json next to the timeline")
+    args = parser.parse_args()
+
+    with open(args.timeline_file, "r", encoding="utf-8") as file:
+        timeline = json.load(file)
+    ayah_times = None
+    if args.ayah_times:
+        with open(args.ayah_times, "r", encoding="utf-8") as file:
+            ayah_times = json.load(file)
+    haptics = build_haptics(args.audio_file, timeline, ayah_times)
+    output = args.output or args.timeline_file.replace(".timeline.json", "") + ".haptics.json"
+    with open(output, "w", encoding="utf-8") as file:
+        json.dump(haptics, file, separators=(",", ":"))
+    steps = sum(len(ayah["timings"]) for ayah in haptics["ayahs"])
+    print(f"Analysed {haptics['audio_seconds']:.0f}s of recitation in {haptics['analysis_seconds']:.2f}s "
+          f"({haptics['audio_seconds'] / max(haptics['analysis_seconds'], 1e-9):.0f}x real time); "
+          f"{steps} pattern steps for {len(haptics['ayahs'])} ayahs saved as {output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import os
+import re
+
+ISLAM_VIDS_FOLDER = "islam_vids"
+WLASL_CLASS_LIST = "datasets/wlasl_class_list.txt"
+WLASL_VIDEOS_FOLDER = "wlasl_videos"  # One sub-folder of clips per WLASL gloss
+VIDEO_EXTENSIONS = (".mov", ".mp4", ".webm", ".mkv")
+
+# Other spellings and English renderings of the Islamic signs in islam_vids/
+SIGN_ALIASES = {
+    "alhamdulilah": ["alhamdulillah", "al-hamdulillah", "all praise is for allah", "praise be to allah",
+                     "all praises and thanks", "all praises and thanks be to allah"],
+    "assalamwaalaykum": ["assalamu alaykum", "as-salamu alaykum", "assalamualaikum", "peace be upon you"],
+    "bismillah": ["in the name of allah", "bismillahir rahmanir raheem"],
+    "dawah": ["da'wah", "dawa"],
+    "deen": ["din", "religion"],
+    "dua": ["duaa", "supplication"],
+    "dunya": ["worldly life"],
+    "fasting": ["sawm", "siyam"],
+    "hadith": ["hadeeth", "ahadith"],
+    "halal": ["lawful"],
+    "haram": ["unlawful"],
+    "hellfire": ["hell", "hell-fire", "jahannam"],
+    "inshaallah": ["insha allah", "in sha allah", "if allah wills"],
+    "mashallah": ["masha allah", "ma sha allah"],
+    "masjid": ["mosque", "mosques"],
+    "muslim": ["muslims"],
+    "paradise": ["jannah"],
+    "prayer": ["prayers", "salah", "salat"],
+    "quran": ["qur'an", "koran"],
+    "sadaqah": ["sadaqa", "charity"],
+    "shahadah": ["shahada"],
+    "subhanallah": ["subhan allah", "glory be to allah", "exalted is allah"],
+    "surah": ["sura", "surat"],
+    "waalayakumassalam": ["wa alaykum assalam", "walaikum assalam"],
+}
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_word(word):
+    """Case-folds a word or phrase and collapses apostrophes and whitespace."""
+    word = word.casefold().replace("'", "").replace("’", "")
+    return WHITESPACE_RE.sub(" ", word).strip(" .,;:!?\"")
+
+def list_videos(folder):
+    """Returns the sorted video files directly inside a folder."""
+    if not os.path.isdir(folder):
+        return []
+    return sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(VIDEO_EXTENSIONS)
+    )
+
+def load_wlasl_classes(class_list_file=WLASL_CLASS_LIST):
+    """Loads the WLASL gloss names from the tab-separated class list."""
+    if not os.path.exists(class_list_file):
+        return []
+    with open(class_list_file, "r", encoding="utf-8") as file:
+        return [line.split(maxsplit=1)[1].strip() for line in file if line.strip()]
+
+def build_local_index(islam_folder=ISLAM_VIDS_FOLDER, class_list_file=WLASL_CLASS_LIST,
+                      wlasl_folder=WLASL_VIDEOS_FOLDER):
+    """
+    Builds an in-memory index of signs that are available on disk.
+    Returns {"exact": {...}, "casefold": {...}, "alias": {...}} where every entry maps a
+    key to {"gloss", "source", "path"}. WLASL classes are only indexed when a clip for
+    the gloss exists under wlasl_folder/<gloss>/.
+    """
+    index = {"exact": {}, "casefold": {}, "alias": {}}
+
+    def add(key, entry):
+        index["exact"].setdefault(key, entry)
+        index["casefold"].setdefault(normalize_word(key), entry)
+
+    for video_path in list_videos(islam_folder):
+        stem = os.path.splitext(os.path.basename(video_path))[0]
+        entry = {"gloss": stem.upper(), "source": "islam_vids", "path": video_path}
+        add(stem, entry)
+        for alias in SIGN_ALIASES.get(normalize_word(stem), []):
+            index["alias"].setdefault(normalize_word(alias), entry)
+
+    for gloss in load_wlasl_classes(class_list_file):
+        clips = list_videos(os.path.join(wlasl_folder, gloss))
+        if clips:
+            add(gloss, {"gloss": gloss.upper(), "source": "wlasl", "path": clips[0]})
+
+    return index
+
+def lookup_local_sign(word, local_index):
+    """Looks a word up by exact, case-folded and alias match. Returns (entry, match) or (None, None)."""
+    if word in local_index["exact"]:
+        return local_index["exact"][word], "exact"
+    key = normalize_word(word)
+    if key in local_index["casefold"]:
+        return local_index["casefold"][key], "casefold"
+    if key in local_index["alias"]:
+        return local_index["alias"][key], "alias"
+    return None, None
+
+if __name__ == "__main__":
+    local_index = build_local_index()
+    print(f"{len(local_index['exact'])} local signs, {len(local_index['alias'])} aliases")
+    for word in ["Allah", "prayers", "Qur'an", "name"]:
+        entry, match = lookup_local_sign(word, local_index)
+        print(f"{word}: {entry['path'] if entry else None} ({match})")
@@ -0,0 +1,105 @@
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from phrase_segmenter import STOP_WORDS
+from tokenizer import clean_and_split
+
+class MockChatState:
+    """Behaviour settings and counters shared by the handler threads."""
+
+    def __init__(self, latency=0.0, rate_limit_every=0, malformed_every=0):
+        self.latency = latency
+        self.rate_limit_every = rate_limit_every  # Answer every Nth request with 429 (0 = never)
+        self.malformed_every = malformed_every  # Drop the GLOSS of one verse in every Nth response
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def next_request(self):
+        with self.lock:
+            self.requests += 1
+            return self.requests
+
+def mock_gloss(verse):
+    """A stand-in gloss: the verse's content words in capitals."""
+    words = [word.upper() for word in clean_and_split(verse) if word not in STOP_WORDS]
+    return ", ".join(words) or "UNKNOWN"
+
+def mock_completion(prompt, malformed=False):
+    """Answers a prompt.txt-style request in the VERSE/GLOSS format."""
+    verses = json.loads(prompt[prompt.rindex("REQUEST:") + len("REQUEST:"):])
+    objects = []
+    for position, verse in enumerate(verses):
+        gloss = "" if malformed and position == 0 else mock_gloss(verse)
+        objects.append("{\n" + f'  "VERSE": {json.dumps(verse, ensure_ascii=False)},\n'
+                       f'  "GLOSS": {json.dumps(gloss)},\n' + "}")
+    return ",\n".join(objects)
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    """Implements POST /v1/chat/completions with OpenAI-shaped responses and errors."""
+
+    state = None
+
+    def do_POST(self):
+        if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+            return self.send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        number = self.state.next_request()
+        time.sleep(self.state.latency)
+
+        if self.state.rate_limit_every and number % self.state.rate_limit_every == 0:
+            return self.send_json(429, {"error": {"message": "Rate limit reached", "type": "requests",
+                                                  "code": "rate_limit_exceeded"}})
+
+        prompt = body["messages"][-1]["content"]
+        malformed = bool(self.state.malformed_every) and number % self.state.malformed_every == 0
+        content = mock_completion(prompt, malformed)
+        self.send_json(200, {
+            "id": f"chatcmpl-mock-{number}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        })
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_mock_server(state, host="127.0.0.1", port=0):
+    """Starts the mock on a background thread. Returns (server, base_url) for OpenAI(base_url=...)."""
+    handler = type("BoundMockChatHandler", (MockChatHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the chat completions endpoint for gloss_pipeline.py.")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--rate-limit-every", type=int, default=0, help="Answer every Nth request with 429")
+    parser.add_argument("--malformed-every", type=int, default=0, help="Break one gloss in every Nth response")
+    args = parser.parse_args()
+
+    server, base_url = start_mock_server(MockChatState(args.latency, args.rate_limit_every, args.malformed_every),
+                                         port=args.port)
+    print(f"Mock chat completions at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
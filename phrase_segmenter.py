@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import time
+from local_signs import SIGN_ALIASES, build_local_index, load_wlasl_classes
+from tokenizer import clean_and_split, stream_corpus, tokenize_texts
+
+SCRAPE_CACHE_FILE = "datasets/scrape_cache.json"
+CORPUS_FILE = "datasets/en-qurancom.json"
+END = ""  # Trie key holding the gloss of the words leading to it; never a real word
+
+# Articles, prepositions and auxiliaries that ASL does not sign on their own
+STOP_WORDS = {
+    "a", "an", "the", "of", "to", "in", "on", "at", "by", "for", "from", "with", "into", "upon", "unto",
+    "is", "are", "was", "were", "be", "been", "being", "am", "do", "does", "did", "shall", "will",
+}
+
+# Divine attributes the translation renders as "the Most <attribute>": one sign for the attribute, not MOST plus it
+DIVINE_ATTRIBUTES = [
+    "merciful", "gracious", "knowing", "high", "great", "forbearing", "kind", "appreciative",
+    "forgiving", "loving", "just", "wise", "generous", "honorable",
+]
+SIGN_PHRASES = {f"most {attribute}": attribute.upper() for attribute in DIVINE_ATTRIBUTES}
+
+# Segment costs for the dynamic-programming segmentation
+SIGN_COST = 1
+DROPPED_COST = 0
+UNKNOWN_COST = 3
+
+def load_sign_glosses(cache_file=SCRAPE_CACHE_FILE, local_index=None):
+    """
+    Collects every known sign gloss: islam_vids/ signs and aliases, WLASL classes, scraped hits
+    and the named phrases in SIGN_PHRASES.
+    """
+    glosses = dict(SIGN_PHRASES)
+    local_index = local_index or build_local_index()
+    for entry in local_index["exact"].values():
+        glosses.setdefault(entry["gloss"].lower(), entry["gloss"])
+    for stem, aliases in SIGN_ALIASES.items():
+        for alias in aliases:
+            glosses.setdefault(alias, stem.upper())
+    for gloss in load_wlasl_classes():
+        glosses.setdefault(gloss, gloss.upper())
+    scrape_cache = {}
+    if os.path.exists(cache_file):
+        with open(cache_file, "r", encoding="utf-8") as f:
+            scrape_cache = json.load(f)
+    for url, video_url in scrape_cache.items():
+        if video_url and "/sign/" in url:
+            word = url.rsplit("/sign/", 1)[1].replace("-", " ")
+            glosses.setdefault(word, word.upper())
+    return glosses
+
+def build_sign_trie(glosses):
+    """Builds a word-level trie from {phrase: gloss}; phrases are tokenized like the corpus."""
+    trie = {}
+    for phrase, gloss in glosses.items():
+        words = clean_and_split(phrase)
+        if not words:
+            continue
+        node = trie
+        for word in words:
+            node = node.setdefault(word, {})
+        node.setdefault(END, gloss)
+    return trie
+
+def matches_at(words, start, trie):
+    """Yields (end, gloss) for every lexicon entry that matches words[start:end]."""
+    node = trie
+    for end in range(start, len(words)):
+        node = node.get(words[end])
+        if node is None:
+            return
+        if END in node:
+            yield end + 1, node[END]
+
+def segment_greedy(words, trie, stop_words=STOP_WORDS):
+    """Segments words by taking the longest lexicon match at each position."""
+    segments = []
+    start = 0
+    while start < len(words):
+        longest = None
+        for end, gloss in matches_at(words, start, trie):
+            longest = (end, gloss)
+        word = words[start]
+        if longest and (longest[0] - start > 1 or word not in stop_words):
+            end, gloss = longest
+            segments.append({"kind": "sign", "gloss": gloss, "words": words[start:end]})
+            start = end
+            continue
+        kind = "dropped" if word in stop_words else "unknown"
+        segments.append({"kind": kind, "gloss": None, "words": [word]})
+        start += 1
+    return segments
+
+def segment_dp(words, trie, stop_words=STOP_WORDS):
+    """
+    Segments words with the lowest total cost: signs cost SIGN_COST, dropped stop words
+    DROPPED_COST and unknown words UNKNOWN_COST, so fewer, longer signs win.
+    """
+    count = len(words)
+    best = [(0, None, None, None)] + [None] * count  # best[i] = (cost, start, kind, gloss) for words[:i]
+    for start in range(count):
+        cost = best[start][0]
+        word = words[start]
+        stop_word = word in stop_words
+        single_word_sign = False
+        for end, gloss in matches_at(words, start, trie):
+            if end == start + 1:
+                if stop_word:
+                    continue  # Function words are only signed inside a longer match
+                single_word_sign = True
+            if best[end] is None or cost + SIGN_COST < best[end][0]:
+                best[end] = (cost + SIGN_COST, start, "sign", gloss)
+        if not single_word_sign:
+            kind, kind_cost = ("dropped", DROPPED_COST) if stop_word else ("unknown", UNKNOWN_COST)
+            if best[start + 1] is None or cost + kind_cost < best[start + 1][0]:
+                best[start + 1] = (cost + kind_cost, start, kind, None)
+
+    segments = []
+    end = count
+    while end > 0:
+        _, start, kind, gloss = best[end]
+        segments.append({"kind": kind, "gloss": gloss, "words": words[start:end]})
+        end = start
+    return segments[::-1]
+
+SEGMENTERS = {
+    "greedy": segment_greedy,
+    "dp": segment_dp,
+}
+
+def segment_phrase(phrase, trie, method="dp", stop_words=STOP_WORDS):
+    """Splits one phrase into sign, dropped and unknown segments."""
+    return SEGMENTERS[method](clean_and_split(phrase), trie, stop_words)
+
+def segment_corpus(texts, trie, method="dp", stop_words=STOP_WORDS):
+    """
+    Segments many phrases, tokenizing them in one pass. Phrases recur a lot in the
+    corpus, so each distinct word sequence is segmented once and its segment list shared.
+    """
+    segment = SEGMENTERS[method]
+    segmented = {}
+    results = []
+    for words in tokenize_texts(texts):
+        key = tuple(words)
+        if key not in segmented:
+            segmented[key] = segment(words, trie, stop_words)
+        results.append(segmented[key])
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Segment phrases into known signs by longest match.")
+    parser.add_argument("phrases", nargs="*", help="Phrases to segment (default: the whole corpus)")
+    parser.add_argument("--method", choices=sorted(SEGMENTERS), default="dp")
+    parser.add_argument("--corpus", default=CORPUS_FILE)
+    args = parser.parse_args()
+
+    trie = build_sign_trie(load_sign_glosses())
+    if args.phrases:
+        for phrase in args.phrases:
+            segments = segment_phrase(phrase, trie, args.method)
+            print(f"{phrase}: " + " | ".join(
+                segment["gloss"] if segment["kind"] == "sign" else f"({segment['kind']}: {segment['words'][0]})"
+                for segment in segments))
+        return
+
+    texts = [text for _, text in stream_corpus(args.corpus)]
+    start = time.perf_counter()
+    segmented = segment_corpus(texts, trie, args.method)
+    elapsed = time.perf_counter() - start
+    kinds = {"sign": 0, "dropped": 0, "unknown": 0}
+    for segments in segmented:
+        for segment in segments:
+            kinds[segment["kind"]] += 1
+    print(f"Segmented {len(texts)} phrases in {elapsed * 1000:.0f} ms ({args.method}): {kinds}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,245 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+STATE_FILE = "datasets/pipeline_state.json"
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Where the local sign index and load_sign_glosses look for signs (see local_signs.py, phrase_segmenter.py)
+SIGN_SOURCES = ["local_signs.py", "islam_vids", "wlasl_videos", "datasets/wlasl_class_list.txt",
+                "datasets/scrape_cache.json"]
+# The compositor and every module it imports, with the folders its phrase JSON points into
+RENDER_SOURCES = ["extract/interpolate_extract.py", "extract/batch_render.py", "extract/job_manifest.py",
+                  "extract/landmark_store.py", "extract/renditions.py", "extract/time_warp.py",
+                  "extract/timeline.py", "extract/variant_selection.py", "extract/video_encoder.py",
+                  "videos", "islam_vids", "wlasl_videos"]
+LANDMARK_STORE = "datasets/wlasl_landmarks.sqlite"  # Stored sign variants the render picks from (extract/ingest_wlasl.py)
+
+# Each stage declares everything it reads (scripts and the modules they import included, so code
+# changes count) and writes. Stages are ordered by their inputs and outputs; stages with no path
+# between them run in parallel.
+STAGES = [
+    {"name": "extract_verses", "command": ["download_quran.py"],
+     "inputs": ["download_quran.py", "datasets/api-alquran-cloud-en.json"],
+     "outputs": ["datasets/quran_verses.json"]},
+    {"name": "corpus_store", "command": ["corpus_store.py", "--import"],
+     "inputs": ["corpus_store.py", "datasets/toc.csv", "datasets/api-alquran-cloud-en.json",
+                "datasets/api-alquran-cloud-ar.json", "datasets/en-qurancom.json"],
+     "outputs": ["datasets/quran_corpus.sqlite"]},
+    {"name": "unique_words", "command": ["unique_words.py"],
+     "inputs": ["unique_words.py", "tokenizer.py", "datasets/quran_verses.json"],
+     "outputs": ["datasets/unique_words2.json"]},
+    {"name": "quran_index", "command": ["quran_index.py", "--build"],
+     "inputs": ["quran_index.py", "tokenizer.py", "datasets/quran_verses.json"],
+     "outputs": ["datasets/quran_index.bin"]},
+    {"name": "find_missing", "command": ["find_missing.py"],
+     "inputs": ["find_missing.py", "tokenizer.py", "fuzzy_match.py", "phrase_segmenter.py",
+                "datasets/quran_verses.json"] + SIGN_SOURCES,
+     "outputs": ["datasets/missing.json", "datasets/missing_suggestions.json"]},
+    {"name": "rule_gloss", "command": ["rule_gloss.py"],
+     "inputs": ["rule_gloss.py", "tokenizer.py", "gloss_memo.py", "fuzzy_match.py", "phrase_segmenter.py",
+                "prompt.txt", "datasets/quran_verses.json"] + SIGN_SOURCES,
+     "outputs": ["asl_gloss_rules.json"]},
+    # The scrape cache is read and rewritten by the scraper itself, so it cannot be an input here:
+    # editing or deleting it by hand does not make this stage stale (use --force asl_scraper)
+    {"name": "asl_scraper", "command": ["asl_scraper.py"],
+     "inputs": ["asl_scraper.py", "signasl_pages.py", "phrase_segmenter.py", "tokenizer.py", "extract/job_manifest.py"]
+               + [path for path in SIGN_SOURCES if path != "datasets/scrape_cache.json"],
+     "outputs": ["surah_fatihah_asl.json"]},
+    {"name": "render", "command": ["extract/interpolate_extract.py", "surah_fatihah_asl.json", "--surah", "1",
+                                   "--variants", LANDMARK_STORE, "--normalize"],
+     "inputs": RENDER_SOURCES + ["surah_fatihah_asl.json", LANDMARK_STORE],
+     "outputs": ["outputs/blended_asl_animation.mp4", "outputs/blended_asl_animation.timeline.json"]},
+    # Captions only depend on the timeline and the text, so a translation edit never re-renders video
+    {"name": "captions", "command": ["captions.py", "outputs/blended_asl_animation.timeline.json"],
+     "inputs": ["captions.py", "corpus_store.py", "tokenizer.py", "datasets/quran_corpus.sqlite",
+                "datasets/quran_verses.json", "outputs/blended_asl_animation.timeline.json"],
+     "outputs": [f"outputs/blended_asl_animation.{language}.{kind}" for language in ("en", "ar")
+                 for kind in ("vtt", "words.vtt", "ttml")]},
+]
+
+def load_state(state_file=STATE_FILE):
+    if not os.path.exists(state_file):
+        return {"files": {}, "stages": {}}
+    with open(state_file, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+def save_state(state, state_file=STATE_FILE):
+    with open(state_file, "w", encoding="utf-8") as file:
+        json.dump(state, file, indent=4, sort_keys=True)
+
+class Fingerprints:
+    """
+    Content hashes of files and folders. A file is only rehashed when its size or modification
+    time changed since the last run, so checking an unchanged tree reads no file contents.
+    """
+
+    def __init__(self, known):
+        self.known = known  # path -> [size, mtime_ns, sha256], persisted in the state file
+        self.lock = threading.Lock()
+
+    def file(self, path):
+        stat = os.stat(path)
+        with self.lock:
+            entry = self.known.get(path)
+        if entry and entry[0] == stat.st_size and entry[1] == stat.st_mtime_ns:
+            return entry[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1 << 20), b""):
+                digest.update(chunk)
+        with self.lock:
+            self.known[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def path(self, path):
+        """Hashes a file, every file under a folder, or records that the path is missing."""
+        if os.path.isdir(path):
+            digest = hashlib.sha256()
+            for folder, subfolders, files in os.walk(path):
+                subfolders.sort()
+                for name in sorted(files):
+                    file_path = os.path.join(folder, name)
+                    digest.update(f"{os.path.relpath(file_path, path)}\0{self.file(file_path)}\n".encode("utf-8"))
+            return digest.hexdigest()
+        if os.path.exists(path):
+            return self.file(path)
+        return "missing"
+
+def input_fingerprint(stage, fingerprints):
+    """One hash over the stage's command and the content of all of its inputs."""
+    digest = hashlib.sha256(json.dumps(stage["command"]).encode("utf-8"))
+    for path in sorted(stage["inputs"]):
+        digest.update(f"{path}\0{fingerprints.path(path)}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+def stale_reason(stage, record, inputs_hash, fingerprints):
+    """Returns why a stage must run, or None if its recorded outputs are still current."""
+    if record is None:
+        return "never run"
+    if record["inputs"] != inputs_hash:
+        return "inputs changed"
+    for path in stage["outputs"]:
+        if fingerprints.path(path) != record["outputs"].get(path):
+            return f"{path} missing or modified"
+    return None
+
+def stage_graph(stages):
+    """Maps each stage to the stages producing its inputs."""
+    producers = {path: stage["name"] for stage in stages for path in stage["outputs"]}
+    return {stage["name"]: {producers[path] for path in stage["inputs"] if path in producers} - {stage["name"]}
+            for stage in stages}
+
+def select_stages(stages, targets):
+    """The target stages and everything upstream of them (all stages if no targets)."""
+    if not targets:
+        return stages
+    upstream = stage_graph(stages)
+    unknown = set(targets) - set(upstream)
+    if unknown:
+        raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+    selected, frontier = set(), list(targets)
+    while frontier:
+        name = frontier.pop()
+        if name not in selected:
+            selected.add(name)
+            frontier += upstream[name]
+    return [stage for stage in stages if stage["name"] in selected]
+
+def run_stage(stage):
+    """Runs a stage's script from the repository root. Returns (ok, seconds, output)."""
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable] + stage["command"], cwd=REPO_ROOT,
+                             capture_output=True, text=True)
+    return process.returncode == 0, time.perf_counter() - start, process.stdout + process.stderr
+
+def run_pipeline(stages=STAGES, targets=(), workers=4, force=(), dry_run=False, state_file=STATE_FILE):
+    """
+    Runs the stale stages, each as soon as the stages it depends on have finished.
+    A stage is stale when the hash of its command and inputs differs from its last successful run,
+    or an output is missing or was edited. A rerun stage whose outputs come out identical does not
+    make its dependents stale (early cutoff).
+    Returns {stage: {"status", "reason", "seconds"}}.
+    """
+    stages = select_stages(stages, targets)
+    upstream = stage_graph(stages)
+    state = load_state(state_file)
+    fingerprints = Fingerprints(state["files"])
+    report = {}
+    failed = set()
+    stale = set()  # Dry run: stages that would run, so their dependents would too (unless cut off early)
+
+    def check_and_run(stage):
+        name = stage["name"]
+        if upstream[name] & failed:
+            return name, {"status": "skipped", "reason": "upstream failed", "seconds": 0.0}
+        inputs_hash = input_fingerprint(stage, fingerprints)
+        reason = "forced" if name in force else stale_reason(stage, state["stages"].get(name), inputs_hash, fingerprints)
+        if reason is None and dry_run and upstream[name] & stale:
+            reason = "upstream stale"
+        if reason is None:
+            return name, {"status": "up to date", "reason": None, "seconds": 0.0}
+        if dry_run:
+            return name, {"status": "would run", "reason": reason, "seconds": 0.0}
+        print(f"[{name}] running ({reason})")
+        ok, seconds, output = run_stage(stage)
+        if not ok:
+            print(f"[{name}] failed after {seconds:.1f}s:\n" + "\n".join(output.strip().splitlines()[-15:]))
+            return name, {"status": "failed", "reason": reason, "seconds": seconds}
+        state["stages"][name] = {"inputs": inputs_hash, "seconds": seconds, "ran_at": time.time(),
+                                 "outputs": {path: fingerprints.path(path) for path in stage["outputs"]}}
+        print(f"[{name}] done in {seconds:.1f}s")
+        return name, {"status": "ran", "reason": reason, "seconds": seconds}
+
+    pending = {stage["name"]: stage for stage in stages}
+    running = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            finished = set(report)
+            for name in [name for name in pending if upstream[name] <= finished]:
+                running[executor.submit(check_and_run, pending.pop(name))] = name
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                name, result = future.result()
+                report[name] = result
+                if result["status"] in ("failed", "skipped"):
+                    failed.add(name)
+                elif result["status"] == "would run":
+                    stale.add(name)
+
+    if not dry_run:
+        save_state(state, state_file)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the data pipeline, redoing only stages whose inputs changed.")
+    parser.add_argument("targets", nargs="*", help="Stages to bring up to date, with their upstream stages (default: all)")
+    parser.add_argument("--workers", type=int, default=4, help="Stages run at the same time")
+    parser.add_argument("--force", action="append", default=[], help="Rerun a stage even if it is up to date")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages are stale or downstream of one")
+    parser.add_argument("--list", action="store_true", help="List the stages and their dependencies")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, dependencies in stage_graph(STAGES).items():
+            print(f"{name} <- {', '.join(sorted(dependencies)) or '(sources only)'}")
+        return
+
+    start = time.perf_counter()
+    report = run_pipeline(targets=args.targets, workers=args.workers, force=set(args.force), dry_run=args.dry_run)
+    for name, result in report.items():
+        reason = f" ({result['reason']})" if result["reason"] else ""
+        print(f"{name:16s} {result['status']:10s} {result['seconds']:7.2f}s{reason}")
+    print(f"Pipeline finished in {time.perf_counter() - start:.2f}s")
+    if any(result["status"] == "failed" for result in report.values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
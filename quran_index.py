@@ -0,0 +1,120 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+from array import array
+from tokenizer import clean_and_split, stream_corpus, tokenize_texts
+
+VERSES_FILE = "datasets/quran_verses.json"
+INDEX_FILE = "datasets/quran_index.bin"
+INDEX_MAGIC = b"QIDX1\n"
+MAX_NGRAM = 2  # Longer phrases are answered by joining these postings on position
+
+def build_index(corpus_file=VERSES_FILE, index_file=INDEX_FILE, max_ngram=MAX_NGRAM):
+    """
+    Builds an inverted index from normalized words and n-grams to (surah, ayah, position).
+    Only quran_verses.json has ayah boundaries; en-qurancom.json is keyed by word id.
+
+    File layout: magic, uint32 header length, JSON header {term: [offset, count]}, then
+    every posting list as consecutive uint16 (surah, ayah, position) triples.
+    """
+    keys, texts = zip(*stream_corpus(corpus_file))
+    if len(keys[0]) != 2:
+        raise ValueError(f"{corpus_file} has no surah/ayah structure, use {VERSES_FILE}")
+
+    postings = {}
+    for (surah, ayah), words in zip(keys, tokenize_texts(texts)):
+        for n in range(1, max_ngram + 1):
+            for position in range(len(words) - n + 1):
+                term = " ".join(words[position:position + n])
+                postings.setdefault(term, []).extend((surah, ayah, position))
+
+    terms = {}
+    blob = array("H")
+    for term in sorted(postings):
+        terms[term] = [len(blob) * blob.itemsize, len(postings[term]) // 3]
+        blob.extend(postings[term])
+
+    header = json.dumps({"max_ngram": max_ngram, "source": corpus_file, "terms": terms},
+                        ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    with open(index_file, "wb") as file:
+        file.write(INDEX_MAGIC)
+        file.write(struct.pack("<I", len(header)))
+        file.write(header)
+        blob.tofile(file)
+
+    print(f"Indexed {len(terms)} terms ({len(blob) // 3} postings) into {index_file} "
+          f"({os.path.getsize(index_file) / 1024:.0f} KB)")
+
+def open_index(index_file=INDEX_FILE):
+    """Opens an index file. Only the term table is read; postings are read on demand."""
+    with open(index_file, "rb") as file:
+        if file.read(len(INDEX_MAGIC)) != INDEX_MAGIC:
+            raise ValueError(f"{index_file} is not a Quran index file")
+        header_length, = struct.unpack("<I", file.read(4))
+        header = json.loads(file.read(header_length).decode("utf-8"))
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    header["data"] = data
+    header["postings_start"] = len(INDEX_MAGIC) + 4 + header_length
+    return header
+
+def lookup(index, term):
+    """Returns the (surah, ayah, position) postings of one normalized word or n-gram."""
+    if term not in index["terms"]:
+        return []
+    offset, count = index["terms"][term]
+    start = index["postings_start"] + offset
+    values = array("H")
+    values.frombytes(index["data"][start:start + count * 3 * values.itemsize])
+    return list(zip(values[0::3], values[1::3], values[2::3]))
+
+def find_phrase(index, phrase):
+    """Returns the (surah, ayah, position) of every occurrence of a word or phrase."""
+    words = clean_and_split(phrase)
+    if not words:
+        return []
+    max_ngram = index["max_ngram"]
+
+    # Split the phrase into indexed n-grams, the last one overlapping if needed
+    chunks = [(start, " ".join(words[start:start + max_ngram]))
+              for start in range(0, max(len(words) - max_ngram, 0) + 1, max_ngram)]
+    if chunks[-1][0] + max_ngram < len(words):
+        start = len(words) - max_ngram
+        chunks.append((start, " ".join(words[start:])))
+
+    # Start from the rarest chunk and keep the positions where every other chunk lines up
+    chunk_postings = [(start, lookup(index, term)) for start, term in chunks]
+    chunk_postings.sort(key=lambda item: len(item[1]))
+    anchor_start, anchor = chunk_postings[0]
+    matches = [(surah, ayah, position - anchor_start) for surah, ayah, position in anchor]
+    for start, postings in chunk_postings[1:]:
+        shifted = {(surah, ayah, position - start) for surah, ayah, position in postings}
+        matches = [match for match in matches if match in shifted]
+    return sorted(matches)
+
+def affected_ayahs(index, phrases):
+    """Returns the sorted (surah, ayah) pairs containing any of the words or phrases."""
+    return sorted({(surah, ayah) for phrase in phrases for surah, ayah, _ in find_phrase(index, phrase)})
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the word/phrase index of the Quran.")
+    parser.add_argument("phrases", nargs="*", help="Words or phrases to look up")
+    parser.add_argument("--build", action="store_true", help="Rebuild the index first")
+    parser.add_argument("--index", default=INDEX_FILE)
+    args = parser.parse_args()
+
+    if args.build or not os.path.exists(args.index):
+        build_index(index_file=args.index)
+
+    index = open_index(args.index)
+    for phrase in args.phrases:
+        occurrences = find_phrase(index, phrase)
+        ayahs = sorted({(surah, ayah) for surah, ayah, _ in occurrences})
+        preview = ", ".join(f"{surah}:{ayah}" for surah, ayah in ayahs[:10])
+        more = f" (+{len(ayahs) - 10} more)" if len(ayahs) > 10 else ""
+        print(f"'{phrase}': {len(occurrences)} occurrences in {len(ayahs)} ayahs: {preview}{more}")
+
+if __name__ == "__main__":
+    main()
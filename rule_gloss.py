@@ -0,0 +1,182 @@
+import argparse
+import json
+import re
+import time
+from fuzzy_match import lemma_candidates
+from gloss_memo import split_units
+from local_signs import SIGN_ALIASES
+from phrase_segmenter import STOP_WORDS, build_sign_trie, load_sign_glosses, segment_dp
+from tokenizer import stream_corpus, tokenize_texts
+
+PROMPT_FILE = "prompt.txt"
+VERSES_FILE = "datasets/quran_verses.json"
+OUTPUT_FILE = "asl_gloss_rules.json"
+CONFIDENCE_THRESHOLD = 0.75  # Verses below this go to the LLM path
+
+# English renderings of prompt.txt signs that islam_vids/ has no clip (and so no alias) for
+EXTRA_SIGN_ALIASES = {
+    "ADHAN": ["call to prayer"],
+    "AYAH": ["verse", "verses"],
+    "HAJJ": ["pilgrimage", "hajj"],
+    "KAABAA": ["kaaba", "kabah", "sacred house"],
+    "PROPHET": ["prophet", "prophets"],
+    "MUHAMMAD": ["muhammad"],
+    "UMRAH": ["umrah"],
+    "WUDU": ["ablution"],
+    "ZAKAT": ["zakah", "zakat"],
+}
+
+# Words that start a time reference, moved to the front of their clause
+TIME_WORDS = {
+    "day", "days", "today", "tomorrow", "yesterday", "night", "nights", "morning", "evening", "dawn",
+    "hour", "year", "years", "month", "months", "hereafter", "now", "later", "forever", "eternally",
+}
+# Constructions whose ASL word order the rules do not handle
+QUESTION_WORDS = {"who", "what", "why", "how", "whom", "whose", "which"}
+CONDITIONAL_WORDS = {"if", "unless", "when", "whenever", "until"}
+NEGATION_WORDS = {"not", "no", "never", "nor", "none", "neither"}
+LONG_CLAUSE_WORDS = 10
+
+ISLAMIC_LIST_RE = re.compile(r"use the provided signing gloss:\s*\n(.+)")
+
+def load_islamic_signs(prompt_file=PROMPT_FILE):
+    """Reads the Islamic sign list (ADHAN, ALHAMDULILAH, ALLAH, ...) from the prompt."""
+    with open(prompt_file, "r", encoding="utf-8") as file:
+        match = ISLAMIC_LIST_RE.search(file.read())
+    return [sign.strip() for sign in match.group(1).split(",")] if match else []
+
+def build_rule_lexicon(prompt_file=PROMPT_FILE):
+    """
+    Builds a trie of everything with a sign: the Islamic signs and their English
+    renderings (mapped to the prompt's gloss) plus the general sign vocabulary.
+    Returns (trie, {phrase: GLOSS}).
+    """
+    islamic_signs = load_islamic_signs(prompt_file)
+    glosses = dict(load_sign_glosses())
+    for sign in islamic_signs:
+        glosses[sign.lower()] = sign
+        for stem, aliases in SIGN_ALIASES.items():
+            if stem.upper() == sign:
+                glosses.update((alias, sign) for alias in aliases)
+        glosses.update((alias, sign) for alias in EXTRA_SIGN_ALIASES.get(sign, []))
+    return build_sign_trie(glosses), glosses
+
+def front_time_references(segments):
+    """Moves a time word, and a following 'of X' complement, to the front of the clause."""
+    for start, segment in enumerate(segments):
+        if segment["kind"] == "dropped" or not TIME_WORDS.intersection(segment["words"]):
+            continue
+        end = start + 1
+        # "Day of Recompense", "Day of the Resurrection": keep the complement with the time word
+        while end < len(segments) and segments[end]["kind"] == "dropped" and segments[end]["words"][0] in ("of", "the"):
+            end += 1
+        if end < len(segments) and end > start + 1:
+            end += 1
+        else:
+            end = start + 1
+        before = segments[:start]
+        if before and before[-1]["words"] == ["during"]:
+            before = before[:-1]  # A fronted time sign needs no "during"
+        return segments[start:end] + before + segments[end:]
+    return segments
+
+def gloss_clause(words, trie, glosses):
+    """
+    Glosses one tokenized clause. Unknown words fall back to a known base form ("worlds" -> WORLD).
+    Returns (signs, signs known, signs total).
+    """
+    words = [word for word in words if any(char.isalnum() for char in word)]
+    segments = front_time_references(segment_dp(words, trie, STOP_WORDS))
+    signs, known = [], 0
+    for segment in segments:
+        if segment["kind"] == "dropped":
+            continue
+        gloss = segment["gloss"] if segment["kind"] == "sign" else None
+        if gloss is None:
+            gloss = next((glosses[lemma] for lemma in lemma_candidates(segment["words"][0]) if lemma in glosses), None)
+        if gloss is not None:
+            known += 1
+            signs.append(gloss.upper())
+        else:
+            signs.append(segment["words"][0].upper())  # No sign known: left for fingerspelling
+    return signs, known, len(signs)
+
+def confidence_score(words, known, content, clause_lengths):
+    """
+    Scores how far the mechanical rules can be trusted: the share of signs with a known gloss,
+    lowered for questions, conditionals, negation and long clauses.
+    """
+    if not content:
+        return 0.0
+    score = known / content
+    word_set = set(words)
+    if word_set & QUESTION_WORDS:
+        score *= 0.85
+    if word_set & CONDITIONAL_WORDS:
+        score *= 0.85
+    if word_set & NEGATION_WORDS:
+        score *= 0.9
+    longest = max(clause_lengths)
+    if longest > LONG_CLAUSE_WORDS:
+        score *= (LONG_CLAUSE_WORDS / longest) ** 0.5
+    return round(score, 3)
+
+def gloss_verses(verses, trie, glosses):
+    """
+    Glosses verses clause by clause. Returns {verse: {"GLOSS", "CONFIDENCE"}}.
+    Clauses are tokenized in one pass and each distinct clause is glossed once.
+    """
+    verse_clauses = [split_units(verse, "clause") for verse in verses]
+    flat_clauses = [clause for clauses in verse_clauses for clause in clauses]
+    clause_words = tokenize_texts(flat_clauses) if flat_clauses else []
+
+    clause_glosses = {}
+    results = {}
+    position = 0
+    for verse, clauses in zip(verses, verse_clauses):
+        words_per_clause = clause_words[position:position + len(clauses)]
+        position += len(clauses)
+        signs, known, content, all_words = [], 0, 0, []
+        for words in words_per_clause:
+            key = tuple(words)
+            if key not in clause_glosses:
+                clause_glosses[key] = gloss_clause(words, trie, glosses)
+            clause_signs, clause_known, clause_content = clause_glosses[key]
+            signs += clause_signs
+            known += clause_known
+            content += clause_content
+            all_words += words
+        clause_lengths = [len(words) for words in words_per_clause] or [0]
+        results[verse] = {
+            "GLOSS": ", ".join(signs),
+            "CONFIDENCE": confidence_score(all_words, known, content, clause_lengths),
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Gloss the Quran offline with mechanical ASL rules.")
+    parser.add_argument("--verses", default=VERSES_FILE)
+    parser.add_argument("--threshold", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--output", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    trie, lexicon = build_rule_lexicon()
+    corpus = list(stream_corpus(args.verses))
+    glosses = gloss_verses([verse for _, verse in corpus], trie, lexicon)
+    elapsed = time.perf_counter() - start
+
+    output = {}
+    for (surah, ayah), verse in corpus:
+        output.setdefault(str(surah), {})[str(ayah)] = {"VERSE": verse, **glosses[verse]}
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(output, file, indent=4, ensure_ascii=False)
+
+    confident = sum(1 for _, verse in corpus if glosses[verse]["CONFIDENCE"] >= args.threshold)
+    print(f"Glossed {len(corpus)} verses in {elapsed:.2f}s; {confident} at or above {args.threshold} confidence, "
+          f"{len(corpus) - confident} for the LLM. Saved to {args.output}")
+    for (surah, ayah), verse in corpus[:7]:
+        print(f"{surah}:{ayah} [{glosses[verse]['CONFIDENCE']}] {glosses[verse]['GLOSS']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import os
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import asl_scraper
+from signasl_standin import FIXTURES_FOLDER, StandinState, parse_slow_words, start_standin_server
+
+DEFAULT_WORDS = ["name", "in", "the", "praise", "worship", "merciful", "lord", "allah", "glorify", "mercy"]
+
+def install_request_counter(session, counts, current):
+    """Wraps session.get so every attempt, including retries, is counted against the current word."""
+    original_get = session.get
+    lock = threading.Lock()
+
+    def counting_get(url, **kwargs):
+        response = original_get(url, **kwargs)
+        with lock:
+            word = getattr(current, "word", None)
+            counts[word]["requests"] += 1
+            counts[word][f"status_{response.status_code}"] += 1
+        return response
+
+    session.get = counting_get
+
+def run_loadtest(words, base_url, workers=1, download=False):
+    """Runs the scraping path for every word against base_url and returns per-word results."""
+    asl_scraper.SIGNASL_BASE_URL = base_url
+    cache = {}
+    counts = {word: Counter() for word in words}
+    counts[None] = Counter()
+    current = threading.local()
+    install_request_counter(asl_scraper.SESSION, counts, current)
+    download_folder = tempfile.mkdtemp(prefix="loadtest_videos_")
+
+    def scrape(word):
+        current.word = word
+        start = time.perf_counter()
+        video_url = asl_scraper.get_asl_video(word, cache)
+        if video_url and download:
+            asl_scraper.download_video(video_url, download_folder)
+        return word, video_url, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(scrape, words))
+    elapsed = time.perf_counter() - start
+    return results, counts, elapsed
+
+def report(results, counts, elapsed, server_stats):
+    """Prints throughput, per-word request counts and retry behaviour."""
+    print(f"\n{'word':<12} {'requests':>8} {'429s':>5} {'seconds':>8}  video")
+    for word, video_url, seconds in results:
+        word_counts = counts[word]
+        print(f"{word:<12} {word_counts['requests']:>8} {word_counts['status_429']:>5} {seconds:>8.3f}  "
+              f"{os.path.basename(video_url) if video_url else '-'}")
+
+    total_requests = sum(c["requests"] for c in counts.values())
+    throttled = sum(c["status_429"] for c in counts.values())
+    found = sum(1 for _, video_url, _ in results if video_url)
+    latencies = sorted(seconds for _, _, seconds in results)
+    print(f"\nWords: {len(results)} ({found} with video) in {elapsed:.2f}s "
+          f"= {len(results) / elapsed:.2f} words/sec, {total_requests / elapsed:.2f} requests/sec")
+    print(f"Requests: {total_requests} total, {total_requests / len(results):.2f} per word, "
+          f"{throttled} answered 429 and retried")
+    print(f"Word latency: p50 {latencies[len(latencies) // 2]:.3f}s, max {latencies[-1]:.3f}s")
+    print(f"Server status counts: {server_stats['statuses']}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the SignASL scraping path against the local stand-in.")
+    parser.add_argument("words", nargs="*", default=DEFAULT_WORDS)
+    parser.add_argument("--fixtures", default=FIXTURES_FOLDER)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--slow", action="append", metavar="WORD=SECONDS", help="Extra delay for one word")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth page request with 429")
+    parser.add_argument("--retry-after", type=int, default=0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--workers", type=int, default=1, help="Words scraped concurrently")
+    parser.add_argument("--download", action="store_true", help="Also download the dummy video for each hit")
+    args = parser.parse_args()
+
+    state = StandinState(args.fixtures, args.latency, args.jitter, parse_slow_words(args.slow),
+                         args.throttle_every, args.retry_after)
+    server, base_url = start_standin_server(state)
+    print(f"Stand-in server at {base_url}, latency {args.latency}s, {args.workers} worker(s)")
+    try:
+        results, counts, elapsed = run_loadtest(args.words, base_url, args.workers, args.download)
+        report(results, counts, elapsed, state.stats())
+    finally:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import html
+import re
+from html.parser import HTMLParser
+from bs4 import BeautifulSoup
+
+NO_VIDEO_MESSAGE = "Sorry, no video found for this word."
+TAG_RE = re.compile(r"<[^>]*>")
+NON_TEXT_TAGS = {"script", "style", "template"}
+
+def parse_page_bs4(page_html):
+    """
+    Reference backend: parses the whole page with BeautifulSoup.
+    Returns {"no_video", "video_url", "sign_links"}; sign_links is only filled when the
+    page has neither the no-video message nor a video, matching the scraper's use of it.
+    """
+    soup = BeautifulSoup(page_html, 'html.parser')
+    if NO_VIDEO_MESSAGE in soup.text:
+        return {"no_video": True, "video_url": None, "sign_links": []}
+
+    video = soup.find('video')
+    if video and video.find('source'):
+        return {"no_video": False, "video_url": video.find('source')['src'], "sign_links": []}
+
+    sign_links = [a['href'] for a in soup.find_all('a', href=True) if a['href'].startswith('/sign/')]
+    return {"no_video": False, "video_url": None, "sign_links": sign_links}
+
+class StopParsing(Exception):
+    """Raised by the streaming parser once it has what it needs."""
+
+class SignPageParser(HTMLParser):
+    """Streaming parser that stops at the first <video><source> and only keeps /sign/ links."""
+
+    def __init__(self, collect_text=False):
+        super().__init__(convert_charrefs=True)
+        self.collect_text = collect_text
+        self.text_parts = []
+        self.skip_depth = 0
+        self.seen_video = False
+        self.in_video = False
+        self.video_url = None
+        self.sign_links = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in NON_TEXT_TAGS:
+            self.skip_depth += 1
+        elif tag == "video" and not self.seen_video:
+            self.seen_video = self.in_video = True
+        elif tag == "source" and self.in_video and not self.collect_text:
+            self.video_url = dict(attrs)["src"]
+            raise StopParsing()
+        elif tag == "a":
+            href = dict(attrs).get("href")
+            if href and href.startswith("/sign/"):
+                self.sign_links.append(href)
+
+    def handle_startendtag(self, tag, attrs):
+        # Self-closing tags never open a text-free region or a video
+        if tag not in NON_TEXT_TAGS and tag != "video":
+            self.handle_starttag(tag, attrs)
+
+    def handle_endtag(self, tag):
+        if tag in NON_TEXT_TAGS and self.skip_depth:
+            self.skip_depth -= 1
+        elif tag == "video":
+            self.in_video = False
+
+    def handle_data(self, data):
+        if self.collect_text and not self.skip_depth:
+            self.text_parts.append(data)
+
+def has_no_video_message(page_html):
+    """Checks for the no-video message, only running a text-collecting parse when a cheap tag strip finds it."""
+    if NO_VIDEO_MESSAGE not in html.unescape(TAG_RE.sub("", page_html)):
+        return False
+    parser = SignPageParser(collect_text=True)
+    parser.feed(page_html)
+    parser.close()
+    return NO_VIDEO_MESSAGE in "".join(parser.text_parts)
+
+def parse_page_fast(page_html):
+    """Fast backend with the same results as parse_page_bs4, without building a document tree."""
+    if has_no_video_message(page_html):
+        return {"no_video": True, "video_url": None, "sign_links": []}
+
+    parser = SignPageParser()
+    try:
+        parser.feed(page_html)
+        parser.close()
+    except StopParsing:
+        return {"no_video": False, "video_url": parser.video_url, "sign_links": []}
+    return {"no_video": False, "video_url": None, "sign_links": parser.sign_links}
+
+PAGE_BACKENDS = {
+    "bs4": parse_page_bs4,
+    "fast": parse_page_fast,
+}
+
+def parse_page(page_html, backend="fast"):
+    """Extracts the no-video flag, first video URL and /sign/ links with the named backend."""
+    return PAGE_BACKENDS[backend](page_html)
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from signasl_pages import NO_VIDEO_MESSAGE
+
+FIXTURES_FOLDER = "fixtures/signasl"
+MEDIA_HOST = "https://media.signbsl.com"  # Video host used in saved pages, rewritten to the stand-in
+FAKE_VIDEO_BYTES = 64 * 1024
+
+NOT_FOUND_PAGE = f"""<!DOCTYPE html>
+<html><head><title>Not found</title></head>
+<body><div class="alert alert-warning"><p>{NO_VIDEO_MESSAGE}</p></div></body></html>
+"""
+
+class StandinState:
+    """Fixtures, behaviour settings and request counters shared by all handler threads."""
+
+    def __init__(self, fixtures_folder=FIXTURES_FOLDER, latency=0.0, jitter=0.0, slow_words=None,
+                 throttle_every=0, retry_after=0):
+        self.pages = {}
+        for filename in os.listdir(fixtures_folder):
+            if filename.endswith(".html"):
+                with open(os.path.join(fixtures_folder, filename), "r", encoding="utf-8") as file:
+                    self.pages[filename[:-len(".html")]] = file.read()
+        self.latency = latency
+        self.jitter = jitter
+        self.slow_words = slow_words or {}  # Word -> extra seconds per request
+        self.throttle_every = throttle_every  # Answer every Nth page request with 429 (0 = never)
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Clears the request counters."""
+        with self.lock:
+            self.page_requests = 0
+            self.paths = Counter()
+            self.statuses = Counter()
+
+    def record(self, path, status):
+        with self.lock:
+            self.paths[path] += 1
+            self.statuses[status] += 1
+
+    def next_page_throttled(self):
+        """Counts a page request and returns True if it should be answered with 429."""
+        with self.lock:
+            self.page_requests += 1
+            return self.throttle_every > 0 and self.page_requests % self.throttle_every == 0
+
+    def stats(self):
+        with self.lock:
+            return {"paths": dict(self.paths), "statuses": {str(k): v for k, v in self.statuses.items()}}
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Serves /sign/<word> pages from fixtures, /videos/... as dummy clips, and /__stats, /__reset."""
+
+    state = None
+    base_url = ""
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/__stats":
+            return self.send(200, json.dumps(self.state.stats()), "application/json", record=False)
+        if path == "/__reset":
+            self.state.reset()
+            return self.send(200, "{}", "application/json", record=False)
+
+        if path.startswith("/sign/"):
+            word = path[len("/sign/"):].strip("/")
+            time.sleep(self.state.latency + random.uniform(0, self.state.jitter) + self.state.slow_words.get(word, 0))
+            if self.state.next_page_throttled():
+                return self.send(429, "Too Many Requests", "text/plain", {"Retry-After": str(self.state.retry_after)})
+            page_html = self.state.pages.get(word, NOT_FOUND_PAGE)
+            return self.send(200, page_html.replace(MEDIA_HOST, self.base_url), "text/html; charset=utf-8")
+
+        if path.startswith("/videos/") and path.endswith(".mp4"):
+            time.sleep(self.state.latency)
+            return self.send(200, b"\0" * FAKE_VIDEO_BYTES, "video/mp4")
+
+        self.send(404, "Not Found", "text/plain")
+
+    def send(self, status, body, content_type, headers=None, record=True):
+        if record:
+            self.state.record(self.path, status)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep load test output readable
+
+def start_standin_server(state, host="127.0.0.1", port=0):
+    """Starts the stand-in server on a background thread. Returns (server, base_url)."""
+    handler = type("BoundStandinHandler", (StandinHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    handler.base_url = f"http://{host}:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, handler.base_url
+
+def parse_slow_words(values):
+    """Parses ["word=seconds", ...] into a dict."""
+    slow_words = {}
+    for value in values or []:
+        word, seconds = value.split("=", 1)
+        slow_words[word] = float(seconds)
+    return slow_words
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve SignASL-like pages from saved fixtures.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixtures", default=FIXTURES_FOLDER)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many extra random seconds")
+    parser.add_argument("--slow", action="append", metavar="WORD=SECONDS", help="Extra delay for one word")
+    parser.add_argument("--throttle-every", type=int, default=0, help="Answer every Nth page request with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    args = parser.parse_args()
+
+    state = StandinState(args.fixtures, args.latency, args.jitter, parse_slow_words(args.slow),
+                         args.throttle_every, args.retry_after)
+    server, base_url = start_standin_server(state, port=args.port)
+    print(f"Serving {len(state.pages)} fixture pages at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The scripts import their siblings by bare name, as they do when run from the repository root
+for folder in (REPO_ROOT, os.path.join(REPO_ROOT, "extract")):
+    if folder not in sys.path:
+        sys.path.insert(0, folder)
@@ -0,0 +1,57 @@
+import json
+import pytest
+from captions import MIN_WORD_SECONDS, format_vtt, vtt_time, word_times, write_captions
+from timeline import build_timeline
+
+def ayah_span(start, end, signs):
+    """An ayah of the timeline with one phrase of signs given as (gloss, start) pairs."""
+    return {"ayah": "1", "start": start, "end": end,
+            "phrases": [{"phrase": "p", "signs": [{"gloss": gloss, "start": time} for gloss, time in signs]}]}
+
+def test_words_are_spread_evenly_without_anchors():
+    times = word_times(["one", "two", "three", "four"], ayah_span(0.0, 4.0, []))
+    assert times == [(0.0, 1.0), (1.0, 2.0), (2.0, 3.0), (3.0, 4.0)]
+    assert word_times([], ayah_span(0.0, 4.0, [])) == []
+
+def test_words_naming_a_sign_start_with_it():
+    words = ["In", "the", "name", "of", "Allah,"]
+    times = word_times(words, ayah_span(0.0, 10.0, [("NAME", 2.0), ("ALLAH", 8.0)]))
+    assert times[2][0] == 2.0
+    assert times[4] == (8.0, 10.0)
+    assert times[0] == (0.0, 1.0) and times[3] == (5.0, 8.0)
+
+def test_anchors_that_would_squeeze_words_are_ignored():
+    # ALLAH starts too soon for the three words before it to get MIN_WORD_SECONDS each
+    times = word_times(["praise", "be", "to", "allah"], ayah_span(0.0, 4.0, [("ALLAH", 0.3)]))
+    assert times == [(0.0, 1.0), (1.0, 2.0), (2.0, 3.0), (3.0, 4.0)]
+    assert all(end - start >= MIN_WORD_SECONDS for start, end in times)
+
+def test_signs_anchor_words_in_order():
+    # The first ALLAH sign belongs to the first "Allah"; the second word can only take the later one
+    times = word_times(["allah", "lord", "allah"], ayah_span(0.0, 6.0, [("ALLAH", 0.0), ("ALLAH", 4.0)]))
+    assert [start for start, _ in times] == [0.0, 2.0, 4.0]
+
+def test_vtt_format():
+    assert vtt_time(3723.4567) == "01:02:03.457"
+    assert format_vtt([(0.0, 1.5, "a --> b")]) == "WEBVTT\n\n00:00:00.000 --> 00:00:01.500\na -> b\n"
+
+def test_write_captions_from_the_verses_file(tmp_path):
+    verses_file = tmp_path / "verses.json"
+    verses_file.write_text(json.dumps({"1": {"verses": ["In the name of Allah", "Praise be to Allah"]}}))
+    signs = [{"ayah": "1", "phrase": "p", "gloss": "ALLAH", "video": "v", "start_frame": 0, "end_frame": 30},
+             {"ayah": "2", "phrase": "q", "gloss": "ALLAH", "video": "v", "start_frame": 45, "end_frame": 60}]
+    timeline_file = tmp_path / "surah.timeline.json"
+    timeline_file.write_text(json.dumps(build_timeline(signs, 60, 30, surah=1)))
+
+    written = write_captions(str(timeline_file), store_file=str(tmp_path / "none.sqlite"), verses_file=str(verses_file))
+    assert sorted(written) == sorted(str(tmp_path / f"surah.en.{kind}") for kind in ("vtt", "ttml", "words.vtt"))
+    vtt = (tmp_path / "surah.en.vtt").read_text()
+    assert "00:00:00.000 --> 00:00:01.000\nIn the name of Allah" in vtt
+    assert "00:00:01.000 --> 00:00:02.000\nPraise be to Allah" in vtt
+    assert (tmp_path / "surah.en.words.vtt").read_text().count(" --> ") == 9
+
+def test_write_captions_needs_a_surah(tmp_path):
+    timeline_file = tmp_path / "video.timeline.json"
+    timeline_file.write_text(json.dumps(build_timeline([], 0, 30)))
+    with pytest.raises(ValueError):
+        write_captions(str(timeline_file))
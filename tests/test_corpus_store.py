@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+import pytest
+from corpus_store import arabic_word_count, get_ayah, import_corpus, lookup_ref, open_store
+
+def write_edition(path, ayahs):
+    """An alquran.cloud /quran/<edition> download of surah 1 with the given {ayah: text}."""
+    path.write_text(json.dumps({"data": {"surahs": [{"number": 1, "ayahs": [
+        {"numberInSurah": ayah, "text": text} for ayah, text in ayahs.items()]}]}}))
+
+@pytest.fixture
+def sources(tmp_path):
+    files = {"store_file": str(tmp_path / "corpus.sqlite"), "toc_file": str(tmp_path / "toc.csv"),
+             "english_file": tmp_path / "en.json", "arabic_file": tmp_path / "ar.json", "words_file": tmp_path / "words.json"}
+    write_edition(files["english_file"], {1: "In the name of Allah", 2: "All praise is for Allah"})
+    write_edition(files["arabic_file"], {1: "بِسْمِ ٱللَّهِ", 2: "ٱلْحَمْدُ ۖ"})
+    files["words_file"].write_text(json.dumps({"1": "In (the) name", "2": "(of) Allah", "3": "All praises"}))
+    return {name: str(path) for name, path in files.items()}
+
+def test_import_aligns_words_to_ayahs(sources):
+    changed = import_corpus(**sources)
+    assert changed == {"toc": "missing", "english": 2, "arabic": 2, "words": 3, "aligned": True}
+    connection = open_store(sources["store_file"])
+    assert lookup_ref(connection, "1:1")["words"] == ["In (the) name", "(of) Allah"]
+    assert lookup_ref(connection, "1:2:1")["text"] == "All praises"
+    assert lookup_ref(connection, "1:3") is None
+    with pytest.raises(ValueError):
+        lookup_ref(connection, "1")
+
+def test_unchanged_sources_are_skipped(sources):
+    import_corpus(**sources)
+    assert import_corpus(**sources) == {"toc": "missing", "english": None, "arabic": None, "words": None}
+
+def test_rows_removed_from_a_source_are_removed_from_the_store(sources):
+    import_corpus(**sources)
+    write_edition(Path(sources["english_file"]), {1: "In the name of God"})
+    import_corpus(**sources)
+    connection = open_store(sources["store_file"])
+    assert get_ayah(connection, 1, 1)["english"] == "In the name of God"
+    assert get_ayah(connection, 1, 2) == {"surah": 1, "ayah": 2, "english": None, "arabic": "ٱلْحَمْدُ ۖ"}
+    connection.close()
+
+    write_edition(Path(sources["arabic_file"]), {1: "بِسْمِ ٱللَّهِ"})
+    import_corpus(**sources)
+    connection = open_store(sources["store_file"])
+    assert get_ayah(connection, 1, 2) is None  # No text left from any source
+
+def test_arabic_word_count_skips_pause_marks_and_the_bismillah():
+    assert arabic_word_count(1, 2, "ٱلْحَمْدُ ۖ لِلَّهِ") == 2
+    assert arabic_word_count(2, 1, "بِسْمِ ٱللَّهِ ٱلرَّحْمَٰنِ ٱلرَّحِيمِ الٓمٓ") == 1
+    assert arabic_word_count(9, 1, "بَرَآءَةٌ مِّنَ") == 2
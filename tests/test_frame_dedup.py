@@ -0,0 +1,76 @@
+import os
+import numpy as np
+import pytest
+import video_encoder
+
+pytest.importorskip("mediapipe")  # Imported by interpolate_extract
+import interpolate_extract
+from interpolate_extract import frame_key, render_frames
+
+def hand(x, y=0.5, z=0.0):
+    return [{"x": x + 0.01 * i, "y": y, "z": z} for i in range(21)]
+
+def test_frame_key_ignores_sub_pixel_motion():
+    assert frame_key([hand(0.5)], 640, 480) == frame_key([hand(0.5 + 0.1 / 640)], 640, 480)
+    assert frame_key([hand(0.5)], 640, 480) != frame_key([hand(0.5 + 2 / 640)], 640, 480)
+    assert frame_key([hand(0.5)], 640, 480) != frame_key([hand(0.5, z=-0.2)], 640, 480)  # Thicker lines
+    assert frame_key([], 640, 480) == b""
+    assert frame_key([hand(0.5)], 640, 480) != frame_key([hand(0.5), hand(0.2)], 640, 480)
+
+FRAMES = [[hand(0.2)], [hand(0.2)], [hand(0.3)], [hand(0.3)], [hand(0.3)], [hand(0.4)], [hand(0.4)]]
+
+def test_opencv_keeps_every_frame_and_lists_duplicates(tmp_path):
+    video = str(tmp_path / "signs.mp4")
+    stats = render_frames(FRAMES, video, 30, 64, 48, vfr=True, encoder_options={"backend": "opencv"})
+    assert (stats["frames"], stats["drawn"], stats["duplicates"]) == (7, 3, 4)
+    assert stats["encoder"]["frames"] == 7
+    with open(str(tmp_path / "signs.duplicates.txt")) as file:
+        assert [int(line) for line in file] == [1, 3, 4, 6]
+
+class RecordingEncoder:
+    def __init__(self, path, fps, size, **options):
+        self.options, self.frames = options, []
+
+    def write(self, frame):
+        self.frames.append(frame)
+
+    def close(self):
+        return {"frames": len(self.frames)}
+
+def test_ffmpeg_encodes_each_distinct_frame_once(tmp_path, monkeypatch):
+    encoders = []
+    monkeypatch.setattr(interpolate_extract, "resolve_backend", lambda backend: "ffmpeg")
+    monkeypatch.setattr(interpolate_extract, "open_encoder",
+                        lambda *args, **options: encoders.append(RecordingEncoder(*args, **options)) or encoders[-1])
+    video = str(tmp_path / "signs.mp4")
+    render_frames(FRAMES, video, 30, 64, 48, vfr=True, keyframes=[0, 4])
+    encoder, = encoders
+    # Distinct frames plus the last one, so the video lasts as long; a keyframe on a dropped frame moves back
+    assert encoder.options["keep_frames"] == [0, 2, 5, 6]
+    assert encoder.options["keyframes"] == [0, 2]
+    assert len(encoder.frames) == len(FRAMES)  # Dropped frames still reach the encoder, to keep the timestamps
+    with open(str(tmp_path / "signs.timestamps.txt")) as file:
+        assert file.read().splitlines() == ["# timestamp format v2", "0.000", "66.667", "166.667", "200.000"]
+
+def test_keep_frames_select_filter(monkeypatch):
+    commands = []
+
+    class Process:
+        stdin = None
+
+        def __init__(self, command, **kwargs):
+            commands.append(command)
+
+        def wait(self):
+            return 0
+
+    monkeypatch.setattr(video_encoder.subprocess, "Popen", Process)
+    encoder = video_encoder.FFmpegEncoder("out.mp4", 30, (64, 48), keep_frames=[5, 0, 2, 6, 2])
+    with open(encoder.filter_script) as file:
+        script = file.read()
+    encoder._finish()
+    assert script == "select='not(between(n,1,1)+between(n,3,4)+gte(n,7))'"
+    assert encoder.output_frames == 4
+    command, = commands
+    assert command[command.index("-fps_mode") + 1] == "vfr"
+    assert not os.path.exists(encoder.filter_script)
@@ -0,0 +1,33 @@
+from fuzzy_match import build_fuzzy_index, edit_distance, lemma_candidates, suggest, suggest_all
+
+VOCABULARY = ["believe", "allah", "steal", "beard", "read", "honor", "merciful", "pray", "prayer", "mercy"]
+
+def glosses(suggestions):
+    return [gloss for gloss, _, _ in suggestions]
+
+def test_lemma_candidates():
+    assert "believe" in lemma_candidates("believers")
+    assert "run" in lemma_candidates("running")
+    assert "allah" in lemma_candidates("allah's")
+    assert lemma_candidates("be") == []
+
+def test_edit_distance_stops_early():
+    assert edit_distance("honour", "honor", 2) == 1
+    assert edit_distance("kitten", "sitting", 2) == 3  # More than the limit: limit + 1
+
+def test_inflections_are_suggested_first():
+    index = build_fuzzy_index(VOCABULARY)
+    assert suggest("believers", index)[0] == ("believe", 0.95, "lemma")
+    assert suggest("allah", index)[0] == ("allah", 1.0, "exact")
+    assert "pray" in glosses(suggest("prayed", index))
+
+def test_different_words_are_not_suggested():
+    index = build_fuzzy_index(VOCABULARY)
+    assert "steal" not in glosses(suggest("seal", index))
+    assert "beard" not in glosses(suggest("regard", index))
+    assert glosses(suggest("prayerr", index))[0] == "prayer"  # A misspelling is still caught
+
+def test_tokens_that_are_not_words_are_left_out():
+    index = build_fuzzy_index(VOCABULARY)
+    assert suggest("-", index) == []
+    assert suggest_all(["-", "123", "believers"], index) == {"believers": suggest("believers", index)}
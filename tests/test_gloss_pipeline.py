@@ -0,0 +1,50 @@
+import json
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("dotenv")
+from gloss_pipeline import (load_gloss_cache, normalize_verse, pack_batches, parse_gloss_response, save_gloss_cache)
+
+VERSES = ["In the name of Allah, the Most Gracious, the Most Merciful.", "All praise is for Allah, Lord of the worlds."]
+
+def response(*pairs):
+    return json.dumps([{"VERSE": verse, "GLOSS": gloss} for verse, gloss in pairs])
+
+def test_glosses_are_matched_to_their_verses():
+    content = response((VERSES[1], "ALHAMDULILAH LORD WORLD"), (VERSES[0], "BISMILLAH, GRACIOUS, MERCIFUL"))
+    assert parse_gloss_response(content, VERSES) == {VERSES[0]: "BISMILLAH, GRACIOUS, MERCIFUL",
+                                                     VERSES[1]: "ALHAMDULILAH LORD WORLD"}
+
+def test_punctuation_and_case_do_not_matter():
+    content = response((VERSES[0].upper().rstrip("."), "BISMILLAH"))
+    assert parse_gloss_response(content, VERSES) == {VERSES[0]: "BISMILLAH"}
+    assert normalize_verse("Lord of the worlds!") == normalize_verse("lord of the worlds")
+
+def test_reworded_verses_fall_back_to_order_when_counts_match():
+    content = response(("In God's name ...", "BISMILLAH"), ("Praise God ...", "ALHAMDULILAH"))
+    assert parse_gloss_response(content, VERSES) == {VERSES[0]: "BISMILLAH", VERSES[1]: "ALHAMDULILAH"}
+    assert parse_gloss_response(response(("In God's name ...", "BISMILLAH")), VERSES) == {}
+
+def test_invalid_glosses_and_strings_are_missing():
+    content = (response((VERSES[0], "bismillah in lower case")) +
+               '{"VERSE": "' + VERSES[1] + '", "GLOSS": "BAD \\q ESCAPE"}')
+    assert parse_gloss_response(content, VERSES) == {}
+    assert parse_gloss_response("Sorry, I cannot help with that.", VERSES) == {}
+
+def test_asl_gloss_key_and_brackets_are_accepted():
+    content = '[{"VERSE": "%s", "ASL_GLOSS": "[ALLAH LORD]"}]' % VERSES[1]
+    assert parse_gloss_response(content, VERSES) == {VERSES[1]: "ALLAH LORD"}
+
+def test_batches_respect_the_token_budget_and_verse_limit():
+    verses = [f"verse {i} " + "word " * 40 for i in range(10)]
+    batches = pack_batches(verses, "template", max_prompt_tokens=200, max_verses=3)
+    assert [verse for batch in batches for verse in batch] == verses
+    assert all(1 <= len(batch) <= 3 for batch in batches)
+    assert len(pack_batches(verses, "template", max_prompt_tokens=10 ** 6, max_verses=3)) == 4
+
+def test_saving_the_cache_keeps_entries_saved_meanwhile(tmp_path):
+    cache_file = str(tmp_path / "gloss_cache.json")
+    save_gloss_cache({"a": "ALLAH"}, cache_file)
+    save_gloss_cache({"b": "LORD"}, cache_file)  # Another run that loaded the cache before "a" was saved
+    assert load_gloss_cache(cache_file) == {"a": "ALLAH", "b": "LORD"}
+    assert [path.name for path in tmp_path.iterdir()] == ["gloss_cache.json"]
@@ -0,0 +1,58 @@
+import wave
+import numpy as np
+import pytest
+from haptics import HOP_SECONDS, HAPTIC_STEP_MS, analyze_recitation, ayah_pattern, find_ayah_spans
+
+RATE = 16000
+
+def write_wav(path, samples, rate=RATE):
+    with wave.open(str(path), "wb") as file:
+        file.setnchannels(1)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes((samples / np.abs(samples).max() * 20000).astype(np.int16).tobytes())
+    return str(path)
+
+def voice(frequency, seconds, harmonics=7, rolloff=1.0, rate=RATE):
+    """A sawtooth-like tone: a fundamental and its harmonics, as in a voice."""
+    t = np.arange(int(rate * seconds)) / rate
+    return sum(np.sin(2 * np.pi * frequency * k * t) / k ** rolloff for k in range(1, harmonics + 1))
+
+@pytest.mark.parametrize("rate", [16000, 44100])
+@pytest.mark.parametrize("frequency", [75, 110, 180, 250, 400])
+@pytest.mark.parametrize("rolloff", [1.0, 2.0])
+def test_pitch_of_a_voice_without_octave_errors(tmp_path, rate, frequency, rolloff):
+    loudness, pitch, seconds = analyze_recitation(write_wav(tmp_path / "tone.wav", voice(frequency, 1.0, rolloff=rolloff, rate=rate), rate))
+    assert seconds == pytest.approx(1.0)
+    assert len(loudness) == len(pitch) == int(1.0 / HOP_SECONDS) + 1
+    assert np.nanmedian(pitch[5:-5]) == pytest.approx(frequency, rel=0.03)
+
+def test_chunking_does_not_change_the_result(tmp_path):
+    path = write_wav(tmp_path / "tone.wav", voice(150, 2.0))
+    whole = analyze_recitation(path)
+    chunked = analyze_recitation(path, chunk_seconds=0.37)
+    np.testing.assert_allclose(chunked[0], whole[0], atol=1e-3)
+    np.testing.assert_allclose(chunked[1], whole[1], atol=1e-3)
+
+def test_ayahs_split_at_the_longest_pauses(tmp_path):
+    silence = lambda seconds: np.zeros(int(RATE * seconds))
+    samples = np.concatenate([silence(0.5), voice(150, 1.0), silence(0.3), voice(150, 0.5), silence(0.8),
+                              voice(150, 1.0), silence(0.5)])
+    loudness, _, _ = analyze_recitation(write_wav(tmp_path / "ayahs.wav", samples))
+    spans = find_ayah_spans(loudness, 2)
+    assert spans[0][0] == pytest.approx(0.5, abs=0.06)
+    assert spans[0][1] == pytest.approx(2.3, abs=0.06)
+    assert spans[1] == (pytest.approx(3.1, abs=0.06), pytest.approx(4.1, abs=0.06))
+    # More ayahs than pauses: the recited time is divided by the weights
+    thirds = find_ayah_spans(loudness, 4, weights=[1, 1, 1, 1])
+    assert len(thirds) == 4 and thirds[0][0] == spans[0][0] and thirds[-1][1] == spans[1][1]
+
+def test_pattern_steps_cover_the_video_span():
+    loudness = np.concatenate([np.full(50, -20.0), np.full(50, -60.0)])
+    pitch = np.concatenate([np.full(50, 200.0), np.full(50, np.nan)])
+    pattern = ayah_pattern(loudness, pitch, (0.0, 2.0), (10.0, 14.0))
+    assert sum(pattern["timings"]) == 4000
+    assert pattern["timings"] == [2000, 2000]
+    assert pattern["intensity"][0] > pattern["intensity"][1]
+    assert pattern["sharpness"][1] == 0  # Unvoiced
+    assert all(timing % HAPTIC_STEP_MS == 0 for timing in pattern["timings"])
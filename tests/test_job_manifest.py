@@ -0,0 +1,79 @@
+import time
+import pytest
+import job_manifest
+from job_manifest import (MAX_ATTEMPTS, add_jobs, claim_job, complete_job, fail_job, job_counts, job_key, job_results,
+                          open_manifest, renew_lease, requeue_dead_workers, run_jobs)
+
+@pytest.fixture
+def manifest_file(tmp_path):
+    return str(tmp_path / "manifest.sqlite")
+
+def test_claims_jobs_in_order_once(manifest_file):
+    connection = open_manifest(manifest_file)
+    add_jobs(connection, "extract", ["a", "b"])
+    add_jobs(connection, "extract", ["b", "c"])  # Already registered jobs keep their place
+    assert [claim_job(connection, "extract", "w1") for _ in range(4)] == ["a", "b", "c", None]
+
+def test_expired_lease_is_handed_out_again(manifest_file):
+    connection = open_manifest(manifest_file)
+    add_jobs(connection, "extract", ["a"])
+    assert claim_job(connection, "extract", "w1", lease_seconds=-1) == "a"
+    assert claim_job(connection, "extract", "w2") == "a"
+    # The first worker lost the job: it can neither renew it nor store its result
+    assert not renew_lease(connection, "extract", "a", "w1")
+    assert not complete_job(connection, "extract", "a", "late", worker="w1")
+    assert complete_job(connection, "extract", "a", "on time", worker="w2")
+    assert job_results(connection, "extract") == {"a": "on time"}
+
+def test_failed_jobs_are_retried_then_given_up(manifest_file):
+    connection = open_manifest(manifest_file)
+    add_jobs(connection, "extract", ["a"])
+    for attempt in range(MAX_ATTEMPTS):
+        assert claim_job(connection, "extract", "w1") == "a"
+        assert fail_job(connection, "extract", "a", "boom", worker="w1")
+    assert claim_job(connection, "extract", "w1") is None
+    assert job_counts(connection, "extract") == {"failed": 1}
+
+def test_jobs_of_dead_workers_are_requeued(manifest_file):
+    connection = open_manifest(manifest_file)
+    add_jobs(connection, "extract", ["a", "b"])
+    host = job_manifest.socket.gethostname()
+    claim_job(connection, "extract", f"{host}:999999999")  # No such process
+    claim_job(connection, "extract", job_manifest.worker_name())
+    assert requeue_dead_workers(connection, "extract") == 1
+    assert job_counts(connection, "extract") == {"pending": 1, "running": 1}
+
+def test_run_jobs_resumes_and_redoes_jobs_whose_inputs_changed(manifest_file):
+    connection = open_manifest(manifest_file)
+    done = []
+
+    def handler(key):
+        done.append(key)
+        if key == "bad":
+            raise RuntimeError("no hands")
+        return key.upper()
+
+    inputs = {"a": 1, "b": 1, "bad": 1}
+    results = run_jobs(connection, "extract", ["a", "b", "bad"], handler, inputs=lambda key: inputs[key])
+    assert results == {"a": "A", "b": "B"}
+    assert done.count("bad") == MAX_ATTEMPTS
+
+    done.clear()
+    inputs["b"] = 2
+    results = run_jobs(connection, "extract", ["a", "b"], handler, inputs=lambda key: inputs[key])
+    assert results == {"a": "A", "b": "B"}
+    assert done == ["b"]
+    assert job_key("b", 2) != job_key("b", 1)
+
+def test_lease_is_renewed_while_a_slow_job_runs(manifest_file):
+    connection = open_manifest(manifest_file)
+    other = open_manifest(manifest_file)
+    stolen = []
+
+    def slow(key):
+        time.sleep(0.5)
+        stolen.append(claim_job(other, "extract", "thief", lease_seconds=0.3))  # Only an expired lease can be taken
+        return key
+
+    assert run_jobs(connection, "extract", ["a"], slow, lease_seconds=0.3) == {"a": "a"}
+    assert stolen == [None]
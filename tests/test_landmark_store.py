@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+from landmark_store import (CANONICAL_HAND_SIZE, CANONICAL_WRIST, HANDS, LANDMARKS, MIDDLE_KNUCKLE, WRIST,
+                            apply_transform, array_to_landmarks, aspect_stretch, canonical_transform, landmarks_to_array,
+                            load_clip, open_landmark_store, save_clip, stored_transform)
+
+def clip_of(wrist, bone, frames=5):
+    """A one-hand clip with its wrist at wrist and its middle knuckle bone (dx, dy) away, in normalized coordinates."""
+    array = np.full((frames, HANDS, LANDMARKS, 3), np.nan, dtype=np.float32)
+    array[:, 0] = 0.0
+    array[:, 0, :, :2] = wrist
+    array[:, 0, MIDDLE_KNUCKLE, :2] = (wrist[0] + bone[0], wrist[1] + bone[1])
+    return array
+
+def hand_size(array, stretch=1.0):
+    bone = (array[0, 0, MIDDLE_KNUCKLE, :2] - array[0, 0, WRIST, :2]) * (stretch, 1.0)
+    return float(np.linalg.norm(bone))
+
+def test_aspect_stretch():
+    assert aspect_stretch(640, 480) == pytest.approx(1.0)
+    assert aspect_stretch(1280, 720) == pytest.approx(4 / 3)
+    assert aspect_stretch(None, 480) == 1.0
+
+def test_transform_moves_the_wrist_and_scales_the_hand():
+    array = clip_of((0.2, 0.3), (0.0, -0.06))
+    moved = apply_transform(array, canonical_transform(array))
+    np.testing.assert_allclose(moved[0, 0, WRIST, :2], CANONICAL_WRIST, atol=1e-6)
+    assert hand_size(moved) == pytest.approx(CANONICAL_HAND_SIZE)
+    assert np.isnan(moved[:, 1]).all()  # The missing hand stays missing
+    assert canonical_transform(np.full((3, HANDS, LANDMARKS, 3), np.nan, dtype=np.float32)) is None
+
+def test_stretch_measures_the_hand_at_its_true_proportions():
+    # A horizontal bone in a 16:9 video covers fewer normalized units of width than it does of height
+    wide = clip_of((0.5, 0.5), (0.09, 0.0))
+    tall = clip_of((0.5, 0.5), (0.0, 0.12))
+    stretch = aspect_stretch(1280, 720)
+    wide_moved = apply_transform(wide, canonical_transform(wide, stretch))
+    tall_moved = apply_transform(tall, canonical_transform(tall, stretch))
+    assert hand_size(wide_moved) == pytest.approx(hand_size(tall_moved))
+    np.testing.assert_allclose(wide_moved[0, 0, WRIST, :2], CANONICAL_WRIST, atol=1e-6)
+
+def test_stored_transform_recomputes_old_rows():
+    array = clip_of((0.3, 0.4), (0.09, 0.0))
+    current = canonical_transform(array, aspect_stretch(1280, 720))
+    assert stored_transform({**current, "width": 1280, "height": 720}, array) == current
+    # Rows stored before the stretch column have a transform without it: computed again for their size
+    old = {"scale": 1.0, "offset_x": 0.0, "offset_y": 0.0, "stretch": None, "width": 1280, "height": 720}
+    assert stored_transform(old, array) == pytest.approx(current)
+    missing = {"scale": None, "offset_x": None, "offset_y": None, "stretch": None, "width": None, "height": None}
+    assert stored_transform(missing, array) == pytest.approx(canonical_transform(array))
+
+def test_saved_clip_loads_normalized_or_as_detected(tmp_path):
+    connection = open_landmark_store(str(tmp_path / "store.sqlite"))
+    array = clip_of((0.25, 0.25), (0.0, 0.1))
+    save_clip(connection, {"clip_id": "book/1", "gloss": "book", "fps": 30.0, "width": 640, "height": 480}, array)
+    clip, normalized = load_clip(connection, "book/1")
+    assert clip["gloss"] == "book" and clip["frames"] == 5
+    np.testing.assert_allclose(normalized[:, 0, WRIST, :2].mean(axis=0), CANONICAL_WRIST, atol=1e-3)
+    _, detected = load_clip(connection, "book/1", normalized=False)
+    np.testing.assert_allclose(detected, array, atol=1e-3)  # Stored as float16
+    assert load_clip(connection, "nosuch") == (None, None)
+
+def test_landmark_lists_round_trip():
+    frames = [[], [[{"x": 0.1 * i, "y": 0.2, "z": 0.0} for i in range(LANDMARKS)]]]
+    array = landmarks_to_array(frames)
+    assert array.shape == (2, HANDS, LANDMARKS, 3)
+    assert array_to_landmarks(array)[0] == []
+    assert array_to_landmarks(array)[1][0][3]["x"] == pytest.approx(0.3)
@@ -0,0 +1,36 @@
+import pytest
+from phrase_segmenter import SIGN_PHRASES, build_sign_trie, segment_corpus, segment_phrase
+
+GLOSSES = {**SIGN_PHRASES, "in the name of allah": "BISMILLAH", "all praises and thanks": "ALHAMDULILAH",
+           "allah": "ALLAH", "most": "MOST", "name": "NAME", "lord": "LORD", "world": "WORLD", "of": "OF"}
+
+@pytest.fixture(scope="module")
+def trie():
+    return build_sign_trie(GLOSSES)
+
+def summary(segments):
+    return [segment["gloss"] if segment["kind"] == "sign" else f"{segment['kind']}:{segment['words'][0]}"
+            for segment in segments]
+
+@pytest.mark.parametrize("method", ["dp", "greedy"])
+def test_named_phrases_are_one_sign(trie, method):
+    assert summary(segment_phrase("the Most Merciful", trie, method)) == ["dropped:the", "MERCIFUL"]
+    assert summary(segment_phrase("In the name of Allah", trie, method)) == ["BISMILLAH"]
+    assert summary(segment_phrase("All praises and thanks", trie, method)) == ["ALHAMDULILAH"]
+
+def test_stop_words_only_signed_inside_longer_matches(trie):
+    # "of" is a known gloss but, on its own, an untranslatable function word
+    assert summary(segment_phrase("Lord of the worlds", trie)) == ["LORD", "dropped:of", "dropped:the", "unknown:worlds"]
+    assert summary(segment_phrase("most of them", trie)) == ["MOST", "dropped:of", "unknown:them"]
+
+def test_dp_prefers_fewer_longer_signs():
+    trie = build_sign_trie({"ask god": "AB", "god give mercy": "BCD", "ask": "A", "give": "C", "mercy": "D"})
+    assert summary(segment_phrase("ask god give mercy", trie, "greedy")) == ["AB", "C", "D"]
+    assert summary(segment_phrase("ask god give mercy", trie, "dp")) == ["A", "BCD"]
+
+def test_brackets_and_punctuation_are_removed(trie):
+    assert summary(segment_phrase("(of) Allah,", trie)) == ["ALLAH"]
+
+def test_segment_corpus_matches_segment_phrase(trie):
+    texts = ["the Most Merciful", "In (the) name", "the Most Merciful", ""]
+    assert segment_corpus(texts, trie) == [segment_phrase(text, trie) for text in texts]
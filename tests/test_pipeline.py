@@ -0,0 +1,80 @@
+import os
+import pytest
+from pipeline import STAGES, Fingerprints, input_fingerprint, run_pipeline, select_stages, stage_graph, stale_reason
+
+def copy_stage(name, source, target):
+    """A stage copying one file to another with the running Python."""
+    return {"name": name, "command": ["-c", f"import shutil; shutil.copyfile({source!r}, {target!r})"],
+            "inputs": [source], "outputs": [target]}
+
+@pytest.fixture
+def chain(tmp_path):
+    """Stages a -> b -> c copying source.txt down the line, and the files involved."""
+    files = {name: str(tmp_path / f"{name}.txt") for name in ("source", "a", "b", "c")}
+    with open(files["source"], "w") as file:
+        file.write("one")
+    stages = [copy_stage("a", files["source"], files["a"]), copy_stage("b", files["a"], files["b"]),
+              copy_stage("c", files["b"], files["c"])]
+    return stages, files, str(tmp_path / "state.json")
+
+def statuses(report):
+    return {name: result["status"] for name, result in report.items()}
+
+def test_stage_graph_follows_outputs_to_inputs():
+    graph = stage_graph(STAGES)
+    assert graph["captions"] == {"corpus_store", "extract_verses", "render"}
+    assert graph["extract_verses"] == set()
+
+def test_select_stages_takes_everything_upstream():
+    names = [stage["name"] for stage in select_stages(STAGES, ["captions"])]
+    assert set(names) == {"captions", "corpus_store", "extract_verses", "render", "asl_scraper"}
+    assert names == [stage["name"] for stage in STAGES if stage["name"] in names]  # Order kept
+    assert select_stages(STAGES, []) == STAGES
+    with pytest.raises(ValueError):
+        select_stages(STAGES, ["nosuch"])
+
+def test_stale_reason(chain):
+    stages, files, _ = chain
+    stage = stages[0]
+    fingerprints = Fingerprints({})
+    inputs_hash = input_fingerprint(stage, fingerprints)
+    assert stale_reason(stage, None, inputs_hash, fingerprints) == "never run"
+    record = {"inputs": inputs_hash, "outputs": {files["a"]: "missing"}}
+    assert stale_reason(stage, record, inputs_hash, fingerprints) is None
+    assert stale_reason(stage, record, "other", fingerprints) == "inputs changed"
+    with open(files["a"], "w") as file:
+        file.write("edited")
+    assert stale_reason(stage, record, inputs_hash, fingerprints) == f"{files['a']} missing or modified"
+
+def test_runs_only_what_changed(chain):
+    stages, files, state_file = chain
+    assert statuses(run_pipeline(stages, workers=2, state_file=state_file)) == dict.fromkeys("abc", "ran")
+    assert open(files["c"]).read() == "one"
+    assert statuses(run_pipeline(stages, state_file=state_file)) == dict.fromkeys("abc", "up to date")
+
+    os.remove(files["b"])
+    assert statuses(run_pipeline(stages, state_file=state_file)) == {"a": "up to date", "b": "ran", "c": "up to date"}
+
+def test_identical_outputs_cut_off_downstream(chain):
+    stages, files, state_file = chain
+    run_pipeline(stages, state_file=state_file)
+    report = run_pipeline(stages, force={"a"}, state_file=state_file)
+    assert statuses(report) == {"a": "ran", "b": "up to date", "c": "up to date"}
+    assert report["a"]["reason"] == "forced"
+
+def test_dry_run_reports_downstream_of_stale_stages(chain):
+    stages, files, state_file = chain
+    run_pipeline(stages, state_file=state_file)
+    with open(files["source"], "w") as file:
+        file.write("two")
+    report = run_pipeline(stages, dry_run=True, state_file=state_file)
+    assert statuses(report) == dict.fromkeys("abc", "would run")
+    assert [report[name]["reason"] for name in "abc"] == ["inputs changed", "upstream stale", "upstream stale"]
+    assert open(files["c"]).read() == "one"  # Nothing ran
+    assert statuses(run_pipeline(stages, state_file=state_file)) == dict.fromkeys("abc", "ran")
+
+def test_failed_stage_skips_its_dependents(chain):
+    stages, files, state_file = chain
+    stages[0]["command"] = ["-c", "raise SystemExit(1)"]
+    report = run_pipeline(stages, state_file=state_file)
+    assert statuses(report) == {"a": "failed", "b": "skipped", "c": "skipped"}
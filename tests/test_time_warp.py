@@ -0,0 +1,70 @@
+import numpy as np
+from landmark_store import HANDS, LANDMARKS
+from time_warp import parse_non_manual_features, sign_factors, warp_clips
+
+def ramp(frames):
+    """A clip whose every landmark coordinate equals its frame index."""
+    return np.broadcast_to(np.arange(frames, dtype=np.float32)[:, None, None, None],
+                           (frames, HANDS, LANDMARKS, 3)).copy()
+
+def test_same_rate_keeps_every_frame():
+    clip = ramp(10)
+    warped, = warp_clips([clip], [30.0], 30)
+    np.testing.assert_array_equal(warped, clip)
+
+def test_speed_and_source_rate_set_the_step():
+    fast, = warp_clips([ramp(11)], [30.0], 30, speeds=[2.0])
+    np.testing.assert_array_equal(fast[:, 0, 0, 0], [0, 2, 4, 6, 8, 10])
+    high_rate, = warp_clips([ramp(11)], [60.0], 30)
+    np.testing.assert_array_equal(high_rate[:, 0, 0, 0], [0, 2, 4, 6, 8, 10])
+    slow, = warp_clips([ramp(3)], [30.0], 30, speeds=[0.5])
+    np.testing.assert_allclose(slow[:, 0, 0, 0], [0, 0.5, 1, 1.5, 2])
+
+def test_clips_are_warped_independently():
+    short, long = warp_clips([ramp(3), ramp(7) + 100], [30.0, 15.0], 30)
+    np.testing.assert_array_equal(short[:, 0, 0, 0], [0, 1, 2])
+    np.testing.assert_allclose(long[:, 0, 0, 0], 100 + np.arange(13) / 2)
+
+def test_repeats_tile_the_clip():
+    once, twice = warp_clips([ramp(4), ramp(4)], [30.0, 30.0], 30, repeats=[1, 2])
+    assert len(twice) == 2 * len(once)
+    np.testing.assert_array_equal(twice, np.concatenate([once, once]))
+
+def test_missing_hand_takes_the_nearer_frame():
+    clip = ramp(3)
+    clip[1, 1] = np.nan  # Second hand lost in the middle frame
+    clip[:, 0] = np.nan  # First hand never seen
+    warped, = warp_clips([clip], [30.0], 90)  # Output frames a third of the way between source frames
+    assert np.isnan(warped[:, 0]).all()
+    np.testing.assert_array_equal(warped[:, 1, 0, 0], [0, 0, np.nan, np.nan, np.nan, 2, 2])
+    both_seen = warp_clips([ramp(3)], [30.0], 90)[0]
+    np.testing.assert_allclose(both_seen[:, 1, 0, 0], np.arange(7) / 3, rtol=1e-6)
+
+def test_empty_and_single_frame_clips():
+    assert warp_clips([], [], 30) == []
+    single, = warp_clips([ramp(1)], [30.0], 30, speeds=[2.0])
+    assert len(single) == 1
+
+def test_hints_follow_the_named_sign():
+    default, signs = parse_non_manual_features("ALLAH signed slowly, repeated twice; MERCY quickly")
+    assert default == {"speed": 1.0, "repeats": 1}
+    assert signs["ALLAH"] == {"speed": 0.75, "repeats": 2}
+    assert signs["MERCY"] == {"speed": 1.3, "repeats": 1}
+    assert sign_factors("lord", (default, signs)) == (1.0, 1)
+
+def test_hint_before_any_sign_applies_to_the_verse():
+    default, signs = parse_non_manual_features("Slow and deliberate throughout")
+    assert default["speed"] == 0.8
+    assert signs == {}
+
+def test_only_the_ayahs_glosses_are_signs():
+    default, signs = parse_non_manual_features("FAST, emphatic MERCY", glosses={"mercy"})
+    assert set(signs) == {"MERCY"}
+    assert signs["MERCY"]["speed"] == 1.3
+    assert default["speed"] == 1.0
+
+def test_repeat_counts_and_hints_carried_across_sentences():
+    default, signs = parse_non_manual_features("Emphatic MERCY x3. Signed slowly; LORD once", glosses={"MERCY", "LORD"})
+    assert signs["MERCY"] == {"speed": 0.75, "repeats": 3}
+    assert signs["LORD"]["repeats"] == 1
+    assert default == {"speed": 1.0, "repeats": 1}
@@ -0,0 +1,49 @@
+import pytest
+from timeline import build_timeline, sign_spans
+
+ENTRIES = [
+    {"ayah": "1", "phrase": "In the name", "gloss": "NAME", "video": "videos/name.mp4"},
+    {"ayah": "1", "phrase": "of Allah", "gloss": "ALLAH", "video": "videos/allah.mp4"},
+    {"ayah": "2", "phrase": "Praise", "gloss": "PRAISE", "video": "videos/praise.mp4"},
+    {"ayah": "2", "phrase": "Praise", "gloss": "ALLAH", "video": "videos/allah.mp4"},
+]
+
+def test_sign_spans_pair_segments_with_their_clips():
+    segments = [{"clip": 0, "start": 0, "end": 10}, {"clip": 2, "start": 15, "end": 30}]  # Clip 1 had no hands
+    spans = sign_spans(ENTRIES, segments, offset=100)
+    assert [span["gloss"] for span in spans] == ["NAME", "PRAISE"]
+    assert [(span["start_frame"], span["end_frame"]) for span in spans] == [(100, 110), (115, 130)]
+
+def test_build_timeline_groups_ayahs_and_phrases():
+    segments = [{"clip": 0, "start": 0, "end": 10}, {"clip": 1, "start": 15, "end": 30},
+                {"clip": 2, "start": 40, "end": 50}, {"clip": 3, "start": 55, "end": 60}]
+    timeline = build_timeline(sign_spans(ENTRIES, segments), total_frames=66, fps=30, surah=1)
+
+    assert timeline["surah"] == 1
+    assert timeline["frames"] == 66
+    assert timeline["duration"] == pytest.approx(2.2)
+    first, second = timeline["ayahs"]
+    # An ayah starts where the previous one's last sign ends, so the transition into it is its own
+    assert (first["start_frame"], first["end_frame"]) == (0, 30)
+    assert (second["start_frame"], second["end_frame"]) == (30, 66)
+    assert timeline["keyframes"] == [0, 30]
+    assert [phrase["phrase"] for phrase in first["phrases"]] == ["In the name", "of Allah"]
+    praise, = second["phrases"]
+    assert [sign["gloss"] for sign in praise["signs"]] == ["PRAISE", "ALLAH"]
+    assert (praise["start"], praise["end"]) == (1.333, 2.0)  # Seconds, to the millisecond
+
+def test_empty_timeline():
+    timeline = build_timeline([], total_frames=0, fps=30)
+    assert timeline["ayahs"] == [] and timeline["keyframes"] == []
+
+def test_spans_from_build_final_frames():
+    pytest.importorskip("mediapipe")
+    from interpolate_extract import build_final_frames
+
+    hand = [[{"x": 0.5, "y": 0.5, "z": 0.0}] * 21]
+    clips = [[[]] + [hand] * 4 + [[]], [[]] * 3, [hand] * 6, [hand] * 2]
+    final_frames, segments = build_final_frames(clips, transition_frames=5)
+    spans = sign_spans(ENTRIES, segments)
+    assert [span["gloss"] for span in spans] == ["NAME", "PRAISE", "ALLAH"]
+    assert [(span["start_frame"], span["end_frame"]) for span in spans] == [(0, 4), (9, 15), (20, 22)]
+    assert len(final_frames) == 22
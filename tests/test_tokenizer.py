@@ -0,0 +1,45 @@
+import io
+import json
+import pytest
+from tokenizer import clean_and_split, corpus_statistics, iter_corpus, stream_corpus, stream_members, tokenize_texts
+
+def test_clean_and_split():
+    assert clean_and_split('(of) Allah, the "Lord"!') == ["allah", "the", "lord"]
+    assert clean_and_split("well-known [note] words") == ["well-known", "words"]
+
+def test_tokenize_texts_matches_clean_and_split():
+    texts = ["In (the) name", "(of) Allah", "", "line\nbreak (x)"]
+    assert tokenize_texts(texts) == [clean_and_split(text) for text in texts]
+    assert tokenize_texts(texts[:3]) == [clean_and_split(text) for text in texts[:3]]
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 16])
+def test_stream_members_matches_json_load(chunk_size):
+    text = ' {"1": "In (the) name", "2" : {"verses": ["a", "b \\"c\\""]}, "k\\"ey": 12345, "4": [1, {"}": ","}]}\n'
+    assert list(stream_members(io.StringIO(text), chunk_size)) == list(json.loads(text).items())
+
+@pytest.mark.parametrize("text", ["{}", " { } "])
+def test_stream_members_of_an_empty_object(text):
+    assert list(stream_members(io.StringIO(text), 1)) == []
+
+@pytest.mark.parametrize("text", ['{"a": 1', '{"a" 1}', '{"a": 1,}', "[1, 2]", ""])
+def test_stream_members_rejects_malformed_files(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(stream_members(io.StringIO(text), 2))
+
+def test_stream_corpus_matches_iter_corpus(tmp_path):
+    verses = {"1": {"verses": ["In the name of Allah", "Praise be to Allah"]}, "2": {"verses": ["Alif Lam Mim"]}}
+    words = {"1": "In (the) name", "2": "(of) Allah"}
+    for name, data in (("verses.json", verses), ("words.json", words)):
+        path = tmp_path / name
+        path.write_text(json.dumps(data, indent=4))
+        assert list(stream_corpus(str(path))) == list(iter_corpus(data))
+
+def test_corpus_statistics(tmp_path):
+    path = tmp_path / "verses.json"
+    path.write_text(json.dumps({"1": {"verses": ["Allah is One", "The One (and) only"]}, "2": {"verses": ["only Allah"]}}))
+    statistics = corpus_statistics(str(path))
+    assert statistics["vocabulary"] == ["allah", "is", "one", "only", "the"]
+    assert statistics["frequencies"]["one"] == 2 and statistics["frequencies"]["only"] == 2
+    assert statistics["first_occurrence"]["only"] == (1, 2, 2)
+    assert statistics["first_occurrence"]["allah"] == (1, 1, 0)
+    assert statistics["total_words"] == 8
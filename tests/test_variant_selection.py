@@ -0,0 +1,112 @@
+import itertools
+import json
+import numpy as np
+import pytest
+from landmark_store import (CANONICAL_WRIST, HANDS, LANDMARKS, MIDDLE_KNUCKLE, WRIST, array_to_landmarks,
+                            open_landmark_store, save_clip)
+from variant_selection import (MAX_TRANSITION_FRAMES, MIN_TRANSITION_FRAMES, MISSING_HAND_COST, load_candidates,
+                               pose_distances, quality_penalty, select_variants, transition_frames_for)
+
+def hand_clip(frames, wrist, size=0.1, hands=1, seed=0):
+    """A clip of one (or two) hands jittering around a wrist position, wrist to middle knuckle size apart."""
+    random = np.random.default_rng(seed)
+    array = np.full((frames, HANDS, LANDMARKS, 3), np.nan, dtype=np.float32)
+    for hand in range(hands):
+        points = np.asarray(wrist, dtype=np.float32) + random.uniform(-size, size, (frames, LANDMARKS, 2))
+        points[:, WRIST] = wrist
+        points[:, MIDDLE_KNUCKLE] = (wrist[0], wrist[1] - size)
+        array[:, hand, :, :2] = points
+        array[:, hand, :, 2] = 0.0
+    return array
+
+def variant(array, presence=1.0, jitter=0.0):
+    return {"array": array, "frames": len(array), "hand_presence": presence, "jitter": jitter}
+
+def brute_force(candidates):
+    """The cheapest variant sequence by trying every combination."""
+    best = (np.inf, None)
+    for chosen in itertools.product(*(range(len(variants)) for variants in candidates)):
+        picked = [variants[index] for variants, index in zip(candidates, chosen)]
+        cost = sum(quality_penalty([variant])[0] for variant in picked)
+        for before, after in zip(picked, picked[1:]):
+            end = before["array"][~np.isnan(before["array"][:, :, 0, 0]).all(axis=1)][-1, :, :, :2]
+            start = after["array"][~np.isnan(after["array"][:, :, 0, 0]).all(axis=1)][0, :, :, :2]
+            cost += float(np.nan_to_num(pose_distances(end, start), nan=MISSING_HAND_COST))
+        best = min(best, (cost, list(chosen)), key=lambda item: item[0])
+    return best
+
+def test_viterbi_matches_brute_force():
+    random = np.random.default_rng(1)
+    candidates = []
+    for sign in range(5):
+        candidates.append([variant(hand_clip(int(random.integers(5, 30)), random.uniform(0.2, 0.8, 2),
+                                             hands=int(random.integers(1, 3)), seed=sign * 10 + v),
+                                   presence=float(random.uniform(0.5, 1.0)), jitter=float(random.uniform(0, 0.02)))
+                           for v in range(int(random.integers(1, 4)))])
+    chosen, cost = select_variants(candidates)
+    expected_cost, expected = brute_force(candidates)
+    assert chosen == expected
+    assert cost == pytest.approx(expected_cost)
+
+def test_single_sign_takes_the_best_quality_variant():
+    candidates = [[variant(hand_clip(10, (0.5, 0.5)), presence=0.6), variant(hand_clip(10, (0.5, 0.5)), presence=1.0)]]
+    assert select_variants(candidates)[0] == [1]
+    assert select_variants([]) == ([], 0.0)
+
+def test_variants_that_join_up_beat_better_quality_ones():
+    near, far = hand_clip(10, (0.3, 0.5)), hand_clip(10, (0.9, 0.5))
+    candidates = [[variant(near)], [variant(far, presence=1.0), variant(hand_clip(10, (0.32, 0.5)), presence=0.9)],
+                  [variant(near)]]
+    assert select_variants(candidates)[0] == [0, 1, 0]
+
+def test_missing_hand_costs_a_fixed_amount():
+    one_hand, two_hands = hand_clip(1, (0.5, 0.5))[0, :, :, :2], hand_clip(1, (0.5, 0.5), hands=2)[0, :, :, :2]
+    assert pose_distances(one_hand, two_hands) == pytest.approx(MISSING_HAND_COST / 2)
+
+def test_transition_length_follows_the_distance():
+    assert transition_frames_for(0.0) == MIN_TRANSITION_FRAMES
+    assert transition_frames_for(10.0) == MAX_TRANSITION_FRAMES
+    assert transition_frames_for(float("nan")) == MAX_TRANSITION_FRAMES
+    assert MIN_TRANSITION_FRAMES < transition_frames_for(0.2) < MAX_TRANSITION_FRAMES
+
+def test_stored_variants_load_in_the_canonical_space(tmp_path):
+    connection = open_landmark_store(str(tmp_path / "store.sqlite"))
+    save_clip(connection, {"clip_id": "book/1", "gloss": "book", "fps": 25.0, "width": 640, "height": 480},
+              hand_clip(12, (0.2, 0.3), size=0.05))
+    candidates = load_candidates(connection, ["book", "drink"])
+    assert list(candidates) == ["book"]
+    wrists = candidates["book"][0]["array"][:, 0, WRIST, :2]
+    np.testing.assert_allclose(wrists.mean(axis=0), CANONICAL_WRIST, atol=1e-3)  # Landmarks are stored as float16
+
+def test_stored_variant_renders_next_to_an_extracted_clip(tmp_path, monkeypatch):
+    """A stored variant and a clip extracted from video end up in the same coordinate space."""
+    pytest.importorskip("mediapipe")
+    import interpolate_extract
+
+    store_file = str(tmp_path / "store.sqlite")
+    connection = open_landmark_store(store_file)
+    save_clip(connection, {"clip_id": "book/1", "gloss": "book", "fps": 30.0, "width": 640, "height": 480},
+              hand_clip(12, (0.2, 0.3), size=0.05))
+    connection.commit()
+    connection.close()
+
+    video_path = tmp_path / "drink.mp4"
+    video_path.write_bytes(b"")
+    phrases_file = tmp_path / "phrases.json"
+    phrases_file.write_text(json.dumps({"1": {"a book": ["videos/book.mp4"], "to drink": [str(video_path)]}}))
+    monkeypatch.setattr(interpolate_extract, "extract_hand_landmarks",
+                        lambda path: array_to_landmarks(hand_clip(12, (0.8, 0.7), size=0.2, seed=3)))
+    monkeypatch.setattr(interpolate_extract, "clip_fps", lambda path: 30.0)
+    monkeypatch.setattr(interpolate_extract, "clip_stretch", lambda path: 1.0)
+    blended = {}
+
+    def blend(landmarks_data_list, output_video_file, **options):
+        blended["clips"] = landmarks_data_list
+
+    monkeypatch.setattr(interpolate_extract, "blend_video_segments", blend)
+    interpolate_extract.process_videos_from_json(str(phrases_file), str(tmp_path / "out"), variants_store=store_file)
+
+    stored, extracted = blended["clips"]
+    for clip in (stored, extracted):
+        wrists = np.array([[frame[0][WRIST]["x"], frame[0][WRIST]["y"]] for frame in clip if frame])
+        np.testing.assert_allclose(wrists.mean(axis=0), CANONICAL_WRIST, atol=1e-3)
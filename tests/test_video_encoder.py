@@ -0,0 +1,42 @@
+import cv2
+import numpy as np
+import pytest
+from video_encoder import OpenCVEncoder, open_encoder, resolve_backend, validate_video
+
+def frames(count, width, height):
+    for index in range(count):
+        frame = np.zeros((height, width, 3), dtype=np.uint8)
+        cv2.circle(frame, (width // 2, height // 2), 1 + index, (255, 255, 255), -1)
+        yield frame
+
+@pytest.mark.parametrize("size", [(64, 48), (65, 47)])
+def test_opencv_writes_and_validates_every_frame(tmp_path, size):
+    path = str(tmp_path / "out.mp4")
+    with open_encoder(path, 30, size, backend="opencv") as encoder:
+        for frame in frames(10, *size):
+            encoder.write(frame)
+    stats = encoder.close()
+    assert stats["frames"] == 10 and stats["backend"].startswith("opencv")
+    # Odd sizes are padded to even ones, as 4:2:0 video needs
+    assert encoder.output_size == (size[0] + size[0] % 2, size[1] + size[1] % 2)
+    validate_video(path, 10, encoder.output_size)
+
+def test_frames_of_the_wrong_size_are_rejected(tmp_path):
+    encoder = OpenCVEncoder(str(tmp_path / "out.mp4"), 30, (64, 48))
+    with pytest.raises(ValueError):
+        encoder.write(np.zeros((64, 48, 3), dtype=np.uint8))
+    encoder._finish()
+
+def test_validation_catches_a_short_video(tmp_path):
+    path = str(tmp_path / "out.mp4")
+    with open_encoder(path, 30, (64, 48), backend="opencv") as encoder:
+        for frame in frames(3, 64, 48):
+            encoder.write(frame)
+    with pytest.raises(RuntimeError):
+        validate_video(path, 4, (64, 48))
+
+def test_backends():
+    assert resolve_backend("opencv") == "opencv"
+    assert resolve_backend("auto") in ("ffmpeg", "opencv")
+    with pytest.raises(ValueError):
+        open_encoder("out.mp4", 30, (64, 48), backend="gstreamer")
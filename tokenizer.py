@@ -0,0 +1,135 @@
+import json
+import re
+import string
+from collections import Counter
+from bisect import bisect_right
+from itertools import accumulate, chain
+
+# Escaped quotes (\") and any text within parentheses or square brackets
+REMOVED_TEXT_RE = re.compile(r'\\"|[\(\[].*?[\)\]]')
+
+# Punctuation except the dash. The backslash is kept too, as the original
+# character class used it as an escape rather than matching it.
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation.replace("-", "").replace("\\", ""))
+
+def clean_and_split(text):
+    """Removes bracketed text and punctuation (except dashes), lowercases and splits into words."""
+    return REMOVED_TEXT_RE.sub("", text).translate(PUNCTUATION_TABLE).lower().split()
+
+def tokenize_texts(texts):
+    """
+    Tokenizes many texts like clean_and_split, but cleans them as one newline-joined
+    string. Bracketed text never spans a newline, so the result is the same per text.
+    """
+    if any("\n" in text for text in texts):
+        return [clean_and_split(text) for text in texts]
+    cleaned = REMOVED_TEXT_RE.sub("", "\n".join(texts)).translate(PUNCTUATION_TABLE).lower()
+    return [line.split() for line in cleaned.split("\n")]
+
+STREAM_CHUNK = 1 << 16
+# Pieces of the top-level corpus object: its opening brace, a member's key and colon, and the comma or closing brace after a value
+OBJECT_START_RE = re.compile(r"\s*\{\s*(\})?")
+MEMBER_KEY_RE = re.compile(r'\s*("(?:[^"\\]|\\.)*")\s*:\s*')
+MEMBER_END_RE = re.compile(r"\s*([,}])")
+DECODER = json.JSONDecoder()
+
+def iter_corpus(data):
+    """
+    Yields (position_key, text) for a loaded corpus file.
+    quran_verses.json gives (surah, ayah) keys, en-qurancom.json gives (word_id,) keys.
+    """
+    return corpus_entries(data.items())
+
+def corpus_entries(members):
+    """iter_corpus over (key, value) members, e.g. as stream_members reads them."""
+    for key, value in members:
+        if isinstance(value, dict):
+            for ayah, verse in enumerate(value.get("verses", []), start=1):
+                yield (int(key), ayah), verse
+        else:
+            yield (int(key),), value
+
+def stream_members(file, chunk_size=STREAM_CHUNK):
+    """
+    Yields the (key, value) members of the JSON object in a file one at a time, reading it in
+    chunks, so a corpus is never held as one string plus the whole decoded dict.
+    """
+    buffer = ""
+    eof = False
+    while not eof:
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer += chunk
+        start = OBJECT_START_RE.match(buffer)
+        if (start and start.end() < len(buffer)) or buffer.lstrip()[:1] not in ("", "{"):
+            break
+    if not start:
+        raise json.JSONDecodeError("Expected a JSON object", buffer, 0)
+    if start[1]:
+        return
+    position = start.end()
+    while True:
+        # A member only counts once the comma or brace after it has been read, so a value cut
+        # off at the end of the buffer (e.g. a number) is never taken for a complete one
+        key = MEMBER_KEY_RE.match(buffer, position)
+        if key:
+            try:
+                value, end = DECODER.raw_decode(buffer, key.end())
+            except json.JSONDecodeError:
+                end = None
+            separator = end and MEMBER_END_RE.match(buffer, end)
+            if separator:
+                text = key[1]
+                yield (text[1:-1] if "\\" not in text else json.loads(text)), value
+                if separator[1] == "}":
+                    return
+                position = separator.end()
+                continue
+        if eof:
+            raise json.JSONDecodeError("Malformed or truncated corpus file", buffer, position)
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+def stream_corpus(corpus_file):
+    """Yields (position_key, text) from quran_verses.json or en-qurancom.json without loading it whole."""
+    with open(corpus_file, 'r', encoding='utf-8') as file:
+        yield from corpus_entries(stream_members(file))
+
+def load_corpus(corpus_file):
+    """Loads quran_verses.json or en-qurancom.json."""
+    with open(corpus_file, 'r', encoding='utf-8') as file:
+        return json.load(file)
+
+def corpus_statistics(corpus_file):
+    """
+    Tokenizes a corpus file in a single pass.
+    Returns {"vocabulary": sorted unique words, "frequencies": Counter,
+    "first_occurrence": word -> (*position_key, word_index), "total_words": int}.
+    """
+    keys, texts = zip(*stream_corpus(corpus_file))
+    tokenized = tokenize_texts(texts)
+
+    words = list(chain.from_iterable(tokenized))
+    frequencies = Counter(words)
+
+    # Walk the words backwards so each word keeps its earliest index, then map
+    # those flat indexes back to (text, word index) positions
+    first_index = {word: i for i, word in zip(range(len(words) - 1, -1, -1), reversed(words))}
+    text_ends = list(accumulate(len(text_words) for text_words in tokenized))
+    first_occurrence = {}
+    for word, i in first_index.items():
+        text = bisect_right(text_ends, i)
+        text_start = text_ends[text - 1] if text else 0
+        first_occurrence[word] = (*keys[text], i - text_start)
+
+    return {
+        "vocabulary": sorted(frequencies),
+        "frequencies": frequencies,
+        "first_occurrence": first_occurrence,
+        "total_words": len(words),
+    }
+
+def numbered_vocabulary(vocabulary):
+    """Numbers words from 1 in the format of unique_words.json."""
+    return {i + 1: word for i, word in enumerate(vocabulary)}
@@ -1,97 +1,24 @@
 import json
-import re
-import string
+from tokenizer import corpus_statistics, numbered_vocabulary
 
-def get_unique_1():
-    # Load the dataset from the JSON file
-    with open('datasets/en-qurancom.json', 'r', encoding='utf-8') as file:
-        data = json.load(file)
-
-    # Function to clean, remove punctuation (except dashes), and split the string
-    def clean_and_split(text):
-        # Remove escaped quotes (\"), any text within parentheses or square brackets
-        text = re.sub(r'\\\"', '', text)  # Remove escaped quotes
-        text = re.sub(r'[\(\[].*?[\)\]]', '', text)  # Matches both () and []
-
-        # Remove leading/trailing quotes if any
-        text = text.strip('"')
-
-        # Remove punctuation using string.punctuation, but keep the dash
-        punctuation = string.punctuation.replace('-', '')  # Remove dash from punctuation
-        text = re.sub(r'[{}]'.format(punctuation), '', text)
-
-        # Convert text to lowercase
-        text = text.lower()
-
-        # Remove extra spaces and split by spaces
-        words = text.strip().split()
-        return words
-
-    # Set to store unique words
-    unique_words = set()
-
-    # Iterate through the JSON data
-    for key, value in data.items():
-        words = clean_and_split(value)
-        unique_words.update(words)
-
-    # Convert the set back to a list and sort it
-    unique_words_list = sorted(list(unique_words))
+def save_unique_words(corpus_file, output_file):
+    """Saves the sorted unique words of a corpus file as a numbered JSON object."""
+    stats = corpus_statistics(corpus_file)
 
     # Output as a JSON file
-    output_data = {i+1: word for i, word in enumerate(unique_words_list)}
+    output_data = numbered_vocabulary(stats["vocabulary"])
 
     # Save to a JSON file
-    with open('datasets/unique_words.json', 'w', encoding='utf-8') as f:
+    with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(output_data, f, indent=4)
 
-    print("Unique words have been saved to 'unique_words.json'.")
-
-def get_unique_2():
-    # Load the dataset from the JSON file
-    with open('datasets/quran_verses.json', 'r', encoding='utf-8') as file:
-        data = json.load(file)
-
-    # Function to clean, remove punctuation (except dashes), and split the string
-    def clean_and_split(text):
-        # Remove escaped quotes (\"), any text within parentheses or square brackets
-        text = re.sub(r'\\\"', '', text)  # Remove escaped quotes
-        text = re.sub(r'[\(\[].*?[\)\]]', '', text)  # Matches both () and []
-
-        # Remove leading/trailing quotes if any
-        text = text.strip('"')
+    print(f"{len(output_data)} unique words out of {stats['total_words']} have been saved to '{output_file}'.")
 
-        # Remove punctuation using string.punctuation, but keep the dash
-        punctuation = string.punctuation.replace('-', '')  # Remove dash from punctuation
-        text = re.sub(r'[{}]'.format(punctuation), '', text)
-
-        # Convert text to lowercase
-        text = text.lower()
-
-        # Remove extra spaces and split by spaces
-        words = text.strip().split()
-        return words
-
-    # Set to store unique words
-    unique_words = set()
-
-    # Iterate through the surahs and their verses
-    for surah_key, surah_data in data.items():
-        verses = surah_data.get("verses", [])
-        for verse in verses:
-            words = clean_and_split(verse)
-            unique_words.update(words)
-
-    # Convert the set back to a list and sort it
-    unique_words_list = sorted(list(unique_words))
-
-    # Output as a JSON file
-    output_data = {i+1: word for i, word in enumerate(unique_words_list)}
-
-    # Save to a JSON file
-    with open('datasets/unique_words2.json', 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=4)
+def get_unique_1():
+    save_unique_words('datasets/en-qurancom.json', 'datasets/unique_words.json')
 
-    print("Unique words have been saved to 'unique_words2.json'.")
+def get_unique_2():
+    save_unique_words('datasets/quran_verses.json', 'datasets/unique_words2.json')
 
-get_unique_2()
\ No newline at end of file
+if __name__ == "__main__":
+    get_unique_2()